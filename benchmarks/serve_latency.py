@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Latency of render server compared with one-shot CLI.
+
+Usage: serve_latency.py [TEMPLATE_FILEPATH] [REQUESTS]
+
+Default template is examples/full.xml.
+"""
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import os.path
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import surveyor.server
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+"""Root directory of repository."""
+
+DEFAULT_TEMPLATE = os.path.join(ROOT_DIR, "examples", "full.xml")
+"""Template to render by default."""
+
+DEFAULT_REQUESTS = 20
+"""Default amount of renders to measure."""
+
+
+def measure(func, requests):
+    timings = []
+    for _ in range(requests):
+        started_at = time.time()
+        func()
+        timings.append(time.time() - started_at)
+
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.9)]
+
+
+def main():
+    template = os.path.abspath(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_TEMPLATE)
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_REQUESTS
+    workdir = tempfile.mkdtemp()
+    socket_path = os.path.join(workdir, "surveyor.sock")
+    output = os.path.join(workdir, "output.xlsx")
+    environment = dict(os.environ, PYTHONPATH=ROOT_DIR)
+
+    cli = [sys.executable, "-c", "import sys, surveyor; sys.exit(surveyor.main())"]
+    daemon = subprocess.Popen(cli + ["serve", "--quiet", "--socket", socket_path], env=environment)
+    try:
+        while not os.path.exists(socket_path):
+            time.sleep(0.05)
+
+        client = surveyor.server.Client(socket_path)
+        results = (
+            ("cli", measure(lambda: subprocess.check_call(cli + ["-o", output, template], env=environment),
+                            requests)),
+            ("serve", measure(lambda: client.render(path=template), requests)))
+    finally:
+        daemon.terminate()
+        daemon.wait()
+        shutil.rmtree(workdir)
+
+    print("{0:<8}{1:>12}{2:>12}".format("mode", "p50, ms", "p90, ms"))
+    for name, (median, percentile) in results:
+        print("{0:<8}{1:>12.1f}{2:>12.1f}".format(name, median * 1000, percentile * 1000))
+
+
+if __name__ == "__main__":
+    main()
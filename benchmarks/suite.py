@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmarks of parse, process and save phases on synthetic templates.
+
+Usage: suite.py [-o RESULTS_FILEPATH] [--scenario NAME ...] [--repeat N]
+                [--compare BASELINE_FILEPATH] [--threshold RATIO]
+
+Scenarios with -native suffix render the same templates as their
+openpyxl counterparts with native xlsx writer.
+
+Every phase is timed separately (the best of repeats). Peak of memory
+allocated within every phase is measured by tracemalloc in a separate
+run, because tracing slows execution down. Results are stored as JSON.
+If baseline results are given, phases which became slower than
+threshold allows are reported and exit code is 1.
+"""
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import gc
+import json
+import optparse
+import os
+import os.path
+import platform
+import random
+import sys
+import tempfile
+import time
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+import openpyxl
+
+import surveyor
+import surveyor.parse
+
+
+DEFAULT_REPEAT = 3
+"""Default amount of timed runs of every scenario."""
+
+DEFAULT_THRESHOLD = 0.1
+"""Default allowed slowdown ratio compared to baseline."""
+
+PHASES = "parse", "process", "save"
+"""Phases of rendering which are measured."""
+
+SCENARIOS = {
+    "plain": dict(rows=20000, columns=10, style_density=0.0, comment_density=0.0, tables=1),
+    "styled": dict(rows=20000, columns=10, style_density=0.5, comment_density=0.0, tables=1),
+    "commented": dict(rows=5000, columns=10, style_density=0.1, comment_density=0.05, tables=1),
+    "wide": dict(rows=2000, columns=100, style_density=0.1, comment_density=0.0, tables=1),
+    "many-tables": dict(rows=200, columns=10, style_density=0.2, comment_density=0.0, tables=100),
+    "stream": dict(rows=20000, columns=10, style_density=0.5, comment_density=0.0, tables=1, mode="stream"),
+    "plain-native": dict(rows=20000, columns=10, style_density=0.0, comment_density=0.0, tables=1, mode="native"),
+    "styled-native": dict(rows=20000, columns=10, style_density=0.5, comment_density=0.0, tables=1, mode="native"),
+    "commented-native": dict(rows=5000, columns=10, style_density=0.1, comment_density=0.05, tables=1,
+                             mode="native"),
+}
+"""Benchmark scenarios: shapes of generated templates."""
+
+STYLES = (
+    'font-bold="true"',
+    'font-italic="true" font-color="FF0000"',
+    'number_format="0.00"',
+    'pattern-fill-patternType="solid" pattern-fill-fgColor="DDDDDD"',
+    'alignment-horizontal="center"',
+    'border-bottom="thin, 000000"',
+)
+"""Inline styles which cells get at random."""
+
+
+def generate_template(rows, columns, style_density, comment_density, tables, mode=None, seed=0):
+    """Generates XML template.
+
+    rows are split between tables evenly, tables are placed one under
+    another. Densities are ratios of cells with inline styles and
+    comments.
+    """
+
+    rnd = random.Random(seed)
+    chunks = ['<workbook mode="{0}"><sheet>'.format(mode or "default")]
+    rows_per_table = max(1, rows // tables)
+
+    for table_idx in range(tables):
+        chunks.append('<table startrow="{0}" startcolumn="1">'.format(table_idx * (rows_per_table + 1) + 1))
+        for row_idx in range(rows_per_table):
+            chunks.append("<tr>")
+            for col_idx in range(columns):
+                attrs = []
+                if rnd.random() < style_density:
+                    attrs.append(rnd.choice(STYLES))
+                if rnd.random() < comment_density:
+                    attrs.append('comment="Comment {0}" comment-author="benchmark"'.format(row_idx))
+                value = row_idx * columns + col_idx if col_idx % 2 else "Text {0}".format(row_idx)
+                chunks.append("<td {0}>{1}</td>".format(" ".join(attrs), value))
+            chunks.append("</tr>")
+        chunks.append("</table>")
+
+    chunks.append("</sheet></workbook>")
+
+    return "".join(chunks)
+
+
+def run_phases(xml, output_path):
+    """Runs phases once and yields (phase, result) pairs."""
+
+    started_at = time.time()
+    parsed = surveyor.parse.parse_fileobj(xml)
+    yield "parse", time.time() - started_at
+
+    started_at = time.time()
+    workbook = parsed.process()
+    yield "process", time.time() - started_at
+
+    started_at = time.time()
+    workbook.save(output_path)
+    yield "save", time.time() - started_at
+
+
+def measure_times(xml, output_path, repeat):
+    best = dict((phase, float("inf")) for phase in PHASES)
+
+    for _ in range(repeat):
+        gc.collect()
+        for phase, elapsed in run_phases(xml, output_path):
+            best[phase] = min(best[phase], elapsed)
+
+    return best
+
+
+def measure_memory(xml, output_path):
+    """Returns peak of traced memory in bytes for every phase."""
+
+    peaks = dict.fromkeys(PHASES)
+    if tracemalloc is None:
+        return peaks
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for phase, _ in run_phases(xml, output_path):
+            peaks[phase] = tracemalloc.get_traced_memory()[1]
+            # Restart drops traces, so the next peak counts allocations of the next phase only.
+            tracemalloc.stop()
+            tracemalloc.start()
+    finally:
+        tracemalloc.stop()
+
+    return peaks
+
+
+def run_scenario(name, repeat):
+    params = SCENARIOS[name]
+    xml = generate_template(**params)
+    handle, output_path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(handle)
+
+    try:
+        times = measure_times(xml, output_path, repeat)
+        peaks = measure_memory(xml, output_path)
+    finally:
+        os.remove(output_path)
+
+    return {
+        "params": params,
+        "phases": dict((phase, {"time": times[phase], "peak_memory": peaks[phase]}) for phase in PHASES)}
+
+
+def make_meta():
+    try:
+        import lxml.etree
+        lxml_version = lxml.etree.__version__
+    except ImportError:
+        lxml_version = None
+
+    return {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "openpyxl": openpyxl.__version__,
+        "lxml": lxml_version,
+        "surveyor": ".".join(str(part) for part in surveyor.__version__),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Returns list of regressions: (scenario, phase, time, baseline time)."""
+
+    regressions = []
+
+    for name, result in sorted(results["scenarios"].items()):
+        base = baseline["scenarios"].get(name)
+        if base is None or base["params"] != result["params"]:
+            continue
+
+        for phase in PHASES:
+            current, previous = result["phases"][phase]["time"], base["phases"][phase]["time"]
+            if current > previous * (1.0 + threshold):
+                regressions.append((name, phase, current, previous))
+
+    return regressions
+
+
+def get_options():
+    usage = "%prog [-o RESULTS_FILEPATH] [--scenario NAME ...] [--compare BASELINE_FILEPATH]"
+
+    parser = optparse.OptionParser(usage=usage)
+    parser.add_option("-o", "--output",
+                      help="Filepath to store results as JSON.",
+                      metavar="RESULTS_FILEPATH",
+                      default=None)
+    parser.add_option("--scenario",
+                      help="Scenario to run, may be set several times. Default is all of: {0}".format(
+                          ", ".join(sorted(SCENARIOS))),
+                      metavar="NAME",
+                      action="append",
+                      choices=sorted(SCENARIOS),
+                      default=[])
+    parser.add_option("--repeat",
+                      help="Amount of timed runs. Default is {0}".format(DEFAULT_REPEAT),
+                      metavar="N",
+                      type="int",
+                      default=DEFAULT_REPEAT)
+    parser.add_option("--compare",
+                      help="Filepath of baseline results to compare with.",
+                      metavar="BASELINE_FILEPATH",
+                      default=None)
+    parser.add_option("--threshold",
+                      help="Allowed slowdown ratio against baseline. Default is {0}".format(DEFAULT_THRESHOLD),
+                      metavar="RATIO",
+                      type="float",
+                      default=DEFAULT_THRESHOLD)
+
+    options, _ = parser.parse_args()
+
+    return options
+
+
+def main():
+    options = get_options()
+    results = {"meta": make_meta(), "scenarios": {}}
+
+    print("{0:<18}{1:<10}{2:>12}{3:>16}".format("scenario", "phase", "time, s", "peak memory, MB"))
+    for name in options.scenario or sorted(SCENARIOS):
+        result = results["scenarios"][name] = run_scenario(name, options.repeat)
+        for phase in PHASES:
+            measured = result["phases"][phase]
+            peak = measured["peak_memory"]
+            print("{0:<18}{1:<10}{2:>12.3f}{3:>16}".format(
+                name, phase, measured["time"], "-" if peak is None else "{0:.1f}".format(peak / 1024.0 / 1024.0)))
+
+    if options.output:
+        with open(options.output, "w") as resource:
+            json.dump(results, resource, indent=2, sort_keys=True)
+
+    if not options.compare:
+        return os.EX_OK
+
+    with open(options.compare) as resource:
+        baseline = json.load(resource)
+
+    regressions = compare(results, baseline, options.threshold)
+    for name, phase, current, previous in regressions:
+        print("REGRESSION {0}/{1}: {2:.3f}s, baseline {3:.3f}s (+{4:.0%})".format(
+            name, phase, current, previous, current / previous - 1.0))
+
+    return 1 if regressions else os.EX_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
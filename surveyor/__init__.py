@@ -3,11 +3,22 @@
 
 from __future__ import unicode_literals
 
+import functools
 import optparse
 import os
 import os.path
+import sys
 
+import surveyor.batch
+import surveyor.cache
+import surveyor.data
+import surveyor.elements
+import surveyor.metrics
+import surveyor.output
 import surveyor.parse
+import surveyor.plan
+import surveyor.profiling
+import surveyor.server
 
 
 __version__ = 0, 1, 0
@@ -19,27 +30,259 @@ DEFAULT_FILENAME = "result.xlsx"
 DEFAULT_FILEPATH = os.path.join(os.getcwd(), DEFAULT_FILENAME)
 """Default filepath to save into."""
 
+COMMANDS = {
+    "serve": surveyor.server.serve,
+    "client": surveyor.server.client}
+"""Subcommands of CLI which are not rendering of templates."""
+
 
 def get_options():
-    usage = "%prog [-o OUTPUT_FILEPATH] TEMPLATE_FILEPATH"
+    parser = make_parser()
+    parsed, args = parser.parse_args()
+    check_options(parser, parsed, args)
+
+    try:
+        parsed.data = surveyor.data.parse_bindings(parsed.data)
+        parsed.param = surveyor.data.parse_params(parsed.param)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    return parsed, args
+
+
+def make_parser():
+    usage = "%prog [-o OUTPUT_FILEPATH] TEMPLATE_FILEPATH [TEMPLATE_FILEPATH ...]"
 
     parser = optparse.OptionParser(usage=usage)
     parser.add_option("-o", "--output",
-                      help="Filepath to store result file. Default is '{0}'".format(DEFAULT_FILEPATH),
+                      help=("Filepath to store result file, '{0}' is stdout. Template filepath '{0}' is stdin. "
+                            "Default is '{1}'").format(surveyor.output.STDIO_FILENAME, DEFAULT_FILEPATH),
                       metavar="OUTPUT_FILEPATH",
                       default=DEFAULT_FILEPATH)
+    parser.add_option("--output-dir",
+                      help=("Directory to store result files in if many templates are rendered. "
+                            "Default is current working directory."),
+                      metavar="OUTPUT_DIR",
+                      default=os.getcwd())
+    parser.add_option("--manifest",
+                      help=("File with pairs of template and output filepaths to render, one pair per line. "
+                            "Relative filepaths are relative to the manifest directory."),
+                      metavar="MANIFEST",
+                      default=None)
+    parser.add_option("--data",
+                      help=("Data for tables with data attribute as NAME=JSONL_FILEPATH. "
+                            "May be set several times."),
+                      metavar="NAME=JSONL_FILEPATH",
+                      action="append",
+                      default=[])
+    parser.add_option("--param",
+                      help="Value of {{ NAME }} placeholders of template as NAME=VALUE. May be set several times.",
+                      metavar="NAME=VALUE",
+                      action="append",
+                      default=[])
+    parser.add_option("--stream-parse",
+                      help="Parse template incrementally to keep memory footprint low.",
+                      action="store_true",
+                      default=False)
+    parser.add_option("--stream",
+                      help="Render workbook with write-only worksheets to keep memory footprint flat.",
+                      action="store_true",
+                      default=False)
+    parser.add_option("--native",
+                      help=("Render workbook with native xlsx writer instead of openpyxl. It is faster "
+                            "for large workbooks, but supports only cells, styles, comments, hyperlinks, "
+                            "freeze panes and column widths."),
+                      action="store_true",
+                      default=False)
+    parser.add_option("-j", "--jobs",
+                      help=("Amount of worker processes to render in parallel. Sheets of the only template "
+                            "or templates of batch are distributed between them. Default is 1."),
+                      metavar="JOBS",
+                      type="int",
+                      default=1)
 
-    parsed, args = parser.parse_args()
-    if len(args) == 0:
+    parser.add_option("--metrics",
+                      help="Print time and counters of rendering phases to stderr.",
+                      action="store_true",
+                      default=False)
+    parser.add_option("--metrics-json",
+                      help="Filepath to dump time and counters of rendering phases as JSON.",
+                      metavar="METRICS_FILEPATH",
+                      default=None)
+    parser.add_option("--styler-costs",
+                      help=("Print calls, time and allocated memory of each styler class to stderr. "
+                            "Memory is traced only on Python 3.4 and newer."),
+                      action="store_true",
+                      default=False)
+    parser.add_option("--profile-out",
+                      help=("Directory to write cProfile statistics, collapsed stacks, memory report "
+                            "and metrics of rendering into."),
+                      metavar="PROFILE_DIR",
+                      default=None)
+
+    parser.add_option("--cache-dir",
+                      help="Directory to cache parsed templates in. Caching is disabled by default.",
+                      metavar="CACHE_DIR",
+                      default=None)
+    parser.add_option("--cache-size",
+                      help="Size limit of template cache in bytes. Default is {0}".format(
+                          surveyor.cache.DEFAULT_MAX_SIZE),
+                      metavar="CACHE_SIZE",
+                      type="int",
+                      default=surveyor.cache.DEFAULT_MAX_SIZE)
+    parser.add_option("--incremental",
+                      help=("Keep rendered sheets in cache directory and render only sheets which template "
+                            "or classes module are changed since the previous render. Requires --cache-dir."),
+                      action="store_true",
+                      default=False)
+
+    return parser
+
+
+def check_options(parser, options, templates):
+    if len(templates) == 0 and not options.manifest:
         parser.error("Mandatory TEMPLATE_FILEPATH has to be set.")
+    if options.stream and options.native:
+        parser.error("Options --stream and --native are mutually exclusive.")
+    if options.incremental and not options.cache_dir:
+        parser.error("Option --incremental requires --cache-dir.")
+
+    if is_batch(options, templates):
+        if surveyor.output.STDIO_FILENAME in templates:
+            parser.error("Stdin is available for the only template.")
+        if needs_metrics(options):
+            parser.error("Metrics are available for the only template.")
+
+
+def is_batch(options, templates):
+    """Returns True if CLI renders many templates, not the only one."""
+
+    return len(templates) > 1 or bool(options.manifest)
+
+
+def needs_metrics(options):
+    return bool(options.metrics or options.metrics_json or options.styler_costs)
+
+
+def render(template, data=None, mode=None, workers=None, streaming=False, cache=None, params=None, metrics=None,
+           part_cache=None):
+    """Renders template into openpyxl workbook.
+
+    template is either filepath, parsed template or its render plan.
+    data maps names of data bindings of tables to iterables of records.
+    Templates with data are rendered in one process regardless of
+    workers. params are values of {{ placeholders }}. metrics is
+    surveyor.metrics.Metrics to report measurements into. part_cache is
+    a template cache to keep rendered sheets in, only changed sheets
+    are rendered then, in one process.
+    """
+
+    if isinstance(template, surveyor.plan.RenderPlan):
+        return template.render(params=params, data=data, mode=mode, workers=workers, metrics=metrics,
+                               part_cache=part_cache)
+    if not isinstance(template, surveyor.elements.WorkBook):
+        template = surveyor.parse.parse_filename(template, streaming=streaming, cache=cache, metrics=metrics)
+
+    return template.process(mode=mode, workers=workers, data=data, params=params, metrics=metrics,
+                            part_cache=part_cache)
+
+
+def render_async(template, output=None, **kwargs):
+    """Returns coroutine which renders template into output in executor.
+
+    See surveyor.aio.render_async(), it requires Python 3.5 or newer.
+    """
 
-    return parsed.output, args[0]
+    # Asyncio syntax cannot be imported by older Pythons.
+    import surveyor.aio
+
+    return surveyor.aio.render_async(template, output, **kwargs)
 
 
 def main():
-    out_filename, template_filename = get_options()
-    parsed = surveyor.parse.parse_filename(template_filename)
-    workbook = parsed.process()
-    workbook.save(out_filename)
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command in COMMANDS:
+        return COMMANDS[command]()
+
+    options, templates = get_options()
+    if options.profile_out:
+        return surveyor.profiling.profile(options.profile_out, functools.partial(run, options, templates),
+                                          styler_costs=options.styler_costs)
+
+    return run(options, templates)
+
+
+def run(options, templates, metrics=None):
+    """Renders templates as CLI options say.
+
+    metrics is used for the only template instead of the one which
+    options ask for.
+    """
+
+    render_kwargs = get_render_kwargs(options)
+    if is_batch(options, templates):
+        return run_batch(options, templates, render_kwargs)
+
+    return run_single(options, templates[0], metrics, render_kwargs)
+
+
+def get_render_kwargs(options):
+    cache = None
+    if options.cache_dir:
+        cache = surveyor.cache.TemplateCache(options.cache_dir, options.cache_size)
+
+    mode = None
+    if options.stream:
+        mode = surveyor.elements.WorkBook.MODE_STREAM
+    elif options.native:
+        mode = surveyor.elements.WorkBook.MODE_NATIVE
+
+    return {"mode": mode, "streaming": options.stream_parse, "cache": cache, "data": options.data,
+            "params": options.param, "part_cache": cache if options.incremental else None}
+
+
+def run_single(options, template, metrics, render_kwargs):
+    if metrics is None and needs_metrics(options):
+        metrics = surveyor.metrics.Metrics(styler_costs=options.styler_costs)
+
+    tracemalloc = surveyor.metrics.tracemalloc
+    trace_memory = options.styler_costs and tracemalloc is not None and not tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        surveyor.batch.render(template, options.output, workers=options.jobs, metrics=metrics, **render_kwargs)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    report_metrics(options, metrics)
+
+    return os.EX_OK
+
+
+def report_metrics(options, metrics):
+    if options.metrics:
+        sys.stderr.write(metrics.format() + "\n")
+    if options.styler_costs:
+        sys.stderr.write(metrics.format_styler_costs() + "\n")
+    if options.metrics_json:
+        with open(options.metrics_json, "w") as resource:
+            resource.write(metrics.to_json(indent=2, sort_keys=True))
+
+
+def run_batch(options, templates, render_kwargs):
+    jobs = surveyor.batch.make_jobs(templates, options.output_dir)
+    if options.manifest:
+        jobs = surveyor.batch.check_jobs(jobs + surveyor.batch.read_manifest(options.manifest))
+
+    failed = 0
+    for job, error in surveyor.batch.run(jobs, options.jobs, **render_kwargs):
+        if error is not None:
+            failed += 1
+            sys.stderr.write("Cannot render {0}: {1}\n".format(job.template, error))
+
+    if failed:
+        sys.stderr.write("{0} of {1} templates failed.\n".format(failed, len(jobs)))
+        return os.EX_DATAERR
 
     return os.EX_OK
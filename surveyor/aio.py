@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Asyncio API of rendering for services with event loop.
+
+Parsing, rendering and saving are CPU bound so they run in executor and
+event loop only reads template and writes result. Renderer caps amount
+of concurrent renders with semaphore, renders above the limit wait for
+their turn without occupying executor.
+
+Templates are filepaths, parsed templates, bytes or async streams with
+read() coroutine, e.g. asyncio.StreamReader or request content of
+aiohttp. Outputs are filepaths, writable file objects, async streams or
+None to get xlsx bytes. Async stream is either asyncio.StreamWriter or
+anything with write() coroutine, like response of aiohttp.
+
+Thread executor saves straight into async stream, in chunks, each one
+waits until stream takes it. Process executor returns bytes of xlsx
+which are written into stream then, data and metrics are not passed
+back to the process of event loop.
+
+This module requires Python 3.5 or newer.
+"""
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import io
+import weakref
+
+import surveyor
+import surveyor.output
+import surveyor.parse
+
+
+DEFAULT_CONCURRENCY = 4
+"""Default amount of concurrent renders of renderer."""
+
+READ_CHUNK_SIZE = 64 * 1024
+"""Size of chunk to read template from async stream with."""
+
+WRITE_CHUNK_SIZE = surveyor.output.DEFAULT_CHUNK_SIZE
+"""Size of chunk to write rendered bytes into async stream with."""
+
+DEFAULT_RENDERERS = weakref.WeakKeyDictionary()
+"""Default renderers of event loops, semaphore belongs to its loop."""
+
+
+class LoopWriter(object):
+    """Writer for executor threads which writes into async stream of loop."""
+
+    def __init__(self, stream, loop):
+        self.stream = stream
+        self.loop = loop
+
+    def write(self, data):
+        future = asyncio.run_coroutine_threadsafe(write_stream(self.stream, data), self.loop)
+        future.result()
+
+        return len(data)
+
+
+class Renderer(object):
+    """Renders templates in executor, concurrency renders at most at once.
+
+    executor is concurrent.futures executor, default executor of event
+    loop is used if it is None.
+    """
+
+    def __init__(self, executor=None, concurrency=DEFAULT_CONCURRENCY):
+        self.executor = executor
+        self.concurrency = concurrency
+        self.semaphore = None
+
+    @property
+    def in_process(self):
+        return isinstance(self.executor, concurrent.futures.ProcessPoolExecutor)
+
+    async def render(self, template, output=None, **kwargs):
+        """Renders template into output, returns xlsx bytes if output is None.
+
+        kwargs are passed to surveyor.render().
+        """
+
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with self.semaphore:
+            if is_async_reader(template):
+                template = await read_stream(template)
+
+            loop = asyncio.get_event_loop()
+            if output is None or not is_async_writer(output):
+                return await self.run(loop, render_job, template, output, kwargs)
+
+            if self.in_process:
+                content = await self.run(loop, render_job, template, None, kwargs)
+                for start in range(0, len(content), WRITE_CHUNK_SIZE):
+                    await write_stream(output, content[start:start + WRITE_CHUNK_SIZE])
+                return None
+
+            return await self.run(loop, render_job, template, LoopWriter(output, loop), kwargs)
+
+    def run(self, loop, func, *args):
+        return loop.run_in_executor(self.executor, functools.partial(func, *args))
+
+
+def get_default_renderer():
+    loop = asyncio.get_event_loop()
+
+    renderer = DEFAULT_RENDERERS.get(loop)
+    if renderer is None:
+        renderer = DEFAULT_RENDERERS[loop] = Renderer()
+
+    return renderer
+
+
+async def render_async(template, output=None, renderer=None, **kwargs):
+    """Renders template into output without blocking event loop.
+
+    renderer is Renderer to use, default one of event loop runs
+    DEFAULT_CONCURRENCY renders at once in default executor of loop.
+    """
+
+    return await (renderer or get_default_renderer()).render(template, output, **kwargs)
+
+
+def render_job(template, output, kwargs):
+    """Renders template in executor, returns xlsx bytes if output is None."""
+
+    kwargs = dict(kwargs)
+    if isinstance(template, bytes):
+        template = surveyor.parse.parse_fileobj(io.BytesIO(template), streaming=kwargs.pop("streaming", False),
+                                                metrics=kwargs.get("metrics"), cache=kwargs.pop("cache", None))
+
+    workbook = surveyor.render(template, **kwargs)
+    if output is not None:
+        return surveyor.output.save(workbook, output)
+
+    content = io.BytesIO()
+    workbook.save(content)
+
+    return content.getvalue()
+
+
+def is_async_reader(stream):
+    return asyncio.iscoroutinefunction(getattr(stream, "read", None))
+
+
+def is_async_writer(stream):
+    return hasattr(stream, "drain") or asyncio.iscoroutinefunction(getattr(stream, "write", None))
+
+
+async def read_stream(stream):
+    chunks = []
+
+    while True:
+        chunk = await stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        chunks.append(chunk)
+
+    return b"".join(chunks)
+
+
+async def write_stream(stream, data):
+    result = stream.write(data)
+    if inspect.isawaitable(result):
+        await result
+
+    drain = getattr(stream, "drain", None)
+    if drain is not None:
+        await drain()
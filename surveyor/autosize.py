@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import math
+import random
+
+import openpyxl.utils
+import openpyxl.worksheet.dimensions
+import six
+
+
+DEFAULT_WIDTH = 10
+"""Minimal width of autosized column."""
+
+WIDTH_ADDITION = 1
+"""Addition to the width of the longest value in column."""
+
+DEFAULT_SAMPLE_SIZE = 1000
+"""Default amount of data rows to sample for width estimation."""
+
+
+def get_value_width(value):
+    if not value:
+        return 0
+    if not isinstance(value, six.string_types):
+        value = six.text_type(value)
+    if value.startswith("="):  # Skip formulas
+        return 0
+
+    return len(value)
+
+
+class ColumnWidths(object):
+    """Tracker of column widths which is fed with rows while they are rendered."""
+
+    def __init__(self, default_width=DEFAULT_WIDTH, width_addition=WIDTH_ADDITION):
+        self.default_width = default_width
+        self.width_addition = width_addition
+        self.widths = {}
+
+    def add_row(self, left_column, cells, header=False):
+        """Takes into account values of cells, starting from left_column.
+
+        Cells are anything with value attribute.
+        """
+
+        self.update(self.widths, left_column, cells)
+
+    @staticmethod
+    def update(widths, left_column, cells):
+        for col, cell in enumerate(cells, start=left_column):
+            width = get_value_width(cell.value)
+            if width > widths.get(col, 0):
+                widths[col] = width
+
+    def get_width(self, col):
+        return max(self.default_width, self.widths.get(col, 0)) + self.width_addition
+
+    def apply(self, sheet):
+        for col in sorted(self.widths):
+            letter = openpyxl.utils.get_column_letter(col)
+            column = sheet.column_dimensions.get(letter)
+            if column is None:
+                # Write-only worksheets have no cells to create column dimensions.
+                column = openpyxl.worksheet.dimensions.ColumnDimension(sheet, letter)
+                sheet.column_dimensions[letter] = column
+
+            column.auto_size = True
+            column.width = self.get_width(col)
+
+
+class SampledColumnWidths(ColumnWidths):
+    """Estimation of column widths by header rows and sample of data rows.
+
+    Header rows are measured exactly. Data rows go through reservoir
+    sampling (Algorithm L) which computes how many rows to skip until the
+    next one gets into the sample, so rows which are skipped cost a
+    counter increment only.
+    """
+
+    def __init__(self, sample_size=DEFAULT_SAMPLE_SIZE, default_width=DEFAULT_WIDTH,
+                 width_addition=WIDTH_ADDITION, rnd=None):
+        super(SampledColumnWidths, self).__init__(default_width, width_addition)
+
+        self.sample_size = max(1, sample_size)
+        self.random = rnd or random.Random()
+        self.sample = []
+        self.rows_seen = 0
+        self.next_row = self.sample_size - 1
+        self.weight = 1.0
+
+    def add_row(self, left_column, cells, header=False):
+        if header:
+            return super(SampledColumnWidths, self).add_row(left_column, cells)
+
+        row_number = self.rows_seen
+        self.rows_seen += 1
+
+        if row_number < self.sample_size:
+            self.sample.append(self.measure(left_column, cells))
+            if self.rows_seen == self.sample_size:
+                self.skip()
+        elif row_number == self.next_row:
+            self.sample[self.random.randrange(self.sample_size)] = self.measure(left_column, cells)
+            self.skip()
+
+    def measure(self, left_column, cells):
+        widths = {}
+        self.update(widths, left_column, cells)
+
+        return widths
+
+    def skip(self):
+        self.weight *= math.exp(math.log(self.get_random()) / self.sample_size)
+
+        denominator = math.log(1.0 - self.weight)
+        if not denominator:  # weight is too small to pick any row anymore
+            self.next_row = float("inf")
+        else:
+            self.next_row += int(math.floor(math.log(self.get_random()) / denominator)) + 1
+
+    def get_random(self):
+        # random() may return 0.0 which log() does not accept.
+        return self.random.random() or 1e-12
+
+    def get_width(self, col):
+        width = self.widths.get(col, 0)
+        for row_widths in self.sample:
+            width = max(width, row_widths.get(col, 0))
+
+        return max(self.default_width, width) + self.width_addition
+
+    def apply(self, sheet):
+        for row_widths in self.sample:
+            for col in row_widths:
+                self.widths.setdefault(col, 0)
+
+        super(SampledColumnWidths, self).apply(sheet)
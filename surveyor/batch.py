@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Rendering of many templates within one interpreter.
+
+Batch is a list of jobs, each one is a pair of template and output
+filepaths. Jobs may be rendered one by one or by pool of worker
+processes. Failure of one job does not stop others, it is reported
+with the result of the job.
+"""
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import collections
+import functools
+import io
+import multiprocessing
+import os.path
+
+import surveyor
+import surveyor.exceptions
+import surveyor.output
+
+
+MANIFEST_COMMENT = "#"
+"""Prefix of comment lines in manifest file."""
+
+OUTPUT_EXTENSION = ".xlsx"
+"""Extension of output files which names are derived from templates."""
+
+
+Job = collections.namedtuple("Job", ["template", "output"])
+"""Template filepath to render and filepath to save result into."""
+
+Result = collections.namedtuple("Result", ["job", "error"])
+"""Outcome of job. error is None if job was successful."""
+
+
+def render(template, output, metrics=None, **kwargs):
+    """Renders template file into output file.
+
+    output is either filepath, writable file object or '-' for stdout.
+    kwargs are passed to surveyor.render().
+    """
+
+    workbook = surveyor.render(template, metrics=metrics, **kwargs)
+    if metrics is None:
+        return surveyor.output.save(workbook, output)
+
+    with metrics.phase("save"):
+        surveyor.output.save(workbook, output)
+
+
+def render_job(job, **kwargs):
+    try:
+        render(job.template, job.output, **kwargs)
+    except Exception as exc:
+        return Result(job, "{0}: {1}".format(exc.__class__.__name__, exc))
+
+    return Result(job, None)
+
+
+def run(jobs, workers=1, **kwargs):
+    """Renders jobs and yields their results in order of jobs.
+
+    kwargs are passed to render().
+    """
+
+    worker = functools.partial(render_job, **kwargs)
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield worker(job)
+        return
+
+    pool = multiprocessing.Pool(min(workers, len(jobs)))
+    try:
+        for result in pool.imap(worker, jobs):
+            yield result
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def make_jobs(templates, output_dir):
+    return check_jobs([Job(template, make_output_filename(template, output_dir)) for template in templates])
+
+
+def check_jobs(jobs):
+    """Returns jobs if their outputs differ, raises DuplicateOutputError otherwise.
+
+    Outputs are named by templates, so templates with the same name in
+    different directories would overwrite each other, concurrently for
+    pool of workers.
+    """
+
+    templates = {}
+    for job in jobs:
+        output = os.path.normcase(os.path.abspath(job.output))
+        if output in templates:
+            raise surveyor.exceptions.DuplicateOutputError(job.output, templates[output], job.template)
+        templates[output] = job.template
+
+    return jobs
+
+
+def make_output_filename(template, output_dir):
+    name = os.path.splitext(os.path.basename(template))[0]
+
+    return os.path.join(output_dir, name + OUTPUT_EXTENSION)
+
+
+def read_manifest(filename):
+    """Reads jobs from manifest file.
+
+    Every line of manifest has template filepath and output filepath,
+    separated by whitespace. Empty lines and lines which start with #
+    are skipped. Relative filepaths are relative to manifest directory.
+    """
+
+    root = os.path.dirname(os.path.abspath(filename))
+    jobs = []
+
+    with io.open(filename, "rt", encoding="utf-8") as resource:
+        for line_number, line in enumerate(resource, 1):
+            line = line.strip()
+            if not line or line.startswith(MANIFEST_COMMENT):
+                continue
+
+            chunks = line.split()
+            if len(chunks) != 2:
+                raise surveyor.exceptions.ManifestError(filename, line_number)
+
+            template, output = (os.path.join(root, chunk) for chunk in chunks)
+            jobs.append(Job(template, output))
+
+    return check_jobs(jobs)
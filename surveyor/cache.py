@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import abc
+import hashlib
+import os
+import os.path
+import sys
+import tempfile
+import threading
+
+try:
+    from collections import OrderedDict
+except ImportError:  # Python 2.6
+    from openpyxl.compat import OrderedDict
+
+import six
+
+import surveyor
+
+# noinspection PyUnresolvedReferences,PyPep8Naming
+from six.moves import cPickle as pickle  # noqa
+
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+"""Default size limit of cache directory in bytes."""
+
+READ_CHUNK_SIZE = 64 * 1024
+"""Size of chunk to read template with for hashing."""
+
+ENTRY_SUFFIX = ".pickle"
+"""Suffix of cache entry filenames."""
+
+PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+"""Protocol for serializing parsed templates."""
+
+CACHE_FORMAT = 3
+"""Version of layout of pickled elements, bumped when their state changes."""
+
+DEFAULT_STYLE_CACHE_SIZE = 4096
+"""Default amount of style objects to keep in style cache."""
+
+DEFAULT_MAX_ENTRIES = 64
+"""Default amount of parsed templates to keep in memory cache."""
+
+
+class StyleCache(object):
+    """LRU cache of openpyxl style objects.
+
+    Style objects are immutable for openpyxl so cells with identical
+    inline styles may share them. That saves construction of objects and
+    hashing them for the style tables of openpyxl workbook.
+    """
+
+    def __init__(self, max_size=DEFAULT_STYLE_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.styles = OrderedDict()
+
+    def __len__(self):
+        return len(self.styles)
+
+    def get(self, constructor, kwargs):
+        """Returns style object, made by constructor(**dict(kwargs)).
+
+        kwargs have to be hashable, e.g. a sorted tuple of pairs.
+        """
+
+        key = constructor, kwargs
+
+        try:
+            style = self.styles.pop(key)
+        except KeyError:
+            self.misses += 1
+            style = constructor(**dict(kwargs))
+            if len(self.styles) >= self.max_size:
+                self.styles.popitem(last=False)
+        else:
+            self.hits += 1
+
+        self.styles[key] = style
+
+        return style
+
+
+@six.add_metaclass(abc.ABCMeta)
+class BaseTemplateCache(object):
+    """Cache of parsed templates, keyed by template content."""
+
+    @staticmethod
+    def make_key(fileobj):
+        digest = hashlib.sha256()
+        digest.update(str(CACHE_FORMAT).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(".".join(str(part) for part in surveyor.__version__).encode("utf-8"))
+        digest.update(".".join(str(part) for part in sys.version_info[:2]).encode("utf-8"))
+        digest.update(b"\0")
+
+        for chunk in iter(lambda: fileobj.read(READ_CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def make_key_filename(self, filename):
+        with open(filename, "rb") as resource:
+            return self.make_key(resource)
+
+    @abc.abstractmethod
+    def get(self, key):
+        raise NotImplementedError("You have to define this method to invoke")
+
+    @abc.abstractmethod
+    def put(self, key, workbook):
+        raise NotImplementedError("You have to define this method to invoke")
+
+
+class MemoryTemplateCache(BaseTemplateCache):
+    """In-memory LRU cache of parsed templates for long-living processes.
+
+    Cache may be shared by threads, e.g. ones of executor.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getstate__(self):
+        # Locks cannot be pickled, e.g. for process executors.
+        return self.max_entries, self.entries
+
+    def __setstate__(self, state):
+        self.max_entries, self.entries = state
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            workbook = self.entries.pop(key, None)
+            if workbook is not None:
+                self.entries[key] = workbook
+
+        return workbook
+
+    def put(self, key, workbook):
+        with self.lock:
+            self.entries.pop(key, None)
+            while self.entries and len(self.entries) >= self.max_entries:
+                self.entries.popitem(last=False)
+            self.entries[key] = workbook
+
+
+class TemplateCache(BaseTemplateCache):
+    """On-disk cache of parsed templates.
+
+    Entries are keyed by template content, version of surveyor and
+    version of Python. Rendered sheet parts of incremental rendering
+    are kept here as well, under their own keys. When total size of
+    entries exceeds max_size, least recently used ones are removed.
+    Recency is tracked by modification time of entry files.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        path = self.get_path(key)
+
+        try:
+            with open(path, "rb") as resource:
+                workbook = pickle.load(resource)
+        except (IOError, OSError):
+            return None
+        except Exception:
+            # Broken entry is the same as missing one.
+            self.remove(path)
+            return None
+
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        return workbook
+
+    def put(self, key, workbook):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        resource = tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False)
+        try:
+            with resource:
+                pickle.dump(workbook, resource, PICKLE_PROTOCOL)
+            os.rename(resource.name, self.get_path(key))
+        except Exception:
+            # Temporary files are not entries, eviction never finds them.
+            self.remove(resource.name)
+            raise
+
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total_size = 0
+
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(ENTRY_SUFFIX):
+                continue
+
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self.remove(path)
+            total_size -= size
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
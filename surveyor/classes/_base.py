@@ -6,12 +6,75 @@ from __future__ import unicode_literals
 
 import abc
 
+import openpyxl.utils
 import six
 
 # noinspection PyUnresolvedReferences
 from six.moves import range
 
 
+STYLE_ATTRIBUTES = frozenset(("font", "fill", "border", "alignment", "protection", "number_format"))
+"""Attributes of cell which range operations may set."""
+
+
+def iter_cells(sheet, top_row, bottom_row, left_column, right_column):
+    """Yields existing cells of range row by row.
+
+    Bottom row and right column are exclusive, as ones of table
+    dimensions. Cells are not created, missing ones are skipped. Sheet
+    is either openpyxl worksheet or anything with find_cell(row, column).
+    """
+
+    columns = range(left_column, right_column)
+
+    find_cell = getattr(sheet, "find_cell", None)
+    if find_cell is not None:
+        for row_idx in range(top_row, bottom_row):
+            for col_idx in columns:
+                cell = find_cell(row_idx, col_idx)
+                if cell is not None:
+                    yield cell
+        return
+
+    # openpyxl keeps cells by coordinate, write-only worksheets keep nothing.
+    cells = getattr(sheet, "_cells", {})
+    letters = [openpyxl.utils.get_column_letter(col_idx) for col_idx in columns]
+    for row_idx in range(top_row, bottom_row):
+        row_idx = six.text_type(row_idx)
+        for letter in letters:
+            cell = cells.get(letter + row_idx)
+            if cell is not None:
+                yield cell
+
+
+def get_index(idx, start, stop, name):
+    """Returns sheet index of idx within [start, stop), negative idx counts from stop."""
+
+    size = stop - start
+    if not -size <= idx < size:
+        raise IndexError("{0} {1} is out of table of {2} {3}s".format(name, idx, size, name.lower()))
+
+    return (stop if idx < 0 else start) + idx
+
+
+def style_cells(cells, styles):
+    """Sets the same style objects to cells, e.g. font=Font(bold=True)."""
+
+    unknown = sorted(set(styles) - STYLE_ATTRIBUTES)
+    if unknown:
+        raise TypeError("Unknown style attributes {0}, known are {1}".format(
+            ", ".join(unknown), ", ".join(sorted(STYLE_ATTRIBUTES))))
+
+    styles = list(six.iteritems(styles))
+    count = 0
+    for cell in cells:
+        for attribute, style in styles:
+            setattr(cell, attribute, style)
+        count += 1
+
+    return count
+
+
 @six.add_metaclass(abc.ABCMeta)
 class Style(object):
 
@@ -41,7 +104,26 @@ class RowStyle(Style):
         pass
 
 
-class TableStyle(Style):
+class RangeStyle(Style):
+    """Style of sheet area with operations on ranges of cells.
+
+    Range operations set style objects to existing cells only and return
+    amount of styled cells. Style objects are shared by all cells.
+    """
+
+    def style_range(self, top_row, bottom_row, left_column, right_column, **styles):
+        """Styles cells of range, bottom row and right column are exclusive."""
+
+        return style_cells(iter_cells(self.sheet, top_row, bottom_row, left_column, right_column), styles)
+
+
+class TableStyle(RangeStyle):
+    """Style of table, bottom_row and right_column are exclusive.
+
+    Rows and columns of range operations are indexes within table,
+    negative ones count from the end. Indexes out of table raise
+    IndexError.
+    """
 
     def __init__(self, sheet, top_row, bottom_row, left_column, right_column):
         self.sheet = sheet
@@ -51,20 +133,78 @@ class TableStyle(Style):
         self.right_column = right_column
 
     def __iter__(self):
-        for row_idx in range(self.top_row, self.bottom_row + 1):
+        for row_idx in range(self.top_row, self.bottom_row):
             yield [
                 self.sheet.cell(row=row_idx, column=col_idx)
-                for col_idx in range(self.left_column, self.right_column + 1)
+                for col_idx in range(self.left_column, self.right_column)
             ]
 
+    def get_row(self, idx):
+        return get_index(idx, self.top_row, self.bottom_row, "Row")
+
+    def get_column(self, idx):
+        return get_index(idx, self.left_column, self.right_column, "Column")
+
+    def style_table(self, **styles):
+        return self.style_range(self.top_row, self.bottom_row, self.left_column, self.right_column, **styles)
+
+    def style_row(self, idx, **styles):
+        row_idx = self.get_row(idx)
+        return self.style_range(row_idx, row_idx + 1, self.left_column, self.right_column, **styles)
+
+    def style_column(self, idx, **styles):
+        col_idx = self.get_column(idx)
+        return self.style_range(self.top_row, self.bottom_row, col_idx, col_idx + 1, **styles)
+
+    def style_header(self, rows=1, **styles):
+        bottom_row = min(self.top_row + rows, self.bottom_row)
+        return self.style_range(self.top_row, bottom_row, self.left_column, self.right_column, **styles)
+
     def stylize(self):
         pass
 
 
-class SheetStyle(Style):
+class SheetStyle(RangeStyle):
+    """Style of sheet, rows and columns of range operations are sheet indexes.
+
+    Write-only worksheets keep no cells to style.
+    """
 
     def __init__(self, sheet):
         self.sheet = sheet
 
+    def style_row(self, row_idx, **styles):
+        return self.style_range(row_idx, row_idx + 1, 1, self.sheet.max_column + 1, **styles)
+
+    def style_column(self, col_idx, **styles):
+        return self.style_range(1, self.sheet.max_row + 1, col_idx, col_idx + 1, **styles)
+
     def stylize(self):
         pass
+
+
+NOOP_STYLIZE = frozenset(
+    six.get_unbound_function(style_class.stylize)
+    for style_class in (CellStyle, RowStyle, TableStyle, SheetStyle)
+)
+"""Implementations of stylize which do nothing."""
+
+
+def is_noop(style_class):
+    """Checks if style class keeps stylize of base classes which does nothing."""
+
+    return six.get_unbound_function(style_class.stylize) in NOOP_STYLIZE and not is_batched(style_class)
+
+
+def is_batched(style_class):
+    """Checks if style class stylizes all its elements at once.
+
+    Such class defines classmethod stylize_batch(items) and it is not
+    instantiated per element. Items are cells for cell styles, lists of
+    cells for row styles, (sheet, top_row, bottom_row, left_column,
+    right_column) tuples for table styles and sheets for sheet styles.
+    Cells and rows are passed after their table is rendered, tables
+    after their sheet is rendered.
+    """
+
+    return getattr(style_class, "stylize_batch", None) is not None
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""State of rendering of parsed templates.
+
+Parsed template is read-only and may be shared by renders, concurrent
+ones in different threads included. Everything one render changes lives
+in RenderContext: data, parameters, metrics, style cache and state of
+sheets and tables. Context is current for the thread while template
+renders, elements look their state up there. Render within render
+restores outer context when it is done.
+"""
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import contextlib
+import threading
+
+
+class Local(threading.local):
+    """Thread local storage, context is None until thread needs one."""
+
+    context = None
+
+
+LOCAL = Local()
+"""Current render context of thread."""
+
+
+class RenderContext(object):
+    """State of the only render.
+
+    State of sheets and tables is kept in mappings by element.
+    """
+
+    __slots__ = "bindings", "params", "metrics", "style_cache", "column_widths", "sheet_metrics", "batches", \
+        "data_rows"
+
+    def __init__(self, bindings=None, params=None, metrics=None):
+        self.bindings = bindings or {}
+        self.params = params or {}
+        self.metrics = metrics
+        self.style_cache = None
+        self.column_widths = {}
+        self.sheet_metrics = {}
+        self.batches = {}
+        self.data_rows = {}
+
+
+def get_context():
+    """Returns render context of thread, idle one if nothing renders."""
+
+    context = LOCAL.context
+    if context is None:
+        context = LOCAL.context = RenderContext()
+
+    return context
+
+
+@contextlib.contextmanager
+def rendering(bindings=None, params=None, metrics=None):
+    """Makes new render context current for the thread."""
+
+    previous = LOCAL.context
+    LOCAL.context = context = RenderContext(bindings, params, metrics)
+    try:
+        yield context
+    finally:
+        LOCAL.context = previous
+
+
+def set_state(states, element, value):
+    """Sets state of element in mapping of context, None removes it."""
+
+    if value is None:
+        states.pop(element, None)
+    else:
+        states[element] = value
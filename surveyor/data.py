@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Data sources for tables which are bound to data.
+
+Data is any iterable of records. Record is either a mapping, its values
+are taken by fields of cells, or a sequence, its values are taken by
+positions of cells.
+"""
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import io
+import json
+
+import surveyor.utils
+
+
+class JSONLines(object):
+    """Records of JSON Lines file.
+
+    File is read lazily line by line on every iteration, so data is
+    reusable and may be passed to other processes.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def __iter__(self):
+        with io.open(self.filename, "rt", encoding="utf-8") as resource:
+            for record in iter_json_lines(resource):
+                yield record
+
+
+def iter_json_lines(fileobj):
+    """Yields records of JSON Lines from text file object, skipping empty lines."""
+
+    for line in fileobj:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def parse_bindings(values):
+    """Makes data bindings of NAME=JSONL_FILEPATH strings."""
+
+    return dict((name, JSONLines(filename)) for name, filename in split_pairs(values, "NAME=JSONL_FILEPATH"))
+
+
+def parse_params(values):
+    """Makes template parameters of NAME=VALUE strings. Values are guessed like texts of cells."""
+
+    return dict((name, surveyor.utils.guess_text(value)) for name, value in split_pairs(values, "NAME=VALUE"))
+
+
+def split_pairs(values, expected):
+    for value in values:
+        name, sep, rest = value.partition("=")
+        if not sep or not name or not rest:
+            raise ValueError("Value has to be {0}, got {1}".format(expected, value))
+        yield name, rest
@@ -6,16 +6,38 @@ from __future__ import unicode_literals
 
 import abc
 import collections
+import functools
 import sys
 
+try:
+    from collections.abc import Mapping
+except ImportError:  # Python 2
+    from collections import Mapping
+
+try:
+    from collections import OrderedDict
+except ImportError:  # Python 2.6
+    from openpyxl.compat import OrderedDict
+
 import openpyxl
 import openpyxl.comments
 import openpyxl.styles
 import openpyxl.utils
 import six
 
+import surveyor.autosize
+import surveyor.cache
+import surveyor.classes._base
 import surveyor.classes.simple
+import surveyor.context
 import surveyor.exceptions
+import surveyor.incremental
+import surveyor.metrics
+import surveyor.native
+import surveyor.parallel
+import surveyor.placeholders
+import surveyor.plan
+import surveyor.stream
 import surveyor.utils
 
 # noinspection PyUnresolvedReferences
@@ -26,18 +48,157 @@ from six.moves import zip
 DEFAULT_CLASSES_MODULE = "surveyor.classes.simple"
 """Default importable module with style classes."""
 
+UNBOUND = object()
+"""Marker of cell which takes value from template, not from data record."""
+
+STYLER_BATCH_SIZE = 4096
+"""Amount of batched elements which rows of write-only table may wait for."""
+
+TemplateValue = collections.namedtuple("TemplateValue", ["value"])
+"""Value of template cell with substituted parameters, for measuring of widths."""
+
+
+class StylerBatches(object):
+    """Elements which wait for stylize_batch() of their styler classes.
+
+    Batches run by stages and in order of the first element of styler
+    class within stage. Stylers of rows go after ones of cells, as they
+    do when they are not batched, so batching never changes which styler
+    wins.
+    """
+
+    __slots__ = "stages", "size"
+
+    STAGE_CELLS = 0
+    STAGE_ROWS = 1
+
+    def __init__(self):
+        self.stages = {}
+        self.size = 0
+
+    def add(self, styler, item, stage=STAGE_CELLS):
+        batches = self.stages.get(stage)
+        if batches is None:
+            batches = self.stages[stage] = OrderedDict()
+
+        batch = batches.get(styler)
+        if batch is None:
+            batch = batches[styler] = []
+        batch.append(item)
+        self.size += 1
+
+    def run(self, metrics=None):
+        stages = self.stages
+        self.stages = {}
+        self.size = 0
+
+        for stage in sorted(stages):
+            for styler, batch in six.iteritems(stages[stage]):
+                if metrics is None:
+                    styler.stylize_batch(batch)
+                else:
+                    measure_styler(metrics, styler, styler.stylize_batch, batch)
+
+
+def measure_styler(metrics, styler, func, *args):
+    """Calls func, reporting time and memory of it as ones of styler."""
+
+    if metrics.styler_costs is None:
+        with metrics.phase("stylers"):
+            return func(*args)
+
+    memory_before = surveyor.metrics.get_traced_memory()
+    started_at = surveyor.metrics.timer()
+    result = func(*args)
+    elapsed = surveyor.metrics.timer() - started_at
+
+    memory = None
+    if memory_before is not None:
+        memory = surveyor.metrics.get_traced_memory() - memory_before
+    metrics.add_time("stylers", elapsed)
+    metrics.add_styler(styler.__name__, elapsed, memory)
+
+    return result
+
+
+def stylize_row(styler, cells, batches, metrics=None):
+    """Batches row styler or runs it after pending stylers of cells."""
+
+    if surveyor.classes._base.is_batched(styler):
+        batches.add(styler, cells, StylerBatches.STAGE_ROWS)
+        return
+
+    # Cell stylers go before row styler, batched ones too.
+    if batches.size:
+        batches.run(metrics)
+    styler(cells).stylize()
+
+
+def stylize_table(styler, worksheet, dimensions, batches):
+    """Batches table styler or runs it at once."""
+
+    if surveyor.classes._base.is_batched(styler):
+        batches.add(styler, (worksheet,) + tuple(dimensions))
+    else:
+        styler(worksheet, *dimensions).stylize()
+
+
+def check_type_hint(type_name):
+    """Returns name of type hint or None if value has to be guessed."""
+
+    if not type_name:
+        return None
+
+    type_name = type_name.strip()
+    if type_name not in surveyor.utils.TYPE_CONVERTERS:
+        raise surveyor.exceptions.UnknownTypeError(type_name, surveyor.utils.TYPE_CONVERTERS)
+
+    return type_name
+
 
 @six.add_metaclass(abc.ABCMeta)
 class BaseElement(object):
 
+    __slots__ = "parent", "klass", "children"
+
     TAG_NAME = None
 
     DEFAULT_STYLER = None
 
+    INLINE_STYLES_PHASE = "inline_styles"
+
     @property
     def classes(self):
         return self.parent.classes
 
+    @property
+    def style_cache(self):
+        return surveyor.context.get_context().style_cache
+
+    @property
+    def stylers(self):
+        return self.parent.stylers
+
+    @property
+    def column_widths(self):
+        return self.parent.column_widths
+
+    @property
+    def bindings(self):
+        return surveyor.context.get_context().bindings
+
+    @property
+    def params(self):
+        return surveyor.context.get_context().params
+
+    @property
+    def metrics(self):
+        return self.parent.metrics
+
+    @property
+    def batches(self):
+        return self.parent.batches
+
     def __init__(self, element):
         if element.tag.lower() != self.TAG_NAME:
             raise surveyor.exceptions.UnexpectedTagError(element.tag, self.TAG_NAME)
@@ -48,10 +209,32 @@ class BaseElement(object):
         self.klass = None
         self.children = []
 
+    def __setstate__(self, state):
+        # Frozen elements do not accept attributes, slots are restored
+        # bypassing them.
+        for name, value in six.iteritems(state[1]):
+            object.__setattr__(self, name, value)
+
     def add(self, element):
         element.parent = self
         self.children.append(element)
 
+    def freeze(self):
+        """Makes element tree read-only, it is done when parsing is over.
+
+        Element becomes instance of frozen subclass of its class, so
+        building of template costs nothing extra. Elements of classes
+        without frozen subclass keep their class.
+        """
+
+        self.children = tuple(self.children)
+        for child in self.children:
+            child.freeze()
+
+        frozen_class = FROZEN_CLASSES.get(self.__class__)
+        if frozen_class is not None:
+            self.__class__ = frozen_class
+
     def process(self, element=None, *args, **kwargs):
         openpyxl_elements = self.collect(element, *args, **kwargs)
 
@@ -60,6 +243,33 @@ class BaseElement(object):
 
         return openpyxl_elements
 
+    def process_measured(self, metrics, element=None, *args, **kwargs):
+        """Does the same as process() and reports into metrics.
+
+        Collecting of container elements is not measured, it is a sum of
+        measurements of their children.
+        """
+
+        openpyxl_elements = self.collect(element, *args, **kwargs)
+
+        with metrics.phase(self.INLINE_STYLES_PHASE):
+            self.apply_inline_styles(openpyxl_elements)
+        self.stylize_measured(metrics, openpyxl_elements)
+
+        return openpyxl_elements
+
+    def stylize_measured(self, metrics, openpyxl_elements):
+        styler = self.get_styler()
+        if styler is None:
+            return self.stylize(openpyxl_elements)
+
+        metrics.count("stylers")
+        if surveyor.classes._base.is_batched(styler):
+            # Batch is measured when it runs.
+            return self.stylize(openpyxl_elements)
+
+        return measure_styler(metrics, styler, self.stylize, openpyxl_elements)
+
     @abc.abstractmethod
     def collect(self, element, *args, **kwargs):
         raise NotImplementedError("You have to define this method to invoke")
@@ -80,131 +290,363 @@ class BaseElement(object):
 
         return class_obj
 
+    def get_styler(self):
+        """Returns styler class or None if styler does nothing.
+
+        Resolved stylers are kept in the lookup table of workbook.
+        """
+
+        stylers = self.stylers
+        key = self.__class__, self.klass
+
+        try:
+            return stylers[key]
+        except KeyError:
+            styler = self.get_class()
+            if surveyor.classes._base.is_noop(styler):
+                styler = None
+            stylers[key] = styler
+
+        return styler
+
 
 class WorkBook(BaseElement):
 
+    __slots__ = "mode", "class_module", "stylers"
+
     TAG_NAME = "workbook"
 
     ATTR_CLASSES = "classes"
+    ATTR_MODE = "mode"
+
+    MODE_DEFAULT = "default"
+    MODE_STREAM = "stream"
+    MODE_NATIVE = "native"
+    MODES = (MODE_DEFAULT, MODE_STREAM, MODE_NATIVE)
+
+    # Backends which make books of modes, more may be registered here.
+    BOOK_FACTORIES = {
+        MODE_DEFAULT: lambda: openpyxl.Workbook(encoding="utf-8", guess_types=True),
+        MODE_STREAM: lambda: surveyor.stream.StreamWorkbook(encoding="utf-8", guess_types=True),
+        MODE_NATIVE: lambda: surveyor.native.NativeWorkbook(),
+    }
 
     @property
     def classes(self):
         return self.class_module
 
+    @property
+    def style_cache(self):
+        return surveyor.context.get_context().style_cache
+
+    @style_cache.setter
+    def style_cache(self, value):
+        surveyor.context.get_context().style_cache = value
+
+    @property
+    def metrics(self):
+        return surveyor.context.get_context().metrics
+
     def __init__(self, element):
         super(WorkBook, self).__init__(element)
 
-        module_name = self.make_module_name(element)
+        self.mode = element.attrib.get(self.ATTR_MODE, self.MODE_DEFAULT)
+        self.check_mode(self.mode)
 
+        self.class_module = self.import_module(self.make_module_name(element))
+        # Lookup table of resolved stylers is the same for all renders.
+        self.stylers = {}
+
+    def __getstate__(self):
+        # Modules cannot be pickled, so only name is kept.
+        return self.parent, self.klass, self.children, self.mode, self.class_module.__name__
+
+    def __setstate__(self, state):
+        parent, klass, children, mode, module_name = state
+        super(WorkBook, self).__setstate__((None, {
+            "parent": parent, "klass": klass, "children": children, "mode": mode,
+            "class_module": self.import_module(module_name), "stylers": {}}))
+
+    @staticmethod
+    def import_module(module_name):
         try:
-            self.class_module = __import__(module_name)
+            __import__(module_name)
         except Exception as exc:
             raise surveyor.exceptions.CannotImportClassError(module_name, exc)
-        else:
-            self.class_module = sys.modules[module_name]
 
-    def add(self, element):
-        super(WorkBook, self).add(element)
+        return sys.modules[module_name]
 
-        if not element.name:
-            element.name = "Sheet{0}".format(len(self.children))
+    def freeze(self):
+        # Sheets without names are named by their position.
+        for idx, sheet in enumerate(self.children, start=1):
+            if not sheet.name:
+                sheet.name = "Sheet{0}".format(idx)
 
-    def collect(self, element, *args, **kwargs):
-        book = openpyxl.Workbook(encoding="utf-8", guess_types=True)
-        book.worksheets = []
+        super(WorkBook, self).freeze()
+
+    def collect(self, element, mode=None, workers=None, data=None, params=None, metrics=None, part_cache=None):
+        with surveyor.context.rendering(data, params, metrics):
+            return self.collect_book(mode, workers, part_cache)
 
+    def collect_book(self, mode, workers, part_cache):
+        # Changed sheets are few, so incremental rendering is serial.
+        if part_cache is not None and self.get_mode(mode) != self.MODE_NATIVE:
+            return surveyor.incremental.render(self, mode, part_cache)
+        if self.is_parallel(mode, workers):
+            return self.collect_parallel(mode, workers)
+
+        book = self.make_book(mode)
         for sheet in self.children:
-            sheet_element = book.create_sheet(title=sheet.name)
-            sheet.process(sheet_element)
+            self.render_sheet(book, sheet)
 
         return book
 
+    def is_parallel(self, mode, workers):
+        # Data sources are iterators in general, they cannot be shared
+        # between worker processes. Parts of native books are not
+        # openpyxl worksheets to merge.
+        return workers is not None and workers > 1 and not self.bindings and \
+            self.get_mode(mode) != self.MODE_NATIVE
+
+    def collect_parallel(self, mode, workers):
+        self.check_mode(self.get_mode(mode))
+
+        metrics = self.metrics
+        if metrics is None:
+            return surveyor.parallel.render(self, mode, workers, self.params)
+        # Workers do not report measurements back.
+        with metrics.phase("parallel"):
+            return surveyor.parallel.render(self, mode, workers, self.params)
+
+    def get_mode(self, mode=None):
+        """Returns mode of rendering, the one of template if mode is not set."""
+
+        return mode or self.mode
+
+    def check_mode(self, mode):
+        if mode not in self.BOOK_FACTORIES:
+            raise surveyor.exceptions.UnknownModeError(mode, sorted(self.BOOK_FACTORIES))
+
+    def make_book(self, mode=None):
+        mode = self.get_mode(mode)
+        self.check_mode(mode)
+
+        book = self.BOOK_FACTORIES[mode]()
+        if mode == self.MODE_DEFAULT:
+            book.worksheets = []
+
+        # Style objects are shared within the only rendering.
+        self.style_cache = surveyor.cache.StyleCache()
+
+        return book
+
+    def render_sheet(self, book, sheet):
+        sheet_element = book.create_sheet(title=surveyor.placeholders.substitute_text(sheet.name, self.params))
+        if self.metrics is None:
+            sheet.process(sheet_element)
+            return sheet_element
+
+        style_cache = self.style_cache
+        hits, misses = style_cache.hits, style_cache.misses
+        sheet.metrics = self.metrics.sheet(sheet_element.title)
+        try:
+            sheet.process_measured(sheet.metrics, sheet_element)
+            sheet.metrics.count("styles_built", style_cache.misses - misses)
+            sheet.metrics.count("style_cache_hits", style_cache.hits - hits)
+        finally:
+            sheet.metrics = None
+
+        return sheet_element
+
     def make_module_name(self, element):
         return element.attrib.get(self.ATTR_CLASSES, DEFAULT_CLASSES_MODULE)
 
+    def compile(self):
+        """Returns render plan of template for repeated renders."""
+
+        return surveyor.plan.RenderPlan(self)
+
 
 class Sheet(BaseElement):
 
+    __slots__ = "autosize", "autosize_sample", "name", "freeze_row", "freeze_col"
+
     TAG_NAME = "sheet"
 
     ATTR_AUTOSIZE = "autosize"
+    ATTR_AUTOSIZE_SAMPLE = "autosize-sample"
     ATTR_NAME = "name"
     ATTR_CLASS = "class"
     ATTR_FREEZE_ROW = "freeze-row"
     ATTR_FREEZE_COLUMN = "freeze-column"
 
-    DEFAULT_WIDTH = 10
-    WIDTH_ADDITION = 1
+    AUTOSIZE_SAMPLE = "sample"
+
+    DEFAULT_WIDTH = surveyor.autosize.DEFAULT_WIDTH
+    WIDTH_ADDITION = surveyor.autosize.WIDTH_ADDITION
+    DEFAULT_SAMPLE_SIZE = surveyor.autosize.DEFAULT_SAMPLE_SIZE
 
     DEFAULT_STYLER = surveyor.classes.simple.Sheet
 
-    @staticmethod
-    def apply_autosize(sheet, default_width=DEFAULT_WIDTH, width_addition=WIDTH_ADDITION):
-        column_width = collections.defaultdict(lambda: default_width)
-
-        for row in range(1, sheet.max_row):
-            for col in range(1, sheet.max_column + 1):
-                value = sheet.cell(row=row, column=col).value
-                if not value:
-                    continue
-                if not isinstance(value, six.string_types):
-                    value = six.text_type(value)
-                if value.startswith("="):  # Skip formulas
-                    continue
-
-                column_width[col] = max(column_width[col], len(value))
-
-        for col in range(1, sheet.max_column + 1):
-            try:
-                column = sheet.column_dimensions[openpyxl.utils.get_column_letter(col)]
-            except KeyError:
-                pass
-            else:
-                column.auto_size = True
-                column.width = column_width[col] + width_addition
+    # Inline styles of sheet are mostly applying of column widths.
+    INLINE_STYLES_PHASE = "autosize"
 
     def __init__(self, element):
         super(Sheet, self).__init__(element)
 
-        self.autosize = surveyor.utils.strtobool(element.attrib.get(self.ATTR_AUTOSIZE))
+        self.autosize = self.make_autosize(element.attrib.get(self.ATTR_AUTOSIZE))
+        self.autosize_sample = int(element.attrib.get(self.ATTR_AUTOSIZE_SAMPLE, self.DEFAULT_SAMPLE_SIZE))
         self.klass = element.attrib.get(self.ATTR_CLASS)
-        self.name = element.attrib.get(self.ATTR_NAME)
+        self.name = surveyor.placeholders.compile_text(element.attrib.get(self.ATTR_NAME))
         self.freeze_row = element.attrib.get(self.ATTR_FREEZE_ROW)
         self.freeze_col = element.attrib.get(self.ATTR_FREEZE_COLUMN)
 
+    # Rows report widths of their values while they are rendered.
+    @property
+    def column_widths(self):
+        return surveyor.context.get_context().column_widths.get(self)
+
+    @column_widths.setter
+    def column_widths(self, value):
+        surveyor.context.set_state(surveyor.context.get_context().column_widths, self, value)
+
+    @property
+    def metrics(self):
+        return surveyor.context.get_context().sheet_metrics.get(self)
+
+    @metrics.setter
+    def metrics(self, value):
+        surveyor.context.set_state(surveyor.context.get_context().sheet_metrics, self, value)
+
+    @property
+    def batches(self):
+        return surveyor.context.get_context().batches.get(self)
+
+    @batches.setter
+    def batches(self, value):
+        surveyor.context.set_state(surveyor.context.get_context().batches, self, value)
+
     def collect(self, element, *args, **kwargs):
-        for table in self.children:
-            table.process(element)
+        # Batches of table stylers run when tables are rendered.
+        self.batches = StylerBatches()
+        try:
+            if element.parent.write_only:
+                return self.collect_stream(element)
+
+            self.column_widths = self.make_column_widths() if self.autosize else None
+
+            for table in self.children:
+                self.process_child(table, element)
+            self.batches.run(self.metrics)
+        finally:
+            self.batches = None
 
         return element
 
-    def apply_inline_styles(self, element):
+    def process_child(self, table, element):
+        if self.metrics is None:
+            return table.process(element)
+        return table.process_measured(self.metrics, element)
+
+    def collect_stream(self, element):
+        # Write-only worksheets write their header with the first row
+        # so everything which lives there has to be set in advance.
+        self.column_widths = None
         if self.autosize:
-            self.apply_autosize(element)
+            if self.metrics is None:
+                self.apply_template_autosize(element)
+            else:
+                with self.metrics.phase("autosize"):
+                    self.apply_template_autosize(element)
+        self.apply_freeze_panes(element)
+
+        # Row may be written when no remaining table can touch it.
+        flush_until = []
+        for table in reversed(self.children):
+            top_row = table.get_dimensions()[0]
+            flush_until.append(min(top_row, flush_until[-1]) if flush_until else top_row)
+        flush_until.reverse()
+        flush_until = flush_until[1:] + [None]
+
+        rows = surveyor.stream.RowBuffer(element, self.metrics)
+        for table, until in zip(self.children, flush_until):
+            rows.until = until
+            self.process_child(table, rows)
+            self.batches.run(self.metrics)
+            rows.flush(until)
+
+        return element
+
+    def apply_inline_styles(self, element):
+        if element.parent.write_only:
+            return
+
+        if self.column_widths is not None:
+            self.column_widths.apply(element)
+            self.column_widths = None
+        self.apply_freeze_panes(element)
+
+    def make_autosize(self, value):
+        if value is not None and value.strip().lower() == self.AUTOSIZE_SAMPLE:
+            return self.AUTOSIZE_SAMPLE
+
+        return surveyor.utils.strtobool(value)
+
+    def make_column_widths(self):
+        if self.autosize == self.AUTOSIZE_SAMPLE:
+            return surveyor.autosize.SampledColumnWidths(self.autosize_sample, self.DEFAULT_WIDTH,
+                                                         self.WIDTH_ADDITION)
+
+        return surveyor.autosize.ColumnWidths(self.DEFAULT_WIDTH, self.WIDTH_ADDITION)
+
+    def apply_template_autosize(self, element):
+        column_widths = self.make_column_widths()
+        params = self.params
+
+        for table in self.children:
+            left_column = table.get_dimensions()[2]
+            for idx, row in enumerate(table.children):
+                # Parameters are known in advance, data is not.
+                values = [TemplateValue(surveyor.placeholders.substitute(cell.value, params)) for cell in row.children]
+                column_widths.add_row(left_column, values, idx == 0)
+
+        column_widths.apply(element)
 
+    def apply_freeze_panes(self, element):
         freeze_row, freeze_col = self.freeze_row, self.freeze_col
         if freeze_row is not None or freeze_col is not None:
             if not freeze_col:
                 freeze_col = 1
             if not freeze_row:
                 freeze_row = 1
-            element.freeze_panes = element.cell(row=int(freeze_row), column=int(freeze_col))
+            coordinate = openpyxl.utils.get_column_letter(int(freeze_col)) + six.text_type(int(freeze_row))
+            element.freeze_panes = str(coordinate)
 
     def stylize(self, element):
-        styler = self.get_class()(element)
-        styler.stylize()
+        styler = self.get_styler()
+        if styler is None:
+            return element
+
+        if surveyor.classes._base.is_batched(styler):
+            styler.stylize_batch([element])
+        else:
+            styler(element).stylize()
 
         return element
 
 
 class Table(BaseElement):
 
+    __slots__ = "start_cell", "data", "template_index", "types"
+
     TAG_NAME = "table"
 
     ATTR_START_CELL = "startcell"
     ATTR_START_ROW = "startrow"
     ATTR_START_COLUMN = "startcolumn"
     ATTR_CLASS = "class"
+    ATTR_DATA = "data"
+    ATTR_TYPES = "types"
 
     DEFAULT_START_CELL = "A1"
 
@@ -232,19 +674,137 @@ class Table(BaseElement):
         else:
             self.start_cell = self.DEFAULT_START_CELL
 
+        self.data = element.attrib.get(self.ATTR_DATA)
+        self.template_index = None
+
+        types = element.attrib.get(self.ATTR_TYPES)
+        self.types = None
+        if types:
+            self.types = tuple(check_type_hint(type_name) for type_name in types.split(","))
+
+    # Amount of rows, rendered of data, is known only to render.
+    @property
+    def data_rows(self):
+        return surveyor.context.get_context().data_rows.get(self, 0)
+
+    @data_rows.setter
+    def data_rows(self, value):
+        surveyor.context.get_context().data_rows[self] = value
+
+    @property
+    def batches(self):
+        return surveyor.context.get_context().batches.get(self)
+
+    @batches.setter
+    def batches(self, value):
+        surveyor.context.set_state(surveyor.context.get_context().batches, self, value)
+
+    def get_type_hint(self, col_idx):
+        """Returns type hint of column (0-based index within table) or None."""
+
+        if self.types is None or col_idx >= len(self.types):
+            return None
+
+        return self.types[col_idx]
+
+    def add(self, element):
+        template_index = self.template_index
+        if element.template:
+            if self.data is None:
+                raise surveyor.exceptions.RowTemplateError(self.data, "is required for row template")
+            if template_index is not None:
+                raise surveyor.exceptions.RowTemplateError(self.data, "has more than one row template")
+            template_index = len(self.children)
+
+        super(Table, self).add(element)
+        self.template_index = template_index
+
     def collect(self, element, *args, **kwargs):
+        # Batches of cell and row stylers run before table styler.
+        self.batches = StylerBatches()
+        try:
+            if self.data is not None:
+                self.collect_data(element)
+            else:
+                self.collect_rows(element)
+            self.batches.run(self.metrics)
+        finally:
+            self.batches = None
+
+        return element
+
+    def collect_rows(self, element):
         top_row, bottom_row, left_column, right_column = self.get_dimensions()
+        flush = self.is_flushed(element)
 
+        metrics = self.metrics
         for row, row_idx in zip(self.children, range(top_row, bottom_row)):
-            row.process(element, row_idx, left_column, right_column)
+            if flush:
+                self.flush_before(element, row_idx)
+            if metrics is None:
+                row.process(element, row_idx, left_column, right_column)
+            else:
+                row.process_measured(metrics, element, row_idx, left_column, right_column)
+
+        return element
+
+    def collect_data(self, element):
+        """Renders rows before and after row template as is and row template per each record of data."""
+
+        if self.template_index is None:
+            raise surveyor.exceptions.RowTemplateError(self.data, "has no row template")
+
+        records = self.get_records()
+        top_row, _, left_column, right_column = self.get_dimensions()
+        self.data_rows = 0
+        flush = self.is_flushed(element)
+
+        metrics = self.metrics
+
+        row_idx = top_row
+        for idx, row in enumerate(self.children):
+            process = row.process if metrics is None else functools.partial(row.process_measured, metrics)
+            if idx != self.template_index:
+                process(element, row_idx, left_column, right_column)
+                row_idx += 1
+                continue
+
+            for record in records:
+                if flush:
+                    self.flush_before(element, row_idx)
+                process(element, row_idx, left_column, right_column, record)
+                row_idx += 1
+            self.data_rows = row_idx - top_row - idx
 
         return element
 
+    def is_flushed(self, element):
+        # Rows of write-only worksheet may be written as soon as they
+        # are rendered unless table styler comes back to them.
+        return isinstance(element, surveyor.stream.RowBuffer) and self.get_styler() is None
+
+    def flush_before(self, element, row_idx):
+        # Rows wait for batched stylers until batches are full.
+        batches = self.batches
+        if batches.size >= STYLER_BATCH_SIZE:
+            batches.run(self.metrics)
+        if not batches.size:
+            element.flush_before(row_idx)
+
+    def get_records(self):
+        bindings = self.bindings
+
+        try:
+            return iter(bindings[self.data])
+        except KeyError:
+            raise surveyor.exceptions.UnknownDataError(self.data, bindings)
+
     def stylize(self, element):
-        top_row, bottom_row, left_column, right_column = self.get_dimensions()
-        styler = self.get_class()(element, top_row, bottom_row, left_column, right_column)
+        styler = self.get_styler()
+        if styler is None:
+            return element
 
-        styler.stylize()
+        stylize_table(styler, element, self.get_dimensions(), self.parent.batches)
 
         return element
 
@@ -253,6 +813,9 @@ class Table(BaseElement):
         left_column = openpyxl.utils.column_index_from_string(left_column)
 
         bottom_row = top_row + len(self.children)
+        if self.template_index is not None:
+            # Row template is replaced with rendered records.
+            bottom_row += self.data_rows - 1
         right_column = left_column + max(len(row.children) for row in self.children)
 
         return top_row, bottom_row, left_column, right_column
@@ -260,9 +823,12 @@ class Table(BaseElement):
 
 class Row(BaseElement):
 
+    __slots__ = "template",
+
     TAG_NAME = "tr"
 
     ATTR_CLASS = "class"
+    ATTR_TEMPLATE = "template"
 
     DEFAULT_STYLER = surveyor.classes.simple.Row
 
@@ -270,22 +836,87 @@ class Row(BaseElement):
         super(Row, self).__init__(element)
 
         self.klass = element.attrib.get(self.ATTR_CLASS)
+        self.template = surveyor.utils.strtobool(element.attrib.get(self.ATTR_TEMPLATE))
 
-    def collect(self, element, row_idx=1, left_column=1, right_column=1):
+    def get_type_hint(self):
+        """Returns type hint of table column for the next cell of row."""
+
+        if self.parent is None:
+            return None
+
+        return self.parent.get_type_hint(len(self.children))
+
+    def collect(self, element, row_idx=1, left_column=1, right_column=1, record=None):
         cells = []
+        metrics = self.metrics
 
-        for col_idx, cell in enumerate(self.children, start=left_column):
-            cell.process(element, row_idx, col_idx)
-            cells.append(cells)
+        if record is None:
+            values = [UNBOUND] * len(self.children)
+        else:
+            values = self.get_values(record)
+
+        if metrics is None:
+            for col_idx, (cell, value) in enumerate(zip(self.children, values), start=left_column):
+                cells.append(cell.process(element, row_idx, col_idx, value))
+        else:
+            for col_idx, (cell, value) in enumerate(zip(self.children, values), start=left_column):
+                cells.append(cell.process_measured(metrics, element, row_idx, col_idx, value))
+            metrics.count("rows")
+            metrics.count("cells", len(cells))
+
+        # Widths are measured by rendered values, templates may have
+        # placeholders or data.
+        column_widths = self.column_widths
+        if column_widths is not None:
+            header = record is None and self.parent.children[0] is self
+            if metrics is None:
+                column_widths.add_row(left_column, cells, header)
+            else:
+                with metrics.phase("autosize"):
+                    column_widths.add_row(left_column, cells, header)
 
         return cells
 
+    def get_values(self, record):
+        """Returns values of record for cells.
+
+        Mappings are looked up by field of cell, sequences by position
+        of cell. Cells without field keep their template values.
+        """
+
+        if isinstance(record, Mapping):
+            return [UNBOUND if cell.field is None else record.get(cell.field) for cell in self.children]
+
+        values = list(record)
+        values.extend(None for _ in range(len(self.children) - len(values)))
+
+        return values
+
+    def stylize_measured(self, metrics, cells):
+        # Batches are measured as their stylers, not as row styler.
+        self.run_cell_batches()
+        return super(Row, self).stylize_measured(metrics, cells)
+
     def stylize(self, cells):
-        styler = self.get_class()(cells)
-        styler.stylize()
+        styler = self.get_styler()
+        if styler is None:
+            return cells
+
+        stylize_row(styler, cells, self.batches, self.metrics)
 
         return cells
 
+    def run_cell_batches(self):
+        """Runs pending batches before row styler which styles after cell stylers."""
+
+        styler = self.get_styler()
+        if styler is None or surveyor.classes._base.is_batched(styler):
+            return
+
+        batches = self.batches
+        if batches.size:
+            batches.run(self.metrics)
+
 
 # Inline style helpers for Cell element
 StyleInfo = collections.namedtuple("StyleInfo", ["attribute", "constructor"])
@@ -308,11 +939,15 @@ def _gradient_fill_constructor(**kwargs):
 
 class Cell(BaseElement):
 
+    __slots__ = "value", "field", "number_format", "hyperlink", "comment_text", "comment_author", "style_key"
+
     TAG_NAME = "td"
 
     ATTR_SEPARATOR = "-"
 
     ATTR_CLASS = "class"
+    ATTR_FIELD = "field"
+    ATTR_TYPE = "type"
     ATTR_NUMBER_FORMAT = "number_format"
     ATTR_HYPERLINK = "hyperlink"
     ATTR_COMMENT = "comment"
@@ -330,34 +965,92 @@ class Cell(BaseElement):
 
     DEFAULT_STYLER = surveyor.classes.simple.Cell
 
-    def __init__(self, element):
+    @property
+    def comment(self):
+        # Comment is bound to the only openpyxl cell so new one is
+        # required for each rendering.
+        if not self.comment_text:
+            return None
+
+        return openpyxl.comments.Comment(surveyor.placeholders.substitute_text(self.comment_text, self.params),
+                                         self.comment_author)
+
+    @property
+    def styles_by_prefix(self):
+        return dict((prefix, dict(kwargs)) for prefix, kwargs in self.style_key)
+
+    @staticmethod
+    def convert_text(text, type_name):
+        if type_name is None:
+            return surveyor.utils.guess_text(text)
+
+        text = surveyor.utils.text_to_str(text)
+        if not text or surveyor.placeholders.PLACEHOLDER_RE.search(text):
+            # Placeholders get types of their parameters.
+            return text
+
+        try:
+            return surveyor.utils.convert_text(text, type_name)
+        except ValueError:
+            raise surveyor.exceptions.TypeHintError(text, type_name)
+
+    def __init__(self, element, type_hint=None, style_keys=None):
         super(Cell, self).__init__(element)
 
+        # Cells are leaves, they have no children to keep.
+        self.children = ()
         self.klass = element.attrib.get(self.ATTR_CLASS)
-        self.value = surveyor.utils.guess_text(element.text)
+        type_name = check_type_hint(element.attrib.get(self.ATTR_TYPE)) or type_hint
+        self.value = surveyor.placeholders.compile_text(self.convert_text(element.text, type_name))
+        self.field = element.attrib.get(self.ATTR_FIELD)
         # check openpyxl.styles.numbers
         self.number_format = element.attrib.get(self.ATTR_NUMBER_FORMAT)
-        self.hyperlink = element.attrib.get(self.ATTR_HYPERLINK)
+        self.hyperlink = surveyor.placeholders.compile_text(element.attrib.get(self.ATTR_HYPERLINK))
+        self.comment_text = surveyor.placeholders.compile_text(element.attrib.get(self.ATTR_COMMENT))
+        self.comment_author = element.attrib.get(self.ATTR_COMMENT_AUTHOR)
+        self.style_key = self.make_style_key(element, style_keys)
 
-        comment_text = element.attrib.get(self.ATTR_COMMENT)
-        if comment_text:
-            self.comment = openpyxl.comments.Comment(comment_text, element.attrib.get(self.ATTR_COMMENT_AUTHOR))
-        else:
-            self.comment = None
+    def make_style_key(self, element, style_keys=None):
+        """Returns style key of inline styles.
 
-        self.styles_by_prefix = collections.defaultdict(dict)
+        style_keys is a table of interned keys of the only parse, cells
+        with the same inline styles share the same key then.
+        """
+
+        styles_by_prefix = collections.defaultdict(list)
         for attr, value in element.attrib.items():
             if attr.startswith(self.STYLE_PREFIXES):
                 prefix, name = attr.rsplit(self.ATTR_SEPARATOR, 1)
-                self.styles_by_prefix[prefix][name] = value
+                styles_by_prefix[prefix].append((name, value))
         # TODO(9seconds) check for multiple type of fills (maybe by the same StyleInfo.attribute)
 
-    def collect(self, element, row_idx=1, col_idx=1):
+        style_key = tuple(sorted((prefix, tuple(sorted(kwargs))) for prefix, kwargs in styles_by_prefix.items()))
+
+        if style_keys is not None:
+            style_key = style_keys.setdefault(style_key, style_key)
+
+        return style_key
+
+    def process_measured(self, metrics, element=None, *args, **kwargs):
+        started_at = surveyor.metrics.timer()
+        cell = self.collect(element, *args, **kwargs)
+        collected_at = surveyor.metrics.timer()
+        self.apply_inline_styles(cell)
+        metrics.add_time("collect", collected_at - started_at)
+        metrics.add_time("inline_styles", surveyor.metrics.timer() - collected_at)
+
+        self.stylize_measured(metrics, cell)
+
+        return cell
+
+    def collect(self, element, row_idx=1, col_idx=1, value=UNBOUND):
         cell = element.cell(row=row_idx, column=col_idx)
-        cell.value = self.value
+        if value is UNBOUND:
+            value = surveyor.placeholders.substitute(self.value, self.params)
+        cell.value = value
         if self.hyperlink is not None:
-            cell.hyperlink = self.hyperlink
-        if self.comment is not None:
+            cell.hyperlink = surveyor.placeholders.substitute_text(self.hyperlink, self.params)
+        if self.comment_text:
             cell.comment = self.comment
 
         return cell
@@ -366,14 +1059,81 @@ class Cell(BaseElement):
         if self.number_format is not None:
             cell.number_format = self.number_format
 
-        for prefix, kwargs in self.styles_by_prefix.items():
+        if not self.style_key:
+            return cell
+
+        style_cache = self.style_cache
+        for prefix, kwargs in self.style_key:
             style_info = self.STYLE_ATTRIBUTES[prefix]
-            style_object = style_info.constructor(**kwargs)
+            style_object = style_cache.get(style_info.constructor, kwargs)
             setattr(cell, style_info.attribute, style_object)
         return cell
 
     def stylize(self, cell):
-        styler = self.get_class()(cell)
-        styler.stylize()
+        styler = self.get_styler()
+        if styler is None:
+            return cell
+
+        if surveyor.classes._base.is_batched(styler):
+            self.batches.add(styler, cell)
+        else:
+            styler(cell).stylize()
 
         return cell
+
+
+class FrozenElement(object):
+    """Element of parsed template which is read-only.
+
+    Properties are still assigned, they keep state of render in render
+    context.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        if not isinstance(getattr(self.__class__, name, None), property):
+            raise surveyor.exceptions.FrozenTemplateError(self.TAG_NAME, "set {0}".format(name))
+
+        super(FrozenElement, self).__setattr__(name, value)
+
+    def add(self, element):
+        raise surveyor.exceptions.FrozenTemplateError(self.TAG_NAME, "add <{0}>".format(element.TAG_NAME))
+
+    def freeze(self):
+        pass
+
+
+class FrozenWorkBook(FrozenElement, WorkBook):
+
+    __slots__ = ()
+
+
+class FrozenSheet(FrozenElement, Sheet):
+
+    __slots__ = ()
+
+
+class FrozenTable(FrozenElement, Table):
+
+    __slots__ = ()
+
+
+class FrozenRow(FrozenElement, Row):
+
+    __slots__ = ()
+
+
+class FrozenCell(FrozenElement, Cell):
+
+    __slots__ = ()
+
+
+FROZEN_CLASSES = {
+    WorkBook: FrozenWorkBook,
+    Sheet: FrozenSheet,
+    Table: FrozenTable,
+    Row: FrozenRow,
+    Cell: FrozenCell,
+}
+"""Read-only classes of elements which freeze() turns elements into."""
@@ -31,3 +31,66 @@ class CannotFindElementClass(XMLParseError):
     def __init__(self, class_module, class_name):
         message = "Cannot find '{0}' in module '{1.__name__}' ({1.__file__})".format(class_name, class_module)
         super(CannotFindElementClass, self).__init__(message)
+
+
+class UnknownModeError(XMLParseError):
+
+    def __init__(self, mode, modes):
+        message = "Unknown mode '{0}', expected one of {1}".format(mode, ", ".join(modes))
+        super(UnknownModeError, self).__init__(message)
+
+
+class UnknownTypeError(XMLParseError):
+
+    def __init__(self, type_name, type_names):
+        message = "Unknown type '{0}', expected one of {1}".format(type_name, ", ".join(sorted(type_names)))
+        super(UnknownTypeError, self).__init__(message)
+
+
+class TypeHintError(XMLParseError):
+
+    def __init__(self, text, type_name):
+        message = "Cannot convert '{0}' to {1}".format(text, type_name)
+        super(TypeHintError, self).__init__(message)
+
+
+class ManifestError(SurveyorError, ValueError):
+
+    def __init__(self, filename, line_number):
+        message = "Line {0} of manifest {1} has to be a pair of template and output".format(line_number, filename)
+        super(ManifestError, self).__init__(message)
+
+
+class DuplicateOutputError(SurveyorError, ValueError):
+
+    def __init__(self, output, first_template, second_template):
+        message = "Templates {0} and {1} are both rendered into {2}".format(first_template, second_template, output)
+        super(DuplicateOutputError, self).__init__(message)
+
+
+class RowTemplateError(XMLParseError):
+
+    def __init__(self, data_name, problem):
+        message = "Table bound to data '{0}' {1}".format(data_name, problem)
+        super(RowTemplateError, self).__init__(message)
+
+
+class UnknownDataError(SurveyorError):
+
+    def __init__(self, data_name, known_names):
+        message = "Data '{0}' is not set, known data are: {1}".format(data_name, ", ".join(sorted(known_names)))
+        super(UnknownDataError, self).__init__(message)
+
+
+class UnknownParameterError(SurveyorError):
+
+    def __init__(self, name, known_names):
+        message = "Parameter '{0}' is not set, known parameters are: {1}".format(name, ", ".join(sorted(known_names)))
+        super(UnknownParameterError, self).__init__(message)
+
+
+class FrozenTemplateError(SurveyorError):
+
+    def __init__(self, tag, change):
+        message = "Parsed template is read-only, cannot {0} of <{1}>".format(change, tag)
+        super(FrozenTemplateError, self).__init__(message)
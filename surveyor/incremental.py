@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""Incremental rendering which reuses parts of unchanged sheets.
+
+Every sheet is rendered into its own SheetPart, the same one parallel
+rendering makes, and the part is cached under the digest of everything
+it depends on: sheet subtree, source of classes module, render mode and
+values of parameters sheet refers to. Re-render of template where only
+some sheets are changed renders only them, the rest parts are read from
+cache and merged as is.
+
+Sheets with tables bound to data are always rendered because data is
+not known in advance. Classes module is hashed by its own source, so
+changes of modules it imports are not noticed.
+"""
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import hashlib
+import inspect
+import operator
+import sys
+
+import openpyxl
+
+import surveyor
+import surveyor.parallel
+import surveyor.placeholders
+
+
+READ_CHUNK_SIZE = 64 * 1024
+"""Size of chunk to read source of classes module with for hashing."""
+
+SHEET_FIELDS = operator.attrgetter("klass", "name", "autosize", "autosize_sample", "freeze_row", "freeze_col")
+"""Attributes of sheet which affect rendering."""
+
+TABLE_FIELDS = operator.attrgetter("klass", "start_cell", "data", "types")
+"""Attributes of table which affect rendering."""
+
+ROW_FIELDS = operator.attrgetter("klass", "template")
+"""Attributes of row which affect rendering."""
+
+CELL_FIELDS = operator.attrgetter("klass", "value", "field", "number_format", "hyperlink",
+                                  "comment_text", "comment_author", "style_key")
+"""Attributes of cell which affect rendering."""
+
+
+def hash_sheet(sheet):
+    """Returns digest of sheet subtree and names of parameters it uses.
+
+    Digest is None if sheet has tables bound to data.
+    """
+
+    digest = hashlib.sha256()
+    names = set()
+
+    def update(fields):
+        for value in fields:
+            if isinstance(value, surveyor.placeholders.Text):
+                names.update(value.names)
+        digest.update(repr(fields).encode("utf-8"))
+        digest.update(b"\0")
+
+    update(SHEET_FIELDS(sheet))
+    for table in sheet.children:
+        if table.data is not None:
+            return None, names
+
+        update(TABLE_FIELDS(table))
+        for row in table.children:
+            update(ROW_FIELDS(row))
+            for cell in row.children:
+                update(CELL_FIELDS(cell))
+
+    return digest.hexdigest(), names
+
+
+def hash_module(module):
+    """Returns digest of module source or None if source is unknown."""
+
+    try:
+        filename = inspect.getsourcefile(module)
+    except TypeError:
+        # Built-in module.
+        return None
+    if filename is None:
+        return None
+
+    digest = hashlib.sha256()
+    try:
+        with open(filename, "rb") as resource:
+            for chunk in iter(lambda: resource.read(READ_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    except (IOError, OSError):
+        return None
+
+    return digest.hexdigest()
+
+
+def make_key(sheet, mode, module_digest, params):
+    """Returns cache key of rendered sheet or None if it cannot be cached."""
+
+    if module_digest is None:
+        return None
+
+    sheet_digest, names = hash_sheet(sheet)
+    if sheet_digest is None:
+        return None
+
+    digest = hashlib.sha256()
+    for part in (surveyor.__version__, sys.version_info[:2], openpyxl.__version__, mode,
+                 sheet.classes.__name__, module_digest, sheet_digest):
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\0")
+    for name in sorted(names):
+        digest.update(repr((name, params.get(name))).encode("utf-8"))
+        digest.update(b"\0")
+
+    return digest.hexdigest()
+
+
+def render(workbook, mode, cache):
+    """Renders template workbook, taking parts of unchanged sheets from cache.
+
+    cache is surveyor.cache.TemplateCache or MemoryTemplateCache.
+    """
+
+    mode = workbook.get_mode(mode)
+    workbook.check_mode(mode)
+
+    module_digest = hash_module(workbook.classes)
+    book = surveyor.parallel.PartsWorkbook(encoding="utf-8", guess_types=True)
+    for sheet in workbook.children:
+        book.add_part(get_part(workbook, mode, sheet, cache, module_digest))
+
+    return book
+
+
+def get_part(workbook, mode, sheet, cache, module_digest):
+    """Returns part of sheet from cache, rendering and caching it if it is missed."""
+
+    key = make_key(sheet, mode, module_digest, workbook.params)
+    part = cache.get(key) if key is not None else None
+
+    counter = "sheet_parts_reused"
+    if part is None:
+        counter = "sheet_parts_rendered"
+        part = surveyor.parallel.make_part(workbook, mode, sheet)
+        if key is not None:
+            cache.put(key, part)
+
+    if workbook.metrics is not None:
+        workbook.metrics.count(counter)
+
+    return part
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""Wall time and counters of rendering phases.
+
+Metrics object is passed to parse_fileobj() and WorkBook.process(),
+elements report into it only if it is set, so rendering without metrics
+does not pay for measurements. Each sheet gets its own child metrics,
+totals of workbook are own measurements plus measurements of sheets.
+
+Phases are exclusive, time of nested phases is not counted twice:
+
+* parse: parsing of XML into elements;
+* collect: writing values, hyperlinks and comments into cells;
+* inline_styles: number formats and inline styles of cells;
+* stylers: stylers of cells, rows, tables and sheets;
+* autosize: measuring and applying column widths;
+* write: writing rows into write-only worksheets;
+* save: serializing workbook into xlsx.
+
+Metrics created with styler_costs=True also account calls, time and
+memory of each styler class. Memory is a growth of memory traced by
+tracemalloc, so it is accounted only if tracemalloc is tracing.
+"""
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import collections
+import contextlib
+import json
+import timeit
+
+try:
+    from collections import OrderedDict
+except ImportError:  # Python 2.6
+    from openpyxl.compat import OrderedDict
+
+try:
+    import tracemalloc
+except ImportError:  # Python < 3.4
+    tracemalloc = None
+
+import six
+
+
+timer = timeit.default_timer
+"""Clock of wall time measurements."""
+
+
+def get_traced_memory():
+    """Returns size of memory traced by tracemalloc or None if it does not trace."""
+
+    if tracemalloc is None or not tracemalloc.is_tracing():
+        return None
+
+    return tracemalloc.get_traced_memory()[0]
+
+
+class StylerCost(object):
+
+    __slots__ = "calls", "time", "memory"
+
+    def __init__(self):
+        self.calls = 0
+        self.time = 0.0
+        self.memory = None
+
+    def add(self, calls, elapsed, memory):
+        self.calls += calls
+        self.time += elapsed
+        if memory is not None:
+            self.memory = (self.memory or 0) + memory
+
+    def to_dict(self):
+        return {"calls": self.calls, "time": self.time, "memory": self.memory}
+
+
+class Metrics(object):
+
+    def __init__(self, styler_costs=False):
+        self.times = collections.defaultdict(float)
+        self.counters = collections.defaultdict(int)
+        self.sheets = OrderedDict()
+        self.styler_costs = OrderedDict() if styler_costs else None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started_at = timer()
+        try:
+            yield self
+        finally:
+            self.times[name] += timer() - started_at
+
+    def add_time(self, name, elapsed):
+        self.times[name] += elapsed
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def add_styler(self, name, elapsed, memory=None):
+        cost = self.styler_costs.get(name)
+        if cost is None:
+            cost = self.styler_costs[name] = StylerCost()
+
+        cost.add(1, elapsed, memory)
+
+    def sheet(self, name):
+        metrics = self.sheets.get(name)
+        if metrics is None:
+            metrics = self.sheets[name] = self.__class__(styler_costs=self.styler_costs is not None)
+
+        return metrics
+
+    def get_totals(self):
+        times = collections.defaultdict(float, self.times)
+        counters = collections.defaultdict(int, self.counters)
+
+        for sheet in six.itervalues(self.sheets):
+            sheet_times, sheet_counters = sheet.get_totals()
+            for name, elapsed in six.iteritems(sheet_times):
+                times[name] += elapsed
+            for name, amount in six.iteritems(sheet_counters):
+                counters[name] += amount
+
+        return dict(times), dict(counters)
+
+    def get_styler_costs(self):
+        """Returns costs of styler classes of workbook and its sheets.
+
+        Costs are sorted by time, the most expensive come first.
+        """
+
+        totals = {}
+        if self.styler_costs is None:
+            return totals
+
+        sources = [self.styler_costs]
+        sources.extend(sheet.get_styler_costs() for sheet in six.itervalues(self.sheets))
+        for costs in sources:
+            for name, cost in six.iteritems(costs):
+                total = totals.get(name)
+                if total is None:
+                    total = totals[name] = StylerCost()
+                total.add(cost.calls, cost.time, cost.memory)
+
+        return OrderedDict(sorted(six.iteritems(totals), key=lambda item: (-item[1].time, item[0])))
+
+    def to_dict(self):
+        times, counters = self.get_totals()
+        data = {
+            "times": times,
+            "counters": counters,
+            "sheets": OrderedDict((name, sheet.to_dict()) for name, sheet in six.iteritems(self.sheets)),
+        }
+        if self.styler_costs is not None:
+            data["styler_costs"] = OrderedDict(
+                (name, cost.to_dict()) for name, cost in six.iteritems(self.get_styler_costs()))
+
+        return data
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def format(self):
+        """Returns human readable report of totals and sheets."""
+
+        lines = []
+        rows = [("total", self)] + [("sheet " + name, sheet) for name, sheet in six.iteritems(self.sheets)]
+
+        for title, metrics in rows:
+            times, counters = metrics.get_totals()
+            lines.append(title)
+            for name in sorted(times):
+                lines.append("    {0:<16}{1:>12.3f} s".format(name, times[name]))
+            for name in sorted(counters):
+                lines.append("    {0:<16}{1:>12}".format(name, counters[name]))
+
+        return "\n".join(lines)
+
+    def format_styler_costs(self):
+        """Returns human readable report of styler classes, the most expensive first."""
+
+        lines = ["{0:<32}{1:>10}{2:>14}{3:>14}".format("styler", "calls", "time, s", "memory, B")]
+        for name, cost in six.iteritems(self.get_styler_costs()):
+            lines.append("{0:<32}{1:>10}{2:>14.3f}{3:>14}".format(
+                name, cost.calls, cost.time, "-" if cost.memory is None else cost.memory))
+
+        return "\n".join(lines)
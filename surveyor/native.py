@@ -0,0 +1,700 @@
+# -*- coding: utf-8 -*-
+"""Native backend which writes xlsx packages without openpyxl cells.
+
+openpyxl cells are heavy and its serializer builds an element tree for
+every row. This backend keeps cells as light slotted objects and writes
+worksheet XML as text, row by row, into a temporary file which is then
+stored in a zip archive. Strings go into the shared strings table,
+combinations of styles are deduplicated into the styles part.
+
+Workbook, worksheet and cell mimic the part of openpyxl API which
+surveyor elements and stylers use: cell(), values, number formats,
+fonts, fills, borders, alignment, protection, hyperlinks, comments,
+freeze panes and column dimensions. Style objects are the immutable
+style objects of openpyxl, so stylers work with them as usual. Text
+values are not guessed into numbers, percents or times the way
+openpyxl does with guess_types: templates are typed by surveyor.
+"""
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import datetime
+import decimal
+import os
+import re
+import tempfile
+import time
+import zipfile
+
+import openpyxl.styles
+import openpyxl.utils
+import six
+
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles.borders import DEFAULT_BORDER
+from openpyxl.styles.fills import DEFAULT_EMPTY_FILL
+from openpyxl.styles.fills import DEFAULT_GRAY_FILL
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.styles import numbers
+from openpyxl.utils.datetime import time_to_days
+from openpyxl.utils.datetime import timedelta_to_days
+from openpyxl.utils.datetime import to_excel
+from openpyxl.utils.exceptions import IllegalCharacterError
+from openpyxl.utils.indexed_list import IndexedList
+from openpyxl.writer.comments import CommentWriter
+from openpyxl.xml.constants import COMMENTS_NS
+from openpyxl.xml.constants import REL_NS
+from openpyxl.xml.constants import SHEET_MAIN_NS
+from openpyxl.xml.constants import VML_NS
+from openpyxl.xml.functions import Element
+from openpyxl.xml.functions import SubElement
+from openpyxl.xml.functions import tostring
+
+# noinspection PyUnresolvedReferences
+from six.moves import range
+
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+"""Declaration of every XML part."""
+
+MAX_STRING_LENGTH = 32767
+"""Excel does not keep longer strings, they are truncated as openpyxl does."""
+
+NUMERIC_TYPES = six.integer_types + (float, decimal.Decimal)
+"""Types of values which are written as numbers (bool is int too)."""
+
+DATE_FORMATS = (
+    (datetime.datetime, numbers.FORMAT_DATE_DATETIME),
+    (datetime.date, numbers.FORMAT_DATE_YYYYMMDD2),
+    (datetime.time, numbers.FORMAT_DATE_TIME6),
+    (datetime.timedelta, numbers.FORMAT_DATE_TIMEDELTA))
+"""Number formats of date and time values, datetime is a date too so it goes first."""
+
+ERROR_CODES = frozenset(("#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A"))
+"""Strings which are written as error values."""
+
+DEFAULT_ALIGNMENT = openpyxl.styles.Alignment()
+"""Alignment of cells without one."""
+
+DEFAULT_PROTECTION = openpyxl.styles.Protection()
+"""Protection of cells without one."""
+
+HYPERLINK_NS = REL_NS + "/hyperlink"
+"""Relationship type of hyperlinks."""
+
+CONTENT_TYPES = {
+    "workbook": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml",
+    "worksheet": "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml",
+    "styles": "application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml",
+    "strings": "application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml",
+    "comments": "application/vnd.openxmlformats-officedocument.spreadsheetml.comments+xml",
+    "core": "application/vnd.openxmlformats-package.core-properties+xml",
+    "app": "application/vnd.openxmlformats-officedocument.extended-properties+xml",
+}
+"""Content types of package parts."""
+
+XML_ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#9;"}
+"""Escapes of XML text and attribute values."""
+
+XML_ESCAPE_RE = re.compile(r'[&<>"\n\r\t]')
+"""Characters to escape."""
+
+TEXT_ESCAPE_RE = re.compile(r"[&<>]")
+"""Characters to escape in text nodes, whitespace is kept as is."""
+
+
+def escape(value):
+    return XML_ESCAPE_RE.sub(lambda match: XML_ESCAPES[match.group()], value)
+
+
+def escape_text(value):
+    return TEXT_ESCAPE_RE.sub(lambda match: XML_ESCAPES[match.group()], value)
+
+
+class NativeCell(object):
+
+    __slots__ = ("parent", "row", "col_idx", "_value", "data_type", "number_format", "font", "fill", "border",
+                 "alignment", "protection", "_hyperlink", "_comment")
+
+    def __init__(self, parent, row, col_idx):
+        self.parent = parent
+        self.row = row
+        self.col_idx = col_idx
+        self._value = None
+        self.data_type = "n"
+        self.number_format = numbers.FORMAT_GENERAL
+        self.font = DEFAULT_FONT
+        self.fill = DEFAULT_EMPTY_FILL
+        self.border = DEFAULT_BORDER
+        self.alignment = DEFAULT_ALIGNMENT
+        self.protection = DEFAULT_PROTECTION
+        self._hyperlink = None
+        self._comment = None
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if value is None or isinstance(value, NUMERIC_TYPES):
+            data_type = "b" if isinstance(value, bool) else "n"
+        elif isinstance(value, six.string_types):
+            value = self.check_string(value)
+            data_type = self.get_string_type(value)
+        else:
+            self.number_format = self.get_date_format(value)
+            data_type = "n"
+
+        self._value = value
+        self.data_type = data_type
+
+    @property
+    def hyperlink(self):
+        return self._hyperlink
+
+    @hyperlink.setter
+    def hyperlink(self, value):
+        self._hyperlink = value
+        # openpyxl shows target of hyperlink in empty cell.
+        if value is not None and self._value is None:
+            self.value = value
+
+    @staticmethod
+    def check_string(value):
+        if not isinstance(value, six.text_type):
+            value = value.decode("utf-8")
+        value = value[:MAX_STRING_LENGTH]
+        if ILLEGAL_CHARACTERS_RE.search(value):
+            raise IllegalCharacterError
+
+        return value
+
+    @staticmethod
+    def get_string_type(value):
+        if len(value) > 1 and value.startswith("="):
+            return "f"
+        if value in ERROR_CODES:
+            return "e"
+
+        return "s"
+
+    @staticmethod
+    def get_date_format(value):
+        for klass, number_format in DATE_FORMATS:
+            if isinstance(value, klass):
+                return number_format
+
+        raise ValueError("Cannot convert {0} to Excel".format(value))
+
+    @property
+    def column(self):
+        return openpyxl.utils.get_column_letter(self.col_idx)
+
+    @property
+    def coordinate(self):
+        return "{0}{1}".format(self.column, self.row)
+
+    @property
+    def comment(self):
+        return self._comment
+
+    @comment.setter
+    def comment(self, value):
+        if value is not None:
+            value.parent = self
+        elif self._comment is not None:
+            self._comment.parent = None
+        self._comment = value
+
+    def __repr__(self):
+        return "<NativeCell {0}.{1}>".format(self.parent.title, self.coordinate)
+
+
+class NativeWorksheet(object):
+
+    def __init__(self, parent, title):
+        self.parent = parent
+        self.title = title
+        self.rows = {}
+        self.column_dimensions = {}
+        self.freeze_panes = None
+
+    def cell(self, coordinate=None, row=None, column=None):
+        if coordinate is not None:
+            column, row = openpyxl.utils.coordinate_from_string(coordinate)
+            column = openpyxl.utils.column_index_from_string(column)
+
+        row_cells = self.rows.get(row)
+        if row_cells is None:
+            row_cells = self.rows[row] = {}
+
+        cell = row_cells.get(column)
+        if cell is None:
+            cell = row_cells[column] = NativeCell(self, row, column)
+
+        return cell
+
+    def find_cell(self, row, column):
+        row_cells = self.rows.get(row)
+        return row_cells.get(column) if row_cells is not None else None
+
+    def __getitem__(self, coordinate):
+        return self.cell(coordinate)
+
+    @property
+    def max_row(self):
+        return max(self.rows) if self.rows else 1
+
+    @property
+    def max_column(self):
+        return max(max(cells) for cells in six.itervalues(self.rows) if cells) if self.rows else 1
+
+
+class NativeWorkbook(object):
+
+    write_only = False
+
+    def __init__(self):
+        self.worksheets = []
+
+    def create_sheet(self, index=None, title=None):
+        title = title or "Sheet{0}".format(len(self.worksheets) + 1)
+        sheet = NativeWorksheet(self, title)
+
+        if index is None:
+            self.worksheets.append(sheet)
+        else:
+            self.worksheets.insert(index, sheet)
+
+        return sheet
+
+    def get_sheet_names(self):
+        return [sheet.title for sheet in self.worksheets]
+
+    def save(self, filename):
+        if not self.worksheets:
+            self.create_sheet()
+
+        NativeWriter(self).save(filename)
+
+
+class StyleTable(object):
+    """Deduplicated style parts of workbook.
+
+    Cells refer style objects which are shared by StyleCache, so style
+    combinations are looked up by identities first and compared by
+    values only once per combination.
+    """
+
+    def __init__(self):
+        self.number_formats = IndexedList()
+        self.fonts = IndexedList([DEFAULT_FONT])
+        self.fills = IndexedList([DEFAULT_EMPTY_FILL, DEFAULT_GRAY_FILL])
+        self.borders = IndexedList([DEFAULT_BORDER])
+        self.alignments = IndexedList([DEFAULT_ALIGNMENT])
+        self.protections = IndexedList([DEFAULT_PROTECTION])
+        self.xfs = IndexedList([(0, 0, 0, 0, 0, 0)])
+        self.ids = {}
+        # Keeps style objects alive while their identities are used as keys.
+        self.objects = []
+
+    def get_id(self, cell):
+        number_format = cell.number_format
+        font, fill, border, alignment, protection = cell.font, cell.fill, cell.border, cell.alignment, cell.protection
+        key = number_format, id(font), id(fill), id(border), id(alignment), id(protection)
+
+        style_id = self.ids.get(key)
+        if style_id is None:
+            self.objects.append((font, fill, border, alignment, protection))
+            style_id = self.ids[key] = self.xfs.add((
+                self.get_number_format_id(number_format),
+                self.fonts.add(font),
+                self.fills.add(fill),
+                self.borders.add(border),
+                self.alignments.add(alignment),
+                self.protections.add(protection)))
+
+        return style_id
+
+    def get_number_format_id(self, number_format):
+        builtin_id = numbers.BUILTIN_FORMATS_REVERSE.get(number_format)
+        if builtin_id is not None:
+            return builtin_id
+
+        return self.number_formats.add(number_format) + 164
+
+    def write(self):
+        root = Element("styleSheet", {"xmlns": SHEET_MAIN_NS})
+
+        node = SubElement(root, "numFmts", {"count": six.text_type(len(self.number_formats))})
+        for idx, number_format in enumerate(self.number_formats, 164):
+            SubElement(node, "numFmt", {"numFmtId": six.text_type(idx), "formatCode": number_format})
+
+        for tag, items in (("fonts", self.fonts), ("fills", self.fills), ("borders", self.borders)):
+            node = SubElement(root, tag, {"count": six.text_type(len(items))})
+            for item in items:
+                node.append(item.to_tree())
+
+        node = SubElement(root, "cellStyleXfs", {"count": "1"})
+        SubElement(node, "xf", {"numFmtId": "0", "fontId": "0", "fillId": "0", "borderId": "0"})
+
+        node = SubElement(root, "cellXfs", {"count": six.text_type(len(self.xfs))})
+        for number_format_id, font_id, fill_id, border_id, alignment_id, protection_id in self.xfs:
+            xf = SubElement(node, "xf", {
+                "numFmtId": six.text_type(number_format_id),
+                "fontId": six.text_type(font_id),
+                "fillId": six.text_type(fill_id),
+                "borderId": six.text_type(border_id),
+                "xfId": "0"})
+            for attribute, item_id in (("applyNumberFormat", number_format_id), ("applyFont", font_id),
+                                       ("applyFill", fill_id), ("applyBorder", border_id)):
+                if item_id:
+                    xf.set(attribute, "1")
+            if alignment_id:
+                xf.set("applyAlignment", "1")
+                xf.append(self.alignments[alignment_id].to_tree())
+            if protection_id:
+                xf.set("applyProtection", "1")
+                xf.append(self.protections[protection_id].to_tree())
+
+        node = SubElement(root, "cellStyles", {"count": "1"})
+        SubElement(node, "cellStyle", {"name": "Normal", "xfId": "0", "builtinId": "0"})
+
+        return tostring(root)
+
+
+class NativeCommentWriter(CommentWriter):
+
+    def __init__(self, comments):
+        self.comments_to_write = comments
+        super(NativeCommentWriter, self).__init__(None)
+
+    def extract_comments(self):
+        for comment in self.comments_to_write:
+            self.authors.add(comment.author)
+            self.comments.append(comment)
+
+
+class SheetWriter(object):
+    """Writes the only worksheet into temporary file, row by row."""
+
+    def __init__(self, sheet, strings, styles):
+        self.sheet = sheet
+        self.strings = strings
+        self.styles = styles
+        self.hyperlinks = []
+        self.comments = []
+        self.letters = {}
+
+    def get_letter(self, col_idx):
+        letter = self.letters.get(col_idx)
+        if letter is None:
+            letter = self.letters[col_idx] = openpyxl.utils.get_column_letter(col_idx)
+
+        return letter
+
+    def write(self, resource):
+        sheet = self.sheet
+        resource.write(self.write_header().encode("utf-8"))
+
+        rows = sheet.rows
+        for row_idx in sorted(rows):
+            row_cells = rows[row_idx]
+            if row_cells:
+                chunks = ['<row r="{0}">'.format(row_idx)]
+                chunks.extend(self.write_cell(row_cells[col_idx]) for col_idx in sorted(row_cells))
+                chunks.append("</row>")
+                resource.write("".join(chunks).encode("utf-8"))
+
+        resource.write(self.write_footer().encode("utf-8"))
+
+    def write_header(self):
+        sheet = self.sheet
+        chunks = [XML_HEADER, '<worksheet xmlns="{0}" xmlns:r="{1}">'.format(SHEET_MAIN_NS, REL_NS)]
+
+        if sheet.rows:
+            chunks.append('<dimension ref="A1:{0}{1}"/>'.format(self.get_letter(sheet.max_column), sheet.max_row))
+
+        chunks.append('<sheetViews><sheetView workbookViewId="0">')
+        chunks.append(self.write_pane())
+        chunks.append("</sheetView></sheetViews>")
+        chunks.append('<sheetFormatPr defaultRowHeight="15"/>')
+
+        columns = []
+        for letter, dimension in six.iteritems(sheet.column_dimensions):
+            if dimension.width:
+                columns.append((openpyxl.utils.column_index_from_string(letter), dimension))
+        if columns:
+            chunks.append("<cols>")
+            for col_idx, dimension in sorted(columns, key=lambda item: item[0]):
+                chunks.append('<col min="{0}" max="{0}" width="{1}" customWidth="1"{2}/>'.format(
+                    col_idx, dimension.width, ' bestFit="1"' if dimension.auto_size else ""))
+            chunks.append("</cols>")
+
+        chunks.append("<sheetData>")
+
+        return "".join(chunks)
+
+    def write_pane(self):
+        top_left_cell = self.sheet.freeze_panes
+        if not top_left_cell or top_left_cell.upper() == "A1":
+            return '<selection activeCell="A1" sqref="A1"/>'
+
+        top_left_cell = top_left_cell.upper()
+        column, row = openpyxl.utils.coordinate_from_string(top_left_cell)
+        column = openpyxl.utils.column_index_from_string(column)
+
+        attrs = []
+        if column > 1:
+            attrs.append('xSplit="{0}"'.format(column - 1))
+        if row > 1:
+            attrs.append('ySplit="{0}"'.format(row - 1))
+        if row > 1 and column > 1:
+            pane = "bottomRight"
+        elif row > 1:
+            pane = "bottomLeft"
+        else:
+            pane = "topRight"
+
+        return '<pane {0} topLeftCell="{1}" activePane="{2}" state="frozen"/><selection pane="{2}"/>'.format(
+            " ".join(attrs), top_left_cell, pane)
+
+    def write_cell(self, cell):
+        value = cell._value
+        if cell._hyperlink is not None:
+            self.hyperlinks.append(cell)
+        if cell._comment is not None:
+            self.comments.append(cell._comment)
+
+        style_id = self.styles.get_id(cell)
+        attrs = 'r="{0}{1}"'.format(self.get_letter(cell.col_idx), cell.row)
+        if style_id:
+            attrs += ' s="{0}"'.format(style_id)
+
+        if value is None:
+            return "<c {0}/>".format(attrs)
+
+        data_type = cell.data_type
+        if data_type == "s":
+            return self.write_string(attrs, value)
+        if data_type == "n":
+            return self.write_number(attrs, value)
+
+        return self.write_special(attrs, data_type, value)
+
+    def write_string(self, attrs, value):
+        if not value:
+            return "<c {0}/>".format(attrs)
+
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+
+        return '<c {0} t="s"><v>{1}</v></c>'.format(attrs, index)
+
+    def write_number(self, attrs, value):
+        if isinstance(value, (datetime.date, datetime.time, datetime.timedelta)):
+            value = self.convert_date(value)
+
+        return "<c {0}><v>{1}</v></c>".format(attrs, repr(value) if isinstance(value, float) else value)
+
+    @staticmethod
+    def write_special(attrs, data_type, value):
+        """Writes booleans, formulas and errors."""
+
+        if data_type == "b":
+            return '<c {0} t="b"><v>{1}</v></c>'.format(attrs, int(value))
+        if data_type == "f":
+            return "<c {0}><f>{1}</f><v></v></c>".format(attrs, escape_text(value[1:]))
+
+        return '<c {0} t="e"><v>{1}</v></c>'.format(attrs, escape_text(value))
+
+    @staticmethod
+    def convert_date(value):
+        if isinstance(value, datetime.time):
+            return time_to_days(value)
+        if isinstance(value, datetime.timedelta):
+            return timedelta_to_days(value)
+
+        return to_excel(value)
+
+    def write_footer(self):
+        chunks = ["</sheetData>"]
+
+        if self.hyperlinks:
+            chunks.append("<hyperlinks>")
+            for idx, cell in enumerate(self.hyperlinks, 1):
+                chunks.append('<hyperlink ref="{0}" r:id="rId{1}"/>'.format(cell.coordinate, idx))
+            chunks.append("</hyperlinks>")
+
+        chunks.append('<pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/>')
+        if self.comments:
+            chunks.append('<legacyDrawing r:id="commentsvml"/>')
+        chunks.append("</worksheet>")
+
+        return "".join(chunks)
+
+    def write_rels(self, comments_id):
+        chunks = [XML_HEADER, '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">']
+
+        for idx, cell in enumerate(self.hyperlinks, 1):
+            chunks.append('<Relationship Id="rId{0}" Type="{1}" Target="{2}" TargetMode="External"/>'.format(
+                idx, HYPERLINK_NS, escape(cell._hyperlink)))
+        if self.comments:
+            chunks.append('<Relationship Id="comments" Type="{0}" Target="../comments{1}.xml"/>'.format(
+                COMMENTS_NS, comments_id))
+            chunks.append('<Relationship Id="commentsvml" Type="{0}" Target="../drawings/commentsDrawing{1}.vml"/>'
+                          .format(VML_NS, comments_id))
+
+        chunks.append("</Relationships>")
+
+        return "".join(chunks)
+
+
+class NativeWriter(object):
+
+    def __init__(self, workbook):
+        self.workbook = workbook
+        self.strings = {}
+        self.styles = StyleTable()
+        self.comment_parts = 0
+
+    def save(self, filename):
+        # ZipFile is not a context manager in Python 2.6.
+        archive = zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED)
+        try:
+            for idx, sheet in enumerate(self.workbook.worksheets, 1):
+                self.write_worksheet(archive, idx, sheet)
+
+            archive.writestr("xl/sharedStrings.xml", self.write_shared_strings())
+            archive.writestr("xl/styles.xml", self.styles.write())
+            archive.writestr("xl/workbook.xml", self.write_workbook())
+            archive.writestr("xl/_rels/workbook.xml.rels", self.write_workbook_rels())
+            archive.writestr("docProps/core.xml", self.write_core())
+            archive.writestr("docProps/app.xml", self.write_app())
+            archive.writestr("_rels/.rels", self.write_root_rels())
+            archive.writestr("[Content_Types].xml", self.write_content_types())
+        finally:
+            archive.close()
+
+    def write_worksheet(self, archive, idx, sheet):
+        writer = SheetWriter(sheet, self.strings, self.styles)
+
+        handle, path = tempfile.mkstemp(suffix=".xml", prefix="surveyor-")
+        try:
+            with os.fdopen(handle, "wb") as resource:
+                writer.write(resource)
+            archive.write(path, "xl/worksheets/sheet{0}.xml".format(idx))
+        finally:
+            os.remove(path)
+
+        comments_id = None
+        if writer.comments:
+            self.comment_parts += 1
+            comments_id = self.comment_parts
+            comment_writer = NativeCommentWriter(writer.comments)
+            archive.writestr("xl/comments{0}.xml".format(comments_id), comment_writer.write_comments())
+            archive.writestr("xl/drawings/commentsDrawing{0}.vml".format(comments_id),
+                             comment_writer.write_comments_vml())
+        if writer.hyperlinks or writer.comments:
+            archive.writestr("xl/worksheets/_rels/sheet{0}.xml.rels".format(idx), writer.write_rels(comments_id))
+
+    def write_shared_strings(self):
+        strings = sorted(six.iteritems(self.strings), key=lambda item: item[1])
+        chunks = [XML_HEADER, '<sst xmlns="{0}" uniqueCount="{1}">'.format(SHEET_MAIN_NS, len(strings))]
+
+        for value, _ in strings:
+            if value != value.strip():
+                chunks.append('<si><t xml:space="preserve">{0}</t></si>'.format(escape_text(value)))
+            else:
+                chunks.append("<si><t>{0}</t></si>".format(escape_text(value)))
+
+        chunks.append("</sst>")
+
+        return "".join(chunks)
+
+    def write_workbook(self):
+        chunks = [XML_HEADER, '<workbook xmlns="{0}" xmlns:r="{1}">'.format(SHEET_MAIN_NS, REL_NS),
+                  '<workbookPr/><bookViews><workbookView activeTab="0"/></bookViews><sheets>']
+
+        for idx, sheet in enumerate(self.workbook.worksheets, 1):
+            chunks.append('<sheet name="{0}" sheetId="{1}" r:id="rId{1}"/>'.format(escape(sheet.title), idx))
+
+        chunks.append('</sheets><calcPr calcId="124519" fullCalcOnLoad="1"/></workbook>')
+
+        return "".join(chunks)
+
+    def write_workbook_rels(self):
+        sheets = len(self.workbook.worksheets)
+        chunks = [XML_HEADER, '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">']
+
+        for idx in range(1, sheets + 1):
+            chunks.append('<Relationship Id="rId{0}" Type="{1}/worksheet" Target="worksheets/sheet{0}.xml"/>'.format(
+                idx, REL_NS))
+        chunks.append('<Relationship Id="rId{0}" Type="{1}/styles" Target="styles.xml"/>'.format(sheets + 1, REL_NS))
+        chunks.append('<Relationship Id="rId{0}" Type="{1}/sharedStrings" Target="sharedStrings.xml"/>'.format(
+            sheets + 2, REL_NS))
+        chunks.append("</Relationships>")
+
+        return "".join(chunks)
+
+    @staticmethod
+    def write_root_rels():
+        return "".join((
+            XML_HEADER,
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">',
+            '<Relationship Id="rId1" Type="{0}/officeDocument" Target="xl/workbook.xml"/>'.format(REL_NS),
+            '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/'
+            'core-properties" Target="docProps/core.xml"/>',
+            '<Relationship Id="rId3" Type="{0}/extended-properties" Target="docProps/app.xml"/>'.format(REL_NS),
+            "</Relationships>"))
+
+    @staticmethod
+    def write_core():
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+        return "".join((
+            XML_HEADER,
+            '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">',
+            "<dc:creator>surveyor</dc:creator>",
+            '<dcterms:created xsi:type="dcterms:W3CDTF">{0}</dcterms:created>'.format(now),
+            '<dcterms:modified xsi:type="dcterms:W3CDTF">{0}</dcterms:modified>'.format(now),
+            "</cp:coreProperties>"))
+
+    @staticmethod
+    def write_app():
+        return "".join((
+            XML_HEADER,
+            '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">',
+            "<Application>surveyor</Application>",
+            "</Properties>"))
+
+    def write_content_types(self):
+        chunks = [
+            XML_HEADER,
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">',
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>',
+            '<Default Extension="xml" ContentType="application/xml"/>',
+            '<Default Extension="vml" ContentType="application/vnd.openxmlformats-officedocument.vmlDrawing"/>',
+            '<Override PartName="/xl/workbook.xml" ContentType="{0}"/>'.format(CONTENT_TYPES["workbook"]),
+            '<Override PartName="/xl/styles.xml" ContentType="{0}"/>'.format(CONTENT_TYPES["styles"]),
+            '<Override PartName="/xl/sharedStrings.xml" ContentType="{0}"/>'.format(CONTENT_TYPES["strings"]),
+            '<Override PartName="/docProps/core.xml" ContentType="{0}"/>'.format(CONTENT_TYPES["core"]),
+            '<Override PartName="/docProps/app.xml" ContentType="{0}"/>'.format(CONTENT_TYPES["app"]),
+        ]
+
+        for idx in range(1, len(self.workbook.worksheets) + 1):
+            chunks.append('<Override PartName="/xl/worksheets/sheet{0}.xml" ContentType="{1}"/>'.format(
+                idx, CONTENT_TYPES["worksheet"]))
+        for idx in range(1, self.comment_parts + 1):
+            chunks.append('<Override PartName="/xl/comments{0}.xml" ContentType="{1}"/>'.format(
+                idx, CONTENT_TYPES["comments"]))
+
+        chunks.append("</Types>")
+
+        return "".join(chunks)
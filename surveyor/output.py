@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""Saving of rendered workbooks into files and streams.
+
+zipfile writes into seekable files in place, it goes back to fix sizes
+of entries. If position of the stream is known but seek() is not
+available, every entry gets a data descriptor after its data instead and
+nothing is rewritten (Python 3.5 and newer). ChunkedWriter hides seek()
+of the stream it wraps, so pipes, sockets and response bodies get xlsx
+as its entries are compressed, without temporary file or the whole
+archive in memory.
+"""
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import sys
+
+import six
+
+
+STDIO_FILENAME = "-"
+"""Filename of stdin for templates and of stdout for results."""
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+"""Amount of bytes to collect before writing into wrapped stream."""
+
+
+class ChunkedWriter(object):
+    """Write-only, non-seekable wrapper of stream with write() method.
+
+    Small writes of zipfile are joined into chunks of chunk_size bytes.
+    """
+
+    def __init__(self, fileobj, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.chunks = []
+        self.buffered = 0
+        self.position = 0
+
+    def write(self, data):
+        size = len(data)
+        self.chunks.append(bytes(data))
+        self.buffered += size
+        self.position += size
+
+        if self.buffered >= self.chunk_size:
+            self.write_chunks()
+
+        return size
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        self.write_chunks()
+
+        flush = getattr(self.fileobj, "flush", None)
+        if flush is not None:
+            flush()
+
+    def write_chunks(self):
+        if self.chunks:
+            self.fileobj.write(b"".join(self.chunks))
+            self.chunks = []
+            self.buffered = 0
+
+
+def get_stdin():
+    return getattr(sys.stdin, "buffer", sys.stdin)
+
+
+def get_stdout():
+    # Text which is written already has to go first.
+    sys.stdout.flush()
+
+    return getattr(sys.stdout, "buffer", sys.stdout)
+
+
+def save(workbook, output):
+    """Saves workbook into filepath, writable file object or stdout if output is '-'."""
+
+    if output == STDIO_FILENAME:
+        output = get_stdout()
+    if isinstance(output, six.string_types):
+        return workbook.save(output)
+
+    writer = ChunkedWriter(output)
+    workbook.save(writer)
+    writer.flush()
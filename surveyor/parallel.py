@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""Rendering of sheets in worker processes.
+
+Every sheet is rendered by worker into its own workbook and serialized
+into a SheetPart: XML of worksheet plus local tables of shared strings
+and styles which XML refers to by index. Parent process merges local
+tables into global ones in sheet order, so indexes are the same as
+serial rendering would give, rewrites references in XML if they differ
+and writes parts into xlsx package as is.
+
+Stylers run in workers, so sheet stylers see only own sheet and
+workbook stylers are not supported to change anything but sheets.
+"""
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import multiprocessing
+import re
+
+import openpyxl
+import openpyxl.writer.dump_worksheet as dump_worksheet
+import six
+
+import surveyor.context
+
+from openpyxl.styles.style import StyleId
+from openpyxl.worksheet.relationship import Relationship
+from openpyxl.writer.comments import CommentWriter
+from openpyxl.writer.excel import ExcelWriter
+from openpyxl.writer.relations import write_rels
+from openpyxl.writer.worksheet import write_worksheet
+from openpyxl.xml.constants import PACKAGE_WORKSHEETS
+from openpyxl.xml.constants import PACKAGE_XL
+from openpyxl.xml.functions import tostring
+
+# noinspection PyUnresolvedReferences
+from six.moves import range
+
+
+CUSTOM_NUMBER_FORMAT_OFFSET = 164
+"""Index of the first custom number format in xlsx style table."""
+
+STYLE_COLLECTIONS = "_fonts", "_fills", "_borders", "_alignments", "_protections"
+"""Workbook collections of style objects, referenced by cell styles."""
+
+STYLE_ID_FIELDS = (
+    ("fontId", "_fonts"),
+    ("fillId", "_fills"),
+    ("borderId", "_borders"),
+    ("alignmentId", "_alignments"),
+    ("protectionId", "_protections"))
+"""Fields of cell style with collections they point to."""
+
+CELL_RE = re.compile(br'<c(\s[^>]*?)?(/?)>(?:<v>([0-9]+)</v>)?')
+"""Regular expression for start tag of cell and its value, attributes go in any order."""
+
+CELL_STYLE_RE = re.compile(br'(\ss=")([0-9]+)"')
+"""Regular expression for reference of cell to its style."""
+
+CELL_SHARED_RE = re.compile(br'\st="s"')
+"""Regular expression for type of cell which value is index of shared string."""
+
+WORKER_STATE = {}
+"""Template which worker process renders."""
+
+
+class SheetPart(object):
+    """Serialized worksheet, rendered by worker."""
+
+    __slots__ = ("title", "data", "strings", "cell_styles", "styles", "number_formats",
+                 "relationships", "comment_count", "comments", "comments_vml")
+
+    def __init__(self, worksheet, data, comment_writer=None):
+        book = worksheet.parent
+
+        self.title = worksheet.title
+        self.data = data
+        self.strings = list(book.shared_strings)
+        self.cell_styles = list(book._cell_styles)
+        self.styles = dict((name, list(getattr(book, name))) for name in STYLE_COLLECTIONS)
+        self.number_formats = list(book._number_formats)
+        self.relationships = [
+            (rel.type.rsplit("/", 1)[-1], rel.target, rel.target_mode, rel.id)
+            for rel in worksheet.relationships]
+
+        self.comment_count = 0
+        self.comments = self.comments_vml = None
+        if comment_writer is not None and comment_writer.comments:
+            self.comment_count = len(comment_writer.comments)
+            self.comments = comment_writer.write_comments()
+            self.comments_vml = comment_writer.write_comments_vml()
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    @classmethod
+    def from_worksheet(cls, worksheet):
+        if worksheet.parent.write_only:
+            worksheet.close()
+            with open(worksheet.filename, "rb") as resource:
+                data = resource.read()
+            worksheet._cleanup()
+
+            return cls(worksheet, data, dump_worksheet.DumpCommentWriter(worksheet))
+
+        # Writing fills shared strings and cell styles so it goes first.
+        data = write_worksheet(worksheet, worksheet.parent.shared_strings)
+
+        return cls(worksheet, data, CommentWriter(worksheet))
+
+
+class PartsWorkbook(openpyxl.Workbook):
+    """Workbook which is assembled of rendered sheet parts."""
+
+    def __init__(self, *args, **kwargs):
+        super(PartsWorkbook, self).__init__(*args, **kwargs)
+
+        self.worksheets = []
+        self.parts = []
+
+    def add_part(self, part):
+        worksheet = self.create_sheet(title=part.title)
+        worksheet._comment_count = part.comment_count
+        worksheet.relationships = [
+            Relationship(rel_type, target, target_mode, rel_id)
+            for rel_type, target, target_mode, rel_id in part.relationships]
+
+        styles = dict(
+            (name, [getattr(self, name).add(style) for style in part.styles[name]])
+            for name in STYLE_COLLECTIONS)
+        number_formats = [
+            self._number_formats.add(number_format) + CUSTOM_NUMBER_FORMAT_OFFSET
+            for number_format in part.number_formats]
+        cell_styles = [
+            self._cell_styles.add(self.merge_style_id(style_id, styles, number_formats))
+            for style_id in part.cell_styles]
+        strings = [self.shared_strings.add(string) for string in part.strings]
+
+        self.parts.append((worksheet, remap_cells(part.data, cell_styles, strings), part))
+
+        return worksheet
+
+    @staticmethod
+    def merge_style_id(style_id, styles, number_formats):
+        kwargs = dict((field, styles[name][getattr(style_id, field)]) for field, name in STYLE_ID_FIELDS)
+
+        number_format_id = style_id.numFmtId
+        if number_format_id >= CUSTOM_NUMBER_FORMAT_OFFSET:
+            number_format_id = number_formats[number_format_id - CUSTOM_NUMBER_FORMAT_OFFSET]
+
+        return StyleId(numFmtId=number_format_id,
+                       pivotButton=style_id.pivotButton,
+                       quotePrefix=style_id.quotePrefix,
+                       **kwargs)
+
+    def save(self, filename):
+        PartsWriter(self).save(filename)
+
+
+class PartsWriter(ExcelWriter):
+    """Writer which stores pre-rendered parts instead of writing worksheets."""
+
+    def _write_worksheets(self, archive):
+        comments_id = 1
+
+        for idx, (sheet, data, part) in enumerate(self.workbook.parts, 1):
+            archive.writestr(PACKAGE_WORKSHEETS + "/sheet%d.xml" % idx, data)
+
+            if sheet.relationships or part.comment_count:
+                rels = write_rels(sheet, 1, comments_id, None)
+                archive.writestr(PACKAGE_WORKSHEETS + "/_rels/sheet%d.xml.rels" % idx, tostring(rels))
+
+            if part.comment_count:
+                archive.writestr(PACKAGE_XL + "/comments%d.xml" % comments_id, part.comments)
+                archive.writestr(PACKAGE_XL + "/drawings/commentsDrawing%d.vml" % comments_id,
+                                 part.comments_vml)
+                comments_id += 1
+
+
+def remap_cells(data, cell_styles, strings):
+    """Rewrites local style and shared string indexes of cells to global ones."""
+
+    if is_identity(cell_styles) and is_identity(strings):
+        return data
+
+    def replace_style(match):
+        return match.group(1) + encode_index(cell_styles[int(match.group(2))]) + b'"'
+
+    def replace(match):
+        attributes, closing, value = match.groups()
+        if attributes is None:
+            return match.group(0)
+
+        result = b"<c" + CELL_STYLE_RE.sub(replace_style, attributes) + closing + b">"
+        if value is not None:
+            if CELL_SHARED_RE.search(attributes) is not None:
+                value = encode_index(strings[int(value)])
+            result += b"<v>" + value + b"</v>"
+
+        return result
+
+    return CELL_RE.sub(replace, data)
+
+
+def encode_index(idx):
+    return six.text_type(idx).encode("ascii")
+
+
+def is_identity(mapping):
+    return all(idx == value for idx, value in enumerate(mapping))
+
+
+def init_worker(workbook, mode, params):
+    WORKER_STATE["workbook"] = workbook
+    WORKER_STATE["mode"] = mode
+    WORKER_STATE["params"] = params
+
+
+def render_part(sheet_index):
+    workbook = WORKER_STATE["workbook"]
+
+    with surveyor.context.rendering(params=WORKER_STATE["params"]):
+        return make_part(workbook, WORKER_STATE["mode"], workbook.children[sheet_index])
+
+
+def make_part(workbook, mode, sheet):
+    """Renders sheet of template workbook into its own SheetPart."""
+
+    worksheet = workbook.render_sheet(workbook.make_book(mode), sheet)
+
+    return SheetPart.from_worksheet(worksheet)
+
+
+def render(workbook, mode, workers, params=None):
+    """Renders sheets of template workbook with pool of workers processes."""
+
+    book = PartsWorkbook(encoding="utf-8", guess_types=True)
+    if not workbook.children:
+        return book
+
+    pool = multiprocessing.Pool(min(workers, len(workbook.children)), init_worker, (workbook, mode, params or {}))
+    try:
+        # Parts are merged in sheet order, that keeps indexes deterministic.
+        for part in pool.imap(render_part, range(len(workbook.children))):
+            book.add_part(part)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    return book
@@ -9,23 +9,95 @@ try:
 except ImportError:
     try:
         # noinspection PyPep8Naming
-        import xml.etree.cElementTree as etree
+        import xml.etree.cElementTree as etree  # noqa
     except ImportError:
         # noinspection PyPep8Naming
-        import xml.etree.ElementTree as etree
+        import xml.etree.ElementTree as etree  # noqa
 
 import six
 
 import surveyor.elements
 import surveyor.exceptions
+import surveyor.output
 
 
-def parse_filename(filename):
-    with open(filename, "r") as resource:
-        return parse_fileobj(resource)
+ITERPARSE_EVENTS = ("start", "end")
+"""Events iterparse has to report for streaming parsing."""
 
+ITERPARSE_KWARGS = {"huge_tree": True} if etree.__name__ == "lxml.etree" else {}
+"""Additional keyword arguments for iterparse of chosen etree implementation."""
+
+ELEMENTS_BY_DEPTH = (
+    surveyor.elements.WorkBook,
+    surveyor.elements.Sheet,
+    surveyor.elements.Table,
+    surveyor.elements.Row,
+    surveyor.elements.Cell,
+)
+"""Element classes, expected on each level of XML tree."""
+
+
+class EncodedReader(object):
+    """Wrapper for text file objects which returns UTF-8 encoded bytes.
+
+    lxml's iterparse accepts only binary streams.
+    """
+
+    def __init__(self, fileobj, encoding="utf-8"):
+        self.fileobj = fileobj
+        self.encoding = encoding
+
+    def read(self, size=-1):
+        chunk = self.fileobj.read(size)
+        if isinstance(chunk, six.text_type):
+            chunk = chunk.encode(self.encoding)
+
+        return chunk
+
+
+def parse_filename(filename, streaming=False, cache=None, metrics=None):
+    if filename == surveyor.output.STDIO_FILENAME:
+        # Stdin can be read only once, so it is not cached.
+        return parse_fileobj(surveyor.output.get_stdin(), streaming=streaming, metrics=metrics)
+
+    if cache is None:
+        return parse_file(filename, streaming, metrics)
+
+    return parse_cached(cache, cache.make_key_filename(filename), metrics, parse_file, filename, streaming, metrics)
+
+
+def parse_file(filename, streaming=False, metrics=None):
+    mode = "rb" if streaming else "r"
+    with open(filename, mode) as resource:
+        return parse_fileobj(resource, streaming=streaming, metrics=metrics)
+
+
+def parse_fileobj(content, streaming=False, metrics=None, cache=None):
+    """Parses file object or string with template.
+
+    If cache is set, content is read into memory: it is hashed for the
+    key of cache and then parsed on miss.
+    """
+
+    if cache is not None:
+        if not isinstance(content, (six.text_type, six.binary_type)):
+            content = content.read()
+
+        if isinstance(content, six.text_type):
+            key = cache.make_key(six.BytesIO(content.encode("utf-8")))
+        else:
+            key = cache.make_key(six.BytesIO(content))
+            content = six.BytesIO(content)
+
+        return parse_cached(cache, key, metrics, parse_fileobj, content, streaming, metrics)
+
+    if metrics is not None:
+        with metrics.phase("parse"):
+            return parse_fileobj(content, streaming)
+
+    if streaming:
+        return iterparse_fileobj(content)
 
-def parse_fileobj(content):
     if isinstance(content, six.string_types):
         # noinspection PyCallingNonCallable
         content = six.StringIO(content)
@@ -37,8 +109,37 @@ def parse_fileobj(content):
     return parsed
 
 
+def parse_cached(cache, key, metrics, parse, *args):
+    """Returns parsed template from cache, parse(*args) puts it there on miss."""
+
+    parsed = cache.get(key)
+    if parsed is not None:
+        if metrics is not None:
+            metrics.count("template_cache_hits")
+        return parsed
+
+    parsed = parse(*args)
+    cache.put(key, parsed)
+
+    return parsed
+
+
+def iterparse_fileobj(content):
+    if isinstance(content, six.text_type):
+        content = content.encode("utf-8")
+    if isinstance(content, six.binary_type):
+        content = six.BytesIO(content)
+    else:
+        content = EncodedReader(content)
+
+    events = etree.iterparse(content, events=ITERPARSE_EVENTS, **ITERPARSE_KWARGS)
+
+    return iterparse_xml(events)
+
+
 def parse_xml(root):
     workbook = surveyor.elements.WorkBook(root)
+    style_keys = {}
 
     for sheet_element in root.findall(surveyor.elements.Sheet.TAG_NAME):
         sheet = surveyor.elements.Sheet(sheet_element)
@@ -53,7 +154,75 @@ def parse_xml(root):
                 table.add(row)
 
                 for cell_element in row_element.findall(surveyor.elements.Cell.TAG_NAME):
-                    cell = surveyor.elements.Cell(cell_element)
+                    cell = surveyor.elements.Cell(cell_element, row.get_type_hint(), style_keys)
                     row.add(cell)
 
+    workbook.freeze()
+
     return workbook
+
+
+def iterparse_xml(events):
+    """Builds element tree from the stream of iterparse events.
+
+    Container elements (workbook, sheets, tables and rows) are created
+    on start events because only attributes are required for them. Cells
+    need text so they are created on end events. Each XML element is
+    cleared and detached from its parent as soon as it is consumed so memory consumption depends on the size of the
+    resulting element tree, not on the size of XML document.
+    """
+
+    workbook = None
+    stack = []
+    style_keys = {}
+
+    for event, xml_element in events:
+        if event == "start":
+            stack.append((xml_element, iterparse_start(xml_element, stack)))
+            if workbook is None:
+                workbook = stack[0][1]
+            continue
+
+        xml_element, element = stack.pop()
+        if len(stack) == len(ELEMENTS_BY_DEPTH) - 1 and stack[-1][1] is not None:
+            if xml_element.tag == surveyor.elements.Cell.TAG_NAME:
+                row = stack[-1][1]
+                row.add(surveyor.elements.Cell(xml_element, row.get_type_hint(), style_keys))
+
+        if stack:
+            iterparse_release(xml_element, stack[-1][0])
+
+    if workbook is not None:
+        workbook.freeze()
+
+    return workbook
+
+
+def iterparse_release(xml_element, xml_parent):
+    xml_element.clear()
+
+    # lxml still references the last parsed node (to attach tail text),
+    # so only its already consumed siblings can be detached safely.
+    if hasattr(xml_element, "getprevious"):
+        while xml_element.getprevious() is not None:
+            del xml_parent[0]
+    else:
+        xml_parent.remove(xml_element)
+
+
+def iterparse_start(xml_element, stack):
+    depth = len(stack)
+    if depth == 0:
+        return surveyor.elements.WorkBook(xml_element)
+    if depth >= len(ELEMENTS_BY_DEPTH) - 1:
+        return None
+
+    parent = stack[-1][1]
+    element_class = ELEMENTS_BY_DEPTH[depth]
+    if parent is None or xml_element.tag != element_class.TAG_NAME:
+        return None
+
+    element = element_class(xml_element)
+    parent.add(element)
+
+    return element
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Placeholders of template parameters: {{ name }}.
+
+Text with placeholders is compiled into Text once, on parsing. Rendering
+of Text is a join of literal chunks and values of parameters. If text
+is the only placeholder, value of parameter is kept as is, so numbers
+stay numbers.
+"""
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import re
+
+import six
+
+import surveyor.exceptions
+
+
+PLACEHOLDER_RE = re.compile(r"{{\s*([A-Za-z_][A-Za-z0-9_.-]*)\s*}}")
+"""Regular expression for placeholder of template parameter."""
+
+
+class Text(object):
+    """Text with placeholders.
+
+    Chunks are literals on even positions and names of parameters on
+    odd ones.
+    """
+
+    __slots__ = "chunks",
+
+    def __init__(self, chunks):
+        self.chunks = tuple(chunks)
+
+    def __eq__(self, other):
+        return isinstance(other, Text) and self.chunks == other.chunks
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.chunks)
+
+    def __str__(self):
+        return self.source
+
+    __unicode__ = __str__
+
+    def __repr__(self):
+        return "Text({0!r})".format(self.source)
+
+    @property
+    def source(self):
+        return "".join(
+            chunk if idx % 2 == 0 else "{{ " + chunk + " }}"
+            for idx, chunk in enumerate(self.chunks))
+
+    @property
+    def names(self):
+        return self.chunks[1::2]
+
+    def render(self, params):
+        chunks = self.chunks
+
+        try:
+            if len(chunks) == 3 and not chunks[0] and not chunks[2]:
+                return params[chunks[1]]
+
+            rendered = []
+            for idx, chunk in enumerate(chunks):
+                if idx % 2 == 0:
+                    rendered.append(chunk)
+                else:
+                    rendered.append(six.text_type(params[chunk]))
+        except KeyError as exc:
+            raise surveyor.exceptions.UnknownParameterError(exc.args[0], params)
+
+        return "".join(rendered)
+
+
+def compile_text(value):
+    """Returns Text if value has placeholders and value as is otherwise."""
+
+    if not isinstance(value, six.string_types) or "{{" not in value:
+        return value
+
+    chunks = PLACEHOLDER_RE.split(value)
+    if len(chunks) == 1:
+        return value
+
+    return Text(chunks)
+
+
+def substitute(value, params):
+    if isinstance(value, Text):
+        return value.render(params or {})
+
+    return value
+
+
+def substitute_text(value, params):
+    """Same as substitute(), but placeholders always render into text.
+
+    Only cell values keep types of parameters. Sheet names, hyperlinks
+    and comments are text even if they are the only placeholder.
+    """
+
+    if isinstance(value, Text):
+        return six.text_type(value.render(params or {}))
+
+    return value
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""Precompiled render plans of parsed templates.
+
+Generic rendering walks the element tree on every render: it resolves
+coordinates, builds style objects and looks up stylers for each cell.
+Render plan does all of that once, on compile, and keeps flat lists of
+cell writes per row. Render of plan costs only writes of cells,
+substitution of placeholders and calls of stylers which do something.
+
+Plan renders in default mode. Write-only rendering, parallel rendering,
+measured rendering, incremental rendering and tables bound to data are
+delegated to elements.
+"""
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import openpyxl.comments
+
+import surveyor.cache
+import surveyor.classes._base
+import surveyor.context
+import surveyor.elements
+import surveyor.placeholders
+
+
+class SheetPlan(object):
+
+    __slots__ = "sheet", "tables"
+
+    def __init__(self, sheet, style_cache):
+        self.sheet = sheet
+        self.tables = [TablePlan(table, style_cache) for table in sheet.children]
+
+
+class TablePlan(object):
+
+    __slots__ = "table", "rows", "dimensions", "styler"
+
+    def __init__(self, table, style_cache):
+        self.table = table
+        self.rows = None
+        self.dimensions = None
+        self.styler = None
+
+        if table.data is not None:
+            # Amount of rows is known only after rendering.
+            return
+
+        top_row, _, left_column, _ = self.dimensions = table.get_dimensions()
+        self.rows = [
+            RowPlan(row, row_idx, left_column, idx == 0, style_cache)
+            for idx, (row_idx, row) in enumerate(enumerate(table.children, start=top_row))]
+        self.styler = table.get_styler()
+
+
+class RowPlan(object):
+
+    __slots__ = "left_column", "header", "cells", "styler"
+
+    def __init__(self, row, row_idx, left_column, header, style_cache):
+        self.left_column = left_column
+        self.header = header
+        self.cells = [
+            make_cell_plan(cell, row_idx, col_idx, style_cache)
+            for col_idx, cell in enumerate(row.children, start=left_column)]
+        self.styler = row.get_styler()
+
+
+def make_cell_plan(cell, row_idx, col_idx, style_cache):
+    styles = tuple(
+        (cell.STYLE_ATTRIBUTES[prefix].attribute, style_cache.get(cell.STYLE_ATTRIBUTES[prefix].constructor, kwargs))
+        for prefix, kwargs in cell.style_key)
+
+    return (row_idx, col_idx, cell.value, cell.hyperlink, cell.comment_text, cell.comment_author,
+            cell.number_format, styles, cell.get_styler())
+
+
+class RenderPlan(object):
+    """Reusable plan of rendering for parsed template."""
+
+    def __init__(self, workbook):
+        self.workbook = workbook
+
+        # Style objects are immutable, so plan shares them between renders.
+        style_cache = surveyor.cache.StyleCache()
+        self.sheets = [SheetPlan(sheet, style_cache) for sheet in workbook.children]
+
+    def render(self, params=None, data=None, mode=None, workers=None, metrics=None, part_cache=None):
+        workbook = self.workbook
+        if workbook.get_mode(mode) != workbook.MODE_DEFAULT or (workers is not None and workers > 1) or \
+                metrics is not None or part_cache is not None:
+            return workbook.process(mode=mode, workers=workers, data=data, params=params, metrics=metrics,
+                                    part_cache=part_cache)
+
+        params = params or {}
+        with surveyor.context.rendering(data, params):
+            book = workbook.make_book(workbook.MODE_DEFAULT)
+            for sheet_plan in self.sheets:
+                title = surveyor.placeholders.substitute_text(sheet_plan.sheet.name, params)
+                worksheet = book.create_sheet(title=title)
+                self.render_sheet(sheet_plan, worksheet, params)
+
+        return book
+
+    def render_sheet(self, sheet_plan, worksheet, params):
+        sheet = sheet_plan.sheet
+        sheet.column_widths = sheet.make_column_widths() if sheet.autosize else None
+        sheet.batches = surveyor.elements.StylerBatches()
+
+        try:
+            for table_plan in sheet_plan.tables:
+                if table_plan.rows is None:
+                    table_plan.table.process(worksheet)
+                    continue
+
+                self.render_rows(table_plan.rows, worksheet, params, sheet.column_widths)
+                if table_plan.styler is not None:
+                    surveyor.elements.stylize_table(table_plan.styler, worksheet, table_plan.dimensions,
+                                                    sheet.batches)
+            sheet.batches.run()
+        finally:
+            sheet.batches = None
+
+        sheet.apply_inline_styles(worksheet)
+        sheet.stylize(worksheet)
+
+        return worksheet
+
+    def render_rows(self, row_plans, worksheet, params, column_widths):
+        batches = surveyor.elements.StylerBatches()
+
+        for row_plan in row_plans:
+            cells = self.render_cells(row_plan.cells, worksheet, params, batches)
+            if column_widths is not None:
+                column_widths.add_row(row_plan.left_column, cells, row_plan.header)
+            if row_plan.styler is not None:
+                surveyor.elements.stylize_row(row_plan.styler, cells, batches)
+        batches.run()
+
+    @staticmethod
+    def render_cells(cell_plans, worksheet, params, batches):
+        text_class = surveyor.placeholders.Text
+        is_batched = surveyor.classes._base.is_batched
+        cells = []
+
+        for (row_idx, col_idx, value, hyperlink, comment_text, comment_author,
+             number_format, styles, styler) in cell_plans:
+            cell = worksheet.cell(row=row_idx, column=col_idx)
+
+            if value.__class__ is text_class:
+                value = value.render(params)
+            cell.value = value
+            if hyperlink is not None:
+                cell.hyperlink = surveyor.placeholders.substitute_text(hyperlink, params)
+            if comment_text:
+                comment_text = surveyor.placeholders.substitute_text(comment_text, params)
+                cell.comment = openpyxl.comments.Comment(comment_text, comment_author)
+
+            if number_format is not None:
+                cell.number_format = number_format
+            for attribute, style in styles:
+                setattr(cell, attribute, style)
+
+            if styler is not None:
+                if is_batched(styler):
+                    batches.add(styler, cell)
+                else:
+                    styler(cell).stylize()
+
+            cells.append(cell)
+
+        return cells
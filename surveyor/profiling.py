@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""Profiling of rendering with cProfile and tracemalloc.
+
+profile() runs a function under both of them and writes into directory:
+
+* profile.pstats: cProfile statistics, readable by pstats and snakeviz;
+* stacks.collapsed: collapsed stacks for flamegraph.pl and speedscope;
+* memory.txt: peaks and top allocations of parse, process and save;
+* metrics.json: measurements of surveyor.metrics.
+
+tracemalloc is available since Python 3.4, memory report is empty on
+older interpreters.
+"""
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import collections
+import contextlib
+import cProfile
+import io
+import os
+import os.path
+import pstats
+
+import six
+
+import surveyor.metrics
+
+from surveyor.metrics import tracemalloc
+
+
+PSTATS_FILENAME = "profile.pstats"
+"""Filename of cProfile statistics."""
+
+STACKS_FILENAME = "stacks.collapsed"
+"""Filename of collapsed stacks."""
+
+MEMORY_FILENAME = "memory.txt"
+"""Filename of memory report."""
+
+METRICS_FILENAME = "metrics.json"
+"""Filename of metrics dump."""
+
+DEFAULT_TOP_ALLOCATIONS = 20
+"""Default amount of the largest allocations reported for each phase."""
+
+MAX_STACK_DEPTH = 128
+"""Stacks deeper than that are cut."""
+
+MIN_STACK_TIME = 1e-6
+"""Stacks which took less time (in seconds) are not reported."""
+
+
+class MemoryMetrics(surveyor.metrics.Metrics):
+    """Metrics which split traced memory by parse, process and save.
+
+    Tracing restarts on the boundaries of parse and save phases, so each
+    peak and each top of allocations belongs to its own phase only.
+    """
+
+    BOUNDARY_PHASES = "parse", "save"
+
+    def __init__(self, styler_costs=False, top=DEFAULT_TOP_ALLOCATIONS):
+        super(MemoryMetrics, self).__init__(styler_costs=styler_costs)
+
+        self.top = top
+        self.memory = []
+        self.segment = "setup"
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if name not in self.BOUNDARY_PHASES:
+            with super(MemoryMetrics, self).phase(name) as metrics:
+                yield metrics
+            return
+
+        self.checkpoint()
+        self.segment = name
+        try:
+            with super(MemoryMetrics, self).phase(name) as metrics:
+                yield metrics
+        finally:
+            self.checkpoint()
+            self.segment = "process" if name == "parse" else "teardown"
+
+    def checkpoint(self):
+        """Stores peak and top allocations of current segment and restarts tracing."""
+
+        if tracemalloc is None or not tracemalloc.is_tracing():
+            return
+
+        peak = tracemalloc.get_traced_memory()[1]
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        self.memory.append((self.segment, peak, snapshot.statistics("lineno")[:self.top]))
+
+        tracemalloc.stop()
+        tracemalloc.start()
+
+    def format_memory(self):
+        if not self.memory:
+            return "Memory is not traced."
+
+        lines = ["{0:<12}{1:>16}".format("phase", "peak, MB")]
+        for segment, peak, _ in self.memory:
+            lines.append("{0:<12}{1:>16.3f}".format(segment, peak / 1024.0 / 1024.0))
+
+        for segment, _, statistics in self.memory:
+            lines.append("")
+            lines.append("Top {0} allocations of {1}".format(len(statistics), segment))
+            lines.extend("    {0}".format(stat) for stat in statistics)
+
+        return "\n".join(lines)
+
+
+def profile(directory, func, styler_costs=False, top=DEFAULT_TOP_ALLOCATIONS):
+    """Calls func(metrics=...) under cProfile and tracemalloc.
+
+    Reports are written into directory even if func fails.
+    """
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    metrics = MemoryMetrics(styler_costs=styler_costs, top=top)
+    profiler = cProfile.Profile()
+
+    if tracemalloc is not None:
+        tracemalloc.start()
+    try:
+        return profiler.runcall(func, metrics=metrics)
+    finally:
+        if tracemalloc is not None:
+            metrics.checkpoint()
+            tracemalloc.stop()
+        write_reports(directory, profiler, metrics)
+
+
+def write_reports(directory, profiler, metrics):
+    profiler.dump_stats(os.path.join(directory, PSTATS_FILENAME))
+
+    stats = pstats.Stats(profiler)
+    with io.open(os.path.join(directory, STACKS_FILENAME), "w", encoding="utf-8") as resource:
+        for stack, elapsed in sorted(six.iteritems(collapse_stacks(stats))):
+            resource.write("{0} {1}\n".format(stack, int(elapsed * 1e6)))
+
+    with io.open(os.path.join(directory, MEMORY_FILENAME), "w", encoding="utf-8") as resource:
+        resource.write(metrics.format_memory() + "\n")
+
+    with io.open(os.path.join(directory, METRICS_FILENAME), "w", encoding="utf-8") as resource:
+        resource.write(six.text_type(metrics.to_json(indent=2, sort_keys=True)))
+
+
+def collapse_stacks(stats):
+    """Returns mapping of collapsed stacks to own time in seconds.
+
+    cProfile keeps only pairs of callers and callees, not stacks, so
+    stacks are reconstructed: time of a function is split between its
+    callers in proportion to the time it spent being called by each of
+    them.
+    """
+
+    entries = stats.stats
+    callees = index_callees(entries)
+
+    stacks = collections.defaultdict(float)
+    pending = [((func,), 1.0) for func, entry in six.iteritems(entries) if not entry[4]]
+
+    while pending:
+        path, ratio = pending.pop()
+        own_time = entries[path[-1]][2]
+
+        if own_time * ratio >= MIN_STACK_TIME:
+            stacks[";".join(format_function(item) for item in path)] += own_time * ratio
+        if len(path) < MAX_STACK_DEPTH:
+            pending.extend(iter_callee_paths(entries, callees[path[-1]], path, ratio))
+
+    return stacks
+
+
+def index_callees(entries):
+    """Returns mapping of callers to pairs of callee and its time."""
+
+    callees = collections.defaultdict(list)
+    for func, (_, _, _, _, callers) in six.iteritems(entries):
+        for caller, caller_stats in six.iteritems(callers):
+            callees[caller].append((func, caller_stats[3]))
+
+    return callees
+
+
+def iter_callee_paths(entries, callees, path, ratio):
+    """Yields stacks one call deeper than path with their time ratios."""
+
+    for callee, callee_time in callees:
+        callee_cumulative_time = entries[callee][3]
+        if callee in path or callee_cumulative_time <= 0:
+            continue
+        callee_ratio = ratio * callee_time / callee_cumulative_time
+        if callee_cumulative_time * callee_ratio >= MIN_STACK_TIME:
+            yield path + (callee,), callee_ratio
+
+
+def format_function(func):
+    filename, line_number, name = func
+    if filename == "~":
+        return name.replace(";", ",")
+
+    return "{0} ({1}:{2})".format(name, os.path.basename(filename), line_number).replace(";", ",")
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""Long-living render server.
+
+Server keeps interpreter, imported classes modules and parsed templates
+warm between requests so rendering does not pay for startup, imports
+and parsing every time. It speaks HTTP over localhost TCP or Unix socket:
+
+    POST /render?path=/path/to/template.xml
+    POST /render                  (template is a body of request)
+
+Both accept optional mode=stream parameter and respond with xlsx bytes,
+which are sent while workbook is being saved.
+Requests are handled in threads: parsed templates are read-only and
+state of each rendering is local to its thread, so one template may be
+rendered by several requests at once.
+"""
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import optparse
+import os
+import os.path
+import socket
+import sys
+
+import six
+
+import surveyor
+import surveyor.cache
+import surveyor.exceptions
+import surveyor.output
+import surveyor.parse
+
+# noinspection PyUnresolvedReferences
+from six.moves import BaseHTTPServer
+# noinspection PyUnresolvedReferences
+from six.moves import http_client
+# noinspection PyUnresolvedReferences
+from six.moves import socketserver
+# noinspection PyUnresolvedReferences
+from six.moves.urllib.parse import parse_qs
+# noinspection PyUnresolvedReferences
+from six.moves.urllib.parse import urlencode
+# noinspection PyUnresolvedReferences
+from six.moves.urllib.parse import urlsplit
+
+
+DEFAULT_HOST = "127.0.0.1"
+"""Default host to listen on."""
+
+DEFAULT_PORT = 8765
+"""Default port to listen on."""
+
+RENDER_PATH = "/render"
+"""HTTP path of render endpoint."""
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+"""Content type of responses with rendered workbooks."""
+
+
+class RenderError(surveyor.exceptions.SurveyorError):
+
+    def __init__(self, status, message):
+        self.status = status
+        super(RenderError, self).__init__("Render failed with status {0}: {1}".format(status, message))
+
+
+class RenderHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_POST(self):  # noqa
+        url = urlsplit(self.path)
+        if url.path != RENDER_PATH:
+            return self.send_text(http_client.NOT_FOUND, "Unknown path {0}".format(url.path))
+
+        query = parse_qs(url.query)
+        path = query.get("path", [None])[0]
+        mode = query.get("mode", [None])[0]
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        try:
+            workbook = self.server.render(path, body, mode)
+        except (IOError, OSError) as exc:
+            return self.send_text(http_client.NOT_FOUND, six.text_type(exc))
+        except surveyor.exceptions.SurveyorError as exc:
+            return self.send_text(http_client.BAD_REQUEST, six.text_type(exc))
+        except Exception as exc:
+            return self.send_text(http_client.INTERNAL_SERVER_ERROR,
+                                  "{0}: {1}".format(exc.__class__.__name__, exc))
+
+        # Size is unknown in advance, so response ends with connection.
+        self.send_response(http_client.OK)
+        self.send_header("Content-Type", XLSX_CONTENT_TYPE)
+        self.end_headers()
+        surveyor.output.save(workbook, self.wfile)
+
+    def send_text(self, status, text):
+        self.send_content(status, "text/plain; charset=utf-8", text.encode("utf-8"))
+
+    def send_content(self, status, content_type, content):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def address_string(self):
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return "unix"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            BaseHTTPServer.BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class RenderServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """HTTP server which renders templates with warm cache of parsed ones."""
+
+    # Rendering threads must not keep interpreter alive on shutdown.
+    daemon_threads = True
+
+    def __init__(self, address, cache=None, streaming=False, quiet=False):
+        self.cache = cache or surveyor.cache.MemoryTemplateCache()
+        self.streaming = streaming
+        self.quiet = quiet
+
+        BaseHTTPServer.HTTPServer.__init__(self, address, RenderHandler)
+
+    def parse(self, path, body):
+        if path is not None:
+            return surveyor.parse.parse_filename(path, streaming=self.streaming, cache=self.cache)
+
+        return surveyor.parse.parse_fileobj(six.BytesIO(body), streaming=self.streaming, cache=self.cache)
+
+    def render(self, path, body, mode=None):
+        return self.parse(path, body).process(mode=mode)
+
+
+class UnixRenderServer(RenderServer):
+
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        # Socket of previous server may be left after crash.
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+    def server_close(self):
+        RenderServer.server_close(self)
+
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+class UnixHTTPConnection(http_client.HTTPConnection):
+
+    def __init__(self, path, timeout=None):
+        http_client.HTTPConnection.__init__(self, "localhost")
+        self.socket_path = path
+        self.socket_timeout = timeout
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.socket_timeout is not None:
+            self.sock.settimeout(self.socket_timeout)
+        self.sock.connect(self.socket_path)
+
+
+class Client(object):
+    """Client of render server.
+
+    Either unix socket path or host and port have to be set.
+    """
+
+    def __init__(self, socket_path=None, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=None):
+        self.socket_path = socket_path
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def make_connection(self):
+        if self.socket_path is not None:
+            return UnixHTTPConnection(self.socket_path, self.timeout)
+        return http_client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def render(self, path=None, body=None, mode=None):
+        """Returns xlsx bytes of template.
+
+        Template is either a path on the filesystem of server or body.
+        """
+
+        params = {}
+        if path is not None:
+            params["path"] = os.path.abspath(path)
+        if mode is not None:
+            params["mode"] = mode
+        if isinstance(body, six.text_type):
+            body = body.encode("utf-8")
+
+        url = RENDER_PATH
+        if params:
+            url += "?" + urlencode(params)
+
+        connection = self.make_connection()
+        try:
+            connection.request("POST", url, body or b"")
+            response = connection.getresponse()
+            content = response.read()
+        finally:
+            connection.close()
+
+        if response.status != http_client.OK:
+            raise RenderError(response.status, content.decode("utf-8", "replace"))
+
+        return content
+
+
+def make_server(socket_path=None, host=DEFAULT_HOST, port=DEFAULT_PORT, **kwargs):
+    if socket_path is not None:
+        return UnixRenderServer(socket_path, **kwargs)
+    return RenderServer((host, port), **kwargs)
+
+
+def add_address_options(parser):
+    parser.add_option("--socket",
+                      help="Unix socket of server. HOST:PORT is used if it is not set.",
+                      metavar="SOCKET_PATH",
+                      default=None)
+    parser.add_option("--host",
+                      help="Host of server. Default is {0}".format(DEFAULT_HOST),
+                      metavar="HOST",
+                      default=DEFAULT_HOST)
+    parser.add_option("--port",
+                      help="Port of server. Default is {0}".format(DEFAULT_PORT),
+                      metavar="PORT",
+                      type="int",
+                      default=DEFAULT_PORT)
+
+
+def get_server_options(argv):
+    usage = "%prog serve [--socket SOCKET_PATH | --host HOST --port PORT]"
+
+    parser = optparse.OptionParser(usage=usage)
+    add_address_options(parser)
+    parser.add_option("--stream-parse",
+                      help="Parse templates incrementally to keep memory footprint low.",
+                      action="store_true",
+                      default=False)
+    parser.add_option("--cache-entries",
+                      help="Amount of parsed templates to keep in memory. Default is {0}".format(
+                          surveyor.cache.DEFAULT_MAX_ENTRIES),
+                      metavar="CACHE_ENTRIES",
+                      type="int",
+                      default=surveyor.cache.DEFAULT_MAX_ENTRIES)
+    parser.add_option("--quiet",
+                      help="Do not log requests.",
+                      action="store_true",
+                      default=False)
+
+    parsed, _ = parser.parse_args(argv)
+
+    return parsed
+
+
+def get_client_options(argv):
+    usage = "%prog client [--socket SOCKET_PATH | --host HOST --port PORT] [-o OUTPUT_FILEPATH] TEMPLATE_FILEPATH"
+
+    parser = optparse.OptionParser(usage=usage)
+    add_address_options(parser)
+    parser.add_option("-o", "--output",
+                      help="Filepath to store result file. Default is '{0}'".format(surveyor.DEFAULT_FILEPATH),
+                      metavar="OUTPUT_FILEPATH",
+                      default=surveyor.DEFAULT_FILEPATH)
+    parser.add_option("--upload",
+                      help="Send template content instead of its path, if server has no access to it.",
+                      action="store_true",
+                      default=False)
+    parser.add_option("--stream",
+                      help="Render workbook with write-only worksheets to keep memory footprint flat.",
+                      action="store_true",
+                      default=False)
+
+    parsed, args = parser.parse_args(argv)
+    if len(args) != 1:
+        parser.error("Mandatory TEMPLATE_FILEPATH has to be set.")
+
+    return parsed, args[0]
+
+
+def serve(argv=None):
+    options = get_server_options(sys.argv[2:] if argv is None else argv)
+    server = make_server(options.socket, options.host, options.port,
+                         cache=surveyor.cache.MemoryTemplateCache(options.cache_entries),
+                         streaming=options.stream_parse,
+                         quiet=options.quiet)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    return os.EX_OK
+
+
+def client(argv=None):
+    options, template = get_client_options(sys.argv[2:] if argv is None else argv)
+    connection = Client(options.socket, options.host, options.port)
+    mode = "stream" if options.stream else None
+
+    if options.upload:
+        with open(template, "rb") as resource:
+            content = connection.render(body=resource.read(), mode=mode)
+    else:
+        content = connection.render(path=template, mode=mode)
+
+    with open(options.output, "wb") as resource:
+        resource.write(content)
+
+    return os.EX_OK
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""Write-only (streaming) rendering support.
+
+openpyxl write-only worksheets store rows in temporary files as soon as
+they are appended so memory consumption does not depend on the amount
+of cells in the workbook. The price is that rows have to be appended in
+order and everything which lives in the worksheet header (column widths,
+freeze panes) has to be set before the first row is written.
+
+Vanilla write-only worksheets of openpyxl 2.2 silently drop hyperlinks,
+that's why this module brings own worksheet and writer which take care
+of them.
+"""
+
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import openpyxl
+import openpyxl.cell
+import openpyxl.utils
+import openpyxl.worksheet.properties as properties
+import openpyxl.writer.dump_worksheet as dump_worksheet
+import openpyxl.writer.relations as relations
+import openpyxl.writer.worksheet as worksheet_writer
+import openpyxl.xml.constants as constants
+import openpyxl.xml.functions as functions
+import six
+
+# noinspection PyUnresolvedReferences
+from six.moves import range
+
+
+class StreamWorksheet(dump_worksheet.DumpWorksheet):
+    """Write-only worksheet which keeps hyperlinks."""
+
+    def __init__(self, parent_workbook, title):
+        super(StreamWorksheet, self).__init__(parent_workbook, title)
+
+        self._hyperlinks = []
+
+    def append(self, row):
+        row_idx = self._max_row + 1
+
+        for col_idx, cell in enumerate(row, 1):
+            if isinstance(cell, openpyxl.cell.Cell) and cell.hyperlink_rel_id is not None:
+                coordinate = "{0}{1}".format(openpyxl.utils.get_column_letter(col_idx), row_idx)
+                self._hyperlinks.append((coordinate, cell.hyperlink, cell.hyperlink_rel_id))
+
+        super(StreamWorksheet, self).append(row)
+
+    def _write_header(self):
+        with functions.xmlfile(self.filename) as xf:
+            with xf.element("worksheet", xmlns=constants.SHEET_MAIN_NS):
+                xf.write(properties.write_sheetPr(self.sheet_properties))
+
+                views = functions.Element("sheetViews")
+                views.append(self.sheet_view.to_tree())
+                xf.write(views)
+                xf.write(worksheet_writer.write_format(self))
+
+                cols = worksheet_writer.write_cols(self)
+                if cols is not None:
+                    xf.write(cols)
+
+                with xf.element("sheetData"):
+                    try:
+                        while True:
+                            xf.write((yield))
+                    except GeneratorExit:
+                        pass
+
+                if self.protection.sheet:
+                    xf.write(functions.Element("sheetProtection", dict(self.protection)))
+
+                autofilter = worksheet_writer.write_autofilter(self)
+                if autofilter is not None:
+                    xf.write(autofilter)
+
+                validation = worksheet_writer.write_datavalidation(self)
+                if validation is not None:
+                    xf.write(validation)
+
+                if self._hyperlinks:
+                    xf.write(self.write_hyperlinks())
+
+                if self._comments:
+                    xf.write(functions.Element("legacyDrawing", {"{%s}id" % constants.REL_NS: "commentsvml"}))
+
+    def write_hyperlinks(self):
+        element = functions.Element("hyperlinks")
+
+        for coordinate, display, rel_id in self._hyperlinks:
+            element.append(functions.Element("hyperlink", {"display": display,
+                                                           "ref": coordinate,
+                                                           "{%s}id" % constants.REL_NS: rel_id}))
+
+        return element
+
+
+class StreamWriter(dump_worksheet.ExcelDumpWriter):
+    """Writer which stores relations for hyperlinks as well as comments."""
+
+    def _write_worksheets(self, archive):
+        comments_id = 1
+
+        for idx, sheet in enumerate(self.workbook.worksheets, 1):
+            sheet.close()
+            archive.write(sheet.filename, constants.PACKAGE_WORKSHEETS + "/sheet%d.xml" % idx)
+            sheet._cleanup()
+
+            if sheet._comments or sheet.relationships:
+                rels = relations.write_rels(sheet, 1, comments_id, None)
+                archive.writestr(constants.PACKAGE_WORKSHEETS + "/_rels/sheet%d.xml.rels" % idx,
+                                 functions.tostring(rels))
+
+            if sheet._comments:
+                writer = dump_worksheet.DumpCommentWriter(sheet)
+                archive.writestr(constants.PACKAGE_XL + "/comments%d.xml" % comments_id, writer.write_comments())
+                archive.writestr(constants.PACKAGE_XL + "/drawings/commentsDrawing%d.vml" % comments_id,
+                                 writer.write_comments_vml())
+                comments_id += 1
+
+
+class StreamWorkbook(openpyxl.Workbook):
+
+    _optimized_worksheet_class = StreamWorksheet
+
+    def __init__(self, *args, **kwargs):
+        kwargs["write_only"] = True
+        super(StreamWorkbook, self).__init__(*args, **kwargs)
+
+    def save(self, filename):
+        if not self.worksheets:
+            self.create_sheet()
+
+        StreamWriter(self).save(filename)
+
+
+class RowBuffer(object):
+    """Buffer of rows which are not written into write-only worksheet yet.
+
+    Mimics cell() method of ordinary worksheet so elements and stylers
+    may work with buffer as they do with worksheet. Rows are written
+    only on flush() and in order. Gaps between rows are written as empty
+    rows. until is the first row which elements rendered later may touch,
+    flush_before() never writes it.
+    """
+
+    def __init__(self, worksheet, metrics=None):
+        self.worksheet = worksheet
+        self.metrics = metrics
+        self.rows = {}
+        self.until = None
+
+    @property
+    def parent(self):
+        return self.worksheet.parent
+
+    def cell(self, row, column):
+        if row <= self.worksheet._max_row:
+            raise ValueError("Row {0} is already written to worksheet {1}".format(row, self.worksheet.title))
+
+        row_cells = self.rows.setdefault(row, {})
+        cell = row_cells.get(column)
+        if cell is None:
+            cell = row_cells[column] = dump_worksheet.WriteOnlyCell(self.worksheet)
+
+        return cell
+
+    def find_cell(self, row, column):
+        row_cells = self.rows.get(row)
+        return row_cells.get(column) if row_cells is not None else None
+
+    def flush(self, until=None):
+        """Writes all buffered rows which index is less than until."""
+
+        if self.metrics is None:
+            return self.write(until)
+
+        with self.metrics.phase("write"):
+            return self.write(until)
+
+    def write(self, until):
+        row_indexes = sorted(six.iterkeys(self.rows))
+        if until is not None:
+            row_indexes = [idx for idx in row_indexes if idx < until]
+
+        for row_idx in row_indexes:
+            row_cells = self.rows.pop(row_idx)
+            while self.worksheet._max_row < row_idx - 1:
+                self.worksheet.append([])
+            self.worksheet.append([row_cells.get(col_idx) for col_idx in range(1, max(row_cells) + 1)])
+
+    def flush_before(self, row_idx):
+        """Writes buffered rows above row_idx which nothing touches anymore."""
+
+        if self.until is not None:
+            row_idx = min(row_idx, self.until)
+        self.flush(row_idx)
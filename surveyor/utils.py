@@ -4,9 +4,35 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import datetime
+import re
+
 import six
 
 
+NUMBER_FIRST_CHARS = frozenset("+-.0123456789")
+"""Characters which text of int or float starts with."""
+
+INT_RE = re.compile(r"[-+]?[0-9]+\Z")
+"""Text which int() accepts."""
+
+FLOAT_RE = re.compile(r"[-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?\Z")
+"""Text of finite float which float() accepts."""
+
+SPECIAL_FLOATS = frozenset(("nan", "inf", "infinity"))
+"""Text of non-finite floats which float() accepts regardless of case and sign."""
+
+ISO_DATE_RE = re.compile(
+    r"([0-9]{4})-([0-9]{2})-([0-9]{2})(?:[T ]([0-9]{2}):([0-9]{2})(?::([0-9]{2})(?:\.([0-9]{1,6}))?)?)?\Z")
+"""ISO 8601 date or datetime without timezone."""
+
+DATE_CACHE_SIZE = 4096
+"""Amount of parsed date texts to keep, cache is cleared when it is full."""
+
+DATE_CACHE = {}
+"""Cache of parsed date texts, reports tend to repeat the same dates."""
+
+
 def strtobool(val):
     if not val:
         return False
@@ -21,15 +47,106 @@ def strtobool(val):
 
 
 def guess_text(text):
+    """Converts text into int, float, date or datetime if it looks so.
+
+    Text is classified by regular expressions, so plain text (the most
+    common case) does not cost raised exceptions.
+    """
+
     if text is None:
         return ""
 
     text = six.text_type(text).strip()
+    if text.isdecimal():
+        # Only decimal digits, int() accepts them all.
+        return int(text)
+    if not text:
+        return text
 
-    try:
+    if text[0] not in NUMBER_FIRST_CHARS:
+        return float(text) if text.lower() in SPECIAL_FLOATS else text
+
+    number = guess_number(text)
+    if number is not None:
+        return number
+    if text[4:5] == "-":
+        return guess_date(text)
+
+    return text
+
+
+def guess_number(text):
+    """Converts text which starts as a number into int or float, returns None if it is not a number."""
+
+    if INT_RE.match(text):
         return int(text)
+    if FLOAT_RE.match(text):
+        return float(text)
+    if text[1:].lower() in SPECIAL_FLOATS and text[0] in "+-":
+        return float(text)
+
+    return None
+
+
+def guess_date(text):
+    """Converts ISO text into date or datetime, returns text if it is not a date."""
+
+    try:
+        return DATE_CACHE[text]
+    except KeyError:
+        pass
+
+    value = parse_date(text)
+    if value is None:
+        value = text
+
+    if len(DATE_CACHE) >= DATE_CACHE_SIZE:
+        DATE_CACHE.clear()
+    DATE_CACHE[text] = value
+
+    return value
+
+
+def parse_date(text):
+    """Returns date or datetime of ISO text or None if text is not a date."""
+
+    match = ISO_DATE_RE.match(text)
+    if match is None:
+        return None
+
+    year, month, day, hour, minute, second, fraction = match.groups()
+    try:
+        if hour is None:
+            return datetime.date(int(year), int(month), int(day))
+        return datetime.datetime(int(year), int(month), int(day), int(hour), int(minute), int(second or 0),
+                                 int((fraction or "0").ljust(6, "0")))
     except ValueError:
-        try:
-            return float(text)
-        except ValueError:
-            return text
+        return None
+
+
+def text_to_str(text):
+    return "" if text is None else six.text_type(text).strip()
+
+
+def text_to_date(text):
+    value = guess_date(text_to_str(text))
+    if not isinstance(value, datetime.date):
+        raise ValueError(text)
+
+    return value
+
+
+TYPE_CONVERTERS = {
+    "auto": guess_text,
+    "str": text_to_str,
+    "int": lambda text: int(text_to_str(text)),
+    "float": lambda text: float(text_to_str(text)),
+    "date": text_to_date,
+}
+"""Converters of cell text by names of type hints."""
+
+
+def convert_text(text, type_name):
+    """Converts text by type hint, raises ValueError if text does not match it."""
+
+    return TYPE_CONVERTERS[type_name](text)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import unicode_literals
+
+import io
+import sys
+import threading
+import time
+
+import openpyxl
+import pytest
+
+if sys.version_info < (3, 5):
+    pytest.skip("Asyncio API requires Python 3.5", allow_module_level=True)
+
+import asyncio  # noqa
+import concurrent.futures  # noqa
+
+import surveyor  # noqa
+import surveyor.aio as aio  # noqa
+
+
+XML = """
+<workbook>
+    <sheet name="Async">
+        <table>
+            <tr>
+                <td font-bold="true">{{ value }}</td>
+                <td>text</td>
+            </tr>
+        </table>
+    </sheet>
+</workbook>
+""".strip()
+
+
+class AsyncWriter(object):
+    """Stream like asyncio.StreamWriter: write() buffers, drain() waits."""
+
+    def __init__(self):
+        self.writes = []
+        self.drains = 0
+
+    def write(self, data):
+        self.writes.append(data)
+
+    def drain(self):
+        self.drains += 1
+        return asyncio.sleep(0)
+
+    @property
+    def content(self):
+        return b"".join(self.writes)
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+    asyncio.set_event_loop(None)
+
+
+def make_reader(loop, content):
+    reader = asyncio.StreamReader(loop=loop)
+    reader.feed_data(content)
+    reader.feed_eof()
+
+    return reader
+
+
+def check_workbook(content, value=1):
+    sheet = openpyxl.load_workbook(io.BytesIO(content)).active
+
+    assert sheet.title == "Async"
+    assert sheet["A1"].value == value
+    assert sheet["A1"].font.bold
+    assert sheet["B1"].value == "text"
+
+
+@pytest.mark.parametrize("executor", ("thread", "process"))
+def test_render_stream_to_stream(loop, executor):
+    if executor == "thread":
+        executor = concurrent.futures.ThreadPoolExecutor(2)
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(2)
+    renderer = aio.Renderer(executor)
+    output = AsyncWriter()
+
+    with executor:
+        loop.run_until_complete(renderer.render(make_reader(loop, XML.encode("utf-8")), output, params={"value": 1}))
+
+    check_workbook(output.content)
+    assert output.drains == len(output.writes)
+
+
+def test_render_async_bytes(loop, tmpdir):
+    template = tmpdir.join("template.xml")
+    template.write(XML)
+    output = tmpdir.join("output.xlsx").strpath
+
+    content = loop.run_until_complete(surveyor.render_async(template.strpath, params={"value": 2}))
+    check_workbook(content, 2)
+
+    loop.run_until_complete(surveyor.render_async(XML.encode("utf-8"), output, params={"value": 3}))
+    with open(output, "rb") as resource:
+        check_workbook(resource.read(), 3)
+
+
+def test_render_concurrency(loop, monkeypatch):
+    lock = threading.Lock()
+    state = {"active": 0, "max": 0}
+    render = surveyor.render
+
+    def slow_render(*args, **kwargs):
+        with lock:
+            state["active"] += 1
+            state["max"] = max(state["max"], state["active"])
+        time.sleep(0.05)
+        try:
+            return render(*args, **kwargs)
+        finally:
+            with lock:
+                state["active"] -= 1
+
+    monkeypatch.setattr(surveyor, "render", slow_render)
+    renderer = aio.Renderer(concurrent.futures.ThreadPoolExecutor(8), concurrency=2)
+    renders = [renderer.render(XML.encode("utf-8"), params={"value": idx}) for idx in range(6)]
+
+    results = loop.run_until_complete(asyncio.gather(*renders))
+
+    assert state["max"] == 2
+    for idx, content in enumerate(results):
+        check_workbook(content, idx)
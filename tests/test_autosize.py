@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import unicode_literals
+
+import collections
+import random
+
+import openpyxl
+import pytest
+
+import surveyor.autosize as autosize
+import surveyor.parse as parse
+
+
+Value = collections.namedtuple("Value", ["value"])
+
+
+class CountingValue(object):
+
+    reads = 0
+
+    def __init__(self, value):
+        self._value = value
+
+    @property
+    def value(self):
+        CountingValue.reads += 1
+        return self._value
+
+
+# noinspection PyUnresolvedReferences
+@pytest.mark.parametrize("value, width", (
+    (None, 0),
+    ("", 0),
+    ("text", 4),
+    (12345, 5),
+    (1.5, 3),
+    ("=SUM(A1:A2)", 0),
+))
+def test_get_value_width(value, width):
+    assert autosize.get_value_width(value) == width
+
+
+def test_column_widths():
+    widths = autosize.ColumnWidths(default_width=3, width_addition=1)
+    widths.add_row(2, [Value("a"), Value("abcde")])
+    widths.add_row(2, [Value("abcd")])
+
+    assert widths.get_width(2) == 5
+    assert widths.get_width(3) == 6
+    assert widths.get_width(10) == 4
+
+
+def test_sampled_widths_small_table_is_exact():
+    widths = autosize.SampledColumnWidths(sample_size=10, default_width=0, width_addition=0)
+    widths.add_row(1, [Value("header")], header=True)
+    for length in range(1, 10):
+        widths.add_row(1, [Value("x" * length)])
+
+    assert widths.get_width(1) == 9
+
+
+def test_sampled_widths_keeps_headers():
+    widths = autosize.SampledColumnWidths(sample_size=5, default_width=0, width_addition=0,
+                                          rnd=random.Random(0))
+    widths.add_row(1, [Value("long header value")], header=True)
+    for _ in range(1000):
+        widths.add_row(1, [Value("x")])
+
+    assert widths.get_width(1) == len("long header value")
+    assert len(widths.sample) == 5
+
+
+def test_sampled_widths_reads_only_sampled_rows():
+    CountingValue.reads = 0
+    widths = autosize.SampledColumnWidths(sample_size=10, rnd=random.Random(1))
+    for idx in range(100000):
+        widths.add_row(1, [CountingValue(idx)])
+
+    assert widths.rows_seen == 100000
+    # Expected amount of replacements is k * ln(n / k) ~ 92
+    assert 10 < CountingValue.reads < 300
+
+
+def test_sampled_widths_sample_is_uniform():
+    picked = collections.Counter()
+    for seed in range(300):
+        widths = autosize.SampledColumnWidths(sample_size=5, rnd=random.Random(seed))
+        for idx in range(100):
+            widths.add_row(1, [Value("x" * (idx + 1))])
+        for row_widths in widths.sample:
+            picked[row_widths[1] > 50] += 1
+
+    # both halves of rows get into sample evenly
+    assert abs(picked[True] - picked[False]) < 0.2 * sum(picked.values())
+
+
+def test_sample_attribute():
+    xml = """
+    <workbook>
+        <sheet autosize="sample" autosize-sample="2">
+            <table>
+                <tr>
+                    <td>Header</td>
+                </tr>
+                <tr>
+                    <td>1</td>
+                </tr>
+                <tr>
+                    <td>Longer than header</td>
+                </tr>
+            </table>
+        </sheet>
+        <sheet autosize="sample" />
+    </workbook>
+    """
+
+    parsed = parse.parse_fileobj(xml)
+    assert parsed.children[0].autosize == "sample"
+    assert parsed.children[0].autosize_sample == 2
+    assert parsed.children[1].autosize_sample == autosize.DEFAULT_SAMPLE_SIZE
+
+    sheet = parsed.process().worksheets[0]
+    assert sheet.column_dimensions["A"].width == len("Longer than header") + 1
+
+
+@pytest.mark.parametrize("mode", ("default", "stream"))
+def test_autosize_substitutes_params(mode, tmpdir):
+    xml = """
+    <workbook>
+        <sheet autosize="true">
+            <table>
+                <tr>
+                    <td>{{ customer }}</td>
+                </tr>
+            </table>
+        </sheet>
+    </workbook>
+    """
+    customer = "Very long name of the customer company"
+    path = tmpdir.join("output.xlsx").strpath
+
+    parse.parse_fileobj(xml).process(mode=mode, params={"customer": customer}).save(path)
+    sheet = openpyxl.load_workbook(path).active
+
+    assert sheet.column_dimensions["A"].width == len(customer) + 1
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import unicode_literals
+
+import os
+import os.path
+
+import openpyxl
+import pytest
+
+import surveyor
+import surveyor.batch as batch
+import surveyor.exceptions as exceptions
+
+
+TEMPLATE_XML = """
+<workbook>
+    <sheet>
+        <table>
+            <tr>
+                <td>{0}</td>
+            </tr>
+        </table>
+    </sheet>
+</workbook>
+"""
+
+
+def write_template(tmpdir, name, value):
+    path = tmpdir.join(name).strpath
+    with open(path, "wt") as resource:
+        resource.write(TEMPLATE_XML.format(value))
+
+    return path
+
+
+def test_read_manifest(tmpdir):
+    manifest = tmpdir.join("manifest.txt")
+    manifest.write("# comment\n\nfirst.xml first.xlsx\n  /abs/second.xml\tout/second.xlsx  \n")
+
+    jobs = batch.read_manifest(manifest.strpath)
+
+    assert jobs == [
+        batch.Job(tmpdir.join("first.xml").strpath, tmpdir.join("first.xlsx").strpath),
+        batch.Job("/abs/second.xml", tmpdir.join("out", "second.xlsx").strpath)]
+
+
+def test_read_broken_manifest(tmpdir):
+    manifest = tmpdir.join("manifest.txt")
+    manifest.write("first.xml\n")
+
+    with pytest.raises(exceptions.ManifestError):
+        batch.read_manifest(manifest.strpath)
+
+
+def test_make_jobs():
+    assert batch.make_jobs(["/templates/report.xml", "summary"], "/out") == [
+        batch.Job("/templates/report.xml", "/out/report.xlsx"),
+        batch.Job("summary", "/out/summary.xlsx")]
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_run_reports_failures(tmpdir, workers):
+    jobs = batch.make_jobs(
+        [write_template(tmpdir, "first.xml", "first"),
+         write_template(tmpdir, "broken.xml", "<broken>"),
+         tmpdir.join("missing.xml").strpath,
+         write_template(tmpdir, "last.xml", "last")],
+        tmpdir.strpath)
+
+    results = list(batch.run(jobs, workers))
+
+    assert [result.job for result in results] == jobs
+    assert [result.error is None for result in results] == [True, False, False, True]
+    assert openpyxl.load_workbook(jobs[0].output).active["A1"].value == "first"
+    assert openpyxl.load_workbook(jobs[3].output).active["A1"].value == "last"
+    assert not os.path.exists(jobs[1].output)
+
+
+def test_main_batch(tmpdir, monkeypatch, capsys):
+    first = write_template(tmpdir, "first.xml", "first")
+    broken = write_template(tmpdir, "broken.xml", "<broken>")
+    manifest = tmpdir.join("manifest.txt")
+    manifest.write("first.xml from_manifest.xlsx\n")
+    output_dir = tmpdir.mkdir("output")
+
+    monkeypatch.setattr("sys.argv", ["surveyor", "--output-dir", output_dir.strpath,
+                                     "--manifest", manifest.strpath, first, broken])
+
+    assert surveyor.main() == os.EX_DATAERR
+    assert output_dir.join("first.xlsx").check()
+    assert tmpdir.join("from_manifest.xlsx").check()
+    assert not output_dir.join("broken.xlsx").check()
+    assert "Cannot render {0}".format(broken) in capsys.readouterr()[1]
+
+
+def test_main_data(tmpdir, monkeypatch):
+    template = tmpdir.join("template.xml")
+    template.write('<workbook><sheet><table data="rows">'
+                   '<tr template="true"><td field="a" /></tr>'
+                   '</table></sheet></workbook>')
+    records = tmpdir.join("rows.jsonl")
+    records.write('{"a": "first"}\n{"a": "second"}\n')
+    output = tmpdir.join("output.xlsx")
+
+    monkeypatch.setattr("sys.argv", ["surveyor", "--data", "rows=" + records.strpath,
+                                     "-o", output.strpath, template.strpath])
+
+    assert surveyor.main() == os.EX_OK
+    assert openpyxl.load_workbook(output.strpath).active["A2"].value == "second"
+
+
+def test_make_jobs_rejects_duplicate_outputs():
+    with pytest.raises(exceptions.DuplicateOutputError) as excinfo:
+        batch.make_jobs(["/a/report.xml", "/b/report.xml"], "/out")
+
+    assert "/a/report.xml" in str(excinfo.value)
+    assert "/b/report.xml" in str(excinfo.value)
+
+
+def test_read_manifest_rejects_duplicate_outputs(tmpdir):
+    manifest = tmpdir.join("manifest.txt")
+    manifest.write("a/report.xml report.xlsx\nb/report.xml ./report.xlsx\n")
+
+    with pytest.raises(exceptions.DuplicateOutputError):
+        batch.read_manifest(manifest.strpath)
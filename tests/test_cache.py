@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import unicode_literals
+
+import os
+import os.path
+import pickle
+import threading
+
+import mock
+import openpyxl.styles
+import pytest
+import six
+
+import surveyor.cache as cache
+import surveyor.metrics as metrics
+import surveyor.parse as parse
+
+
+XML = """
+<workbook>
+    <sheet name="Cached">
+        <table startcell="B2">
+            <tr>
+                <td font-bold="true" comment="comment">1</td>
+                <td>text</td>
+            </tr>
+        </table>
+    </sheet>
+</workbook>
+""".strip()
+
+
+def make_template(tmpdir, content=XML, name="template.xml"):
+    template = tmpdir.join(name)
+    template.write(content)
+
+    return template.strpath
+
+
+def test_cache_miss_then_hit(tmpdir):
+    template_cache = cache.TemplateCache(tmpdir.join("cache").strpath)
+    template = make_template(tmpdir)
+
+    parsed = parse.parse_filename(template, cache=template_cache)
+    assert len(os.listdir(template_cache.directory)) == 1
+
+    with mock.patch.object(parse, "parse_fileobj") as parse_fileobj:
+        cached = parse.parse_filename(template, cache=template_cache)
+        assert not parse_fileobj.called
+
+    assert cached.classes is parsed.classes
+    assert cached.children[0].name == "Cached"
+    assert cached.children[0].parent is cached
+
+    cell = cached.children[0].children[0].children[0].children[0]
+    assert cell.value == 1
+    assert cell.comment.text == "comment"
+    assert cell.styles_by_prefix == {"font": {"bold": "true"}}
+
+    workbook = cached.process()
+    assert workbook.worksheets[0].cell(row=2, column=3).value == "text"
+
+
+def test_cache_key_depends_on_content(tmpdir):
+    template_cache = cache.TemplateCache(tmpdir.join("cache").strpath)
+    first = make_template(tmpdir, name="first.xml")
+    second = make_template(tmpdir, XML.replace("Cached", "Other"), name="second.xml")
+    same = make_template(tmpdir, name="same.xml")
+
+    assert template_cache.make_key_filename(first) != template_cache.make_key_filename(second)
+    assert template_cache.make_key_filename(first) == template_cache.make_key_filename(same)
+
+
+def test_cache_key_depends_on_version(tmpdir):
+    template_cache = cache.TemplateCache(tmpdir.join("cache").strpath)
+    template = make_template(tmpdir)
+    key = template_cache.make_key_filename(template)
+
+    with mock.patch("surveyor.__version__", (100, 0, 0)):
+        assert template_cache.make_key_filename(template) != key
+    with mock.patch.object(cache, "CACHE_FORMAT", cache.CACHE_FORMAT + 1):
+        assert template_cache.make_key_filename(template) != key
+
+
+def test_cache_broken_entry(tmpdir):
+    template_cache = cache.TemplateCache(tmpdir.join("cache").strpath)
+    template = make_template(tmpdir)
+    parse.parse_filename(template, cache=template_cache)
+
+    key = template_cache.make_key_filename(template)
+    with open(template_cache.get_path(key), "wb") as resource:
+        resource.write(b"garbage")
+
+    assert template_cache.get(key) is None
+    assert not os.path.exists(template_cache.get_path(key))
+    assert parse.parse_filename(template, cache=template_cache).children[0].name == "Cached"
+
+
+class Unpicklable(object):
+
+    def __reduce__(self):
+        raise ValueError("cannot pickle")
+
+
+def test_cache_put_failure_removes_temporary_file(tmpdir):
+    template_cache = cache.TemplateCache(tmpdir.join("cache").strpath)
+
+    with pytest.raises(ValueError):
+        template_cache.put("key", Unpicklable())
+
+    assert os.listdir(template_cache.directory) == []
+
+
+def test_cache_lru_eviction(tmpdir):
+    template_cache = cache.TemplateCache(tmpdir.join("cache").strpath)
+    templates = [make_template(tmpdir, XML.replace("Cached", "Sheet{0}".format(idx)), "{0}.xml".format(idx))
+                 for idx in range(3)]
+    keys = [template_cache.make_key_filename(template) for template in templates]
+
+    parse.parse_filename(templates[0], cache=template_cache)
+    parse.parse_filename(templates[1], cache=template_cache)
+    os.utime(template_cache.get_path(keys[0]), (1, 1))
+    os.utime(template_cache.get_path(keys[1]), (2, 2))
+    assert template_cache.get(keys[0]) is not None  # touches first entry
+
+    template_cache.max_size = 2 * os.path.getsize(template_cache.get_path(keys[0]))
+    parse.parse_filename(templates[2], cache=template_cache)
+
+    assert os.path.exists(template_cache.get_path(keys[0]))
+    assert not os.path.exists(template_cache.get_path(keys[1]))
+    assert os.path.exists(template_cache.get_path(keys[2]))
+
+
+def test_style_cache_hits_and_misses():
+    style_cache = cache.StyleCache()
+    kwargs = (("bold", "true"), ("sz", "12"))
+
+    first = style_cache.get(openpyxl.styles.Font, kwargs)
+    second = style_cache.get(openpyxl.styles.Font, kwargs)
+    other = style_cache.get(openpyxl.styles.Alignment, (("horizontal", "center"),))
+
+    assert first is second
+    assert first.bold
+    assert other.horizontal == "center"
+    assert style_cache.hits == 1
+    assert style_cache.misses == 2
+
+
+def test_style_cache_bounded():
+    style_cache = cache.StyleCache(max_size=2)
+
+    first = style_cache.get(openpyxl.styles.Font, (("sz", "1"), ))
+    style_cache.get(openpyxl.styles.Font, (("sz", "2"), ))
+    style_cache.get(openpyxl.styles.Font, (("sz", "1"), ))
+    style_cache.get(openpyxl.styles.Font, (("sz", "3"), ))
+
+    assert len(style_cache) == 2
+    assert style_cache.get(openpyxl.styles.Font, (("sz", "1"), )) is first
+    assert style_cache.misses == 3
+
+
+def test_style_cache_shared_between_cells():
+    xml = """
+    <workbook>
+        <sheet>
+            <table>
+                <tr>
+                    <td font-bold="true" border-top="thin, ff0000">1</td>
+                    <td border-top="thin, ff0000" font-bold="true">2</td>
+                    <td font-bold="false">3</td>
+                </tr>
+            </table>
+        </sheet>
+    </workbook>
+    """.strip()
+
+    parsed = parse.parse_fileobj(xml)
+    measured = metrics.Metrics()
+    workbook = parsed.process(metrics=measured)
+    sheet = workbook.worksheets[0]
+
+    assert sheet.cell(row=1, column=1).font.bold
+    assert sheet.cell(row=1, column=2).border.top.style == "thin"
+    assert not sheet.cell(row=1, column=3).font.bold
+    assert measured.get_totals()[1]["styles_built"] == 3
+    assert measured.get_totals()[1]["style_cache_hits"] == 2
+
+
+def test_parse_fileobj_cache():
+    template_cache = cache.MemoryTemplateCache()
+    collected = metrics.Metrics()
+
+    parsed = parse.parse_fileobj(XML, cache=template_cache, metrics=collected)
+    assert parse.parse_fileobj(six.BytesIO(XML.encode("utf-8")), cache=template_cache, metrics=collected) is parsed
+    assert parse.parse_fileobj(XML.encode("utf-8"), streaming=True, cache=template_cache) is parsed
+
+    assert len(template_cache) == 1
+    assert collected.counters["template_cache_hits"] == 1
+    assert parsed.children[0].name == "Cached"
+
+
+def test_memory_cache_shared_by_threads():
+    template_cache = cache.MemoryTemplateCache(max_entries=4)
+
+    def put(idx):
+        for num in range(200):
+            template_cache.put((idx, num), num)
+            template_cache.get((idx, num - 1))
+
+    threads = [threading.Thread(target=put, args=(idx,)) for idx in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(template_cache) == 4
+
+    restored = pickle.loads(pickle.dumps(template_cache))
+    restored.put("key", 1)
+    assert len(restored) == 4
+
+
+def test_base_template_cache_is_abstract():
+    with pytest.raises(TypeError):
+        cache.BaseTemplateCache()
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import unicode_literals
+
+import sys
+
+import openpyxl
+import openpyxl.styles
+import pytest
+
+import surveyor.classes._base as base
+import surveyor.metrics
+import surveyor.native as native
+import surveyor.parse as parse
+import surveyor.stream as stream
+
+
+BOLD = openpyxl.styles.Font(bold=True)
+FILL = openpyxl.styles.PatternFill(fill_type="solid", start_color="FFFF0000")
+
+
+def make_sheet():
+    sheet = openpyxl.Workbook().active
+    for row_idx in range(2, 5):
+        for col_idx in range(2, 4):
+            sheet.cell(row=row_idx, column=col_idx).value = row_idx * col_idx
+    # Short row of table.
+    sheet.cell(row=5, column=2).value = 10
+
+    return sheet
+
+
+def test_table_iter_exact_bounds():
+    sheet = make_sheet()
+    rows = list(base.TableStyle(sheet, 2, 6, 2, 4))
+
+    assert len(rows) == 4
+    assert [len(row) for row in rows] == [2, 2, 2, 2]
+    assert rows[0][0].coordinate == "B2"
+    assert rows[-1][-1].coordinate == "C5"
+
+
+def test_table_style_range():
+    sheet = make_sheet()
+    cells = len(sheet._cells)
+    style = base.TableStyle(sheet, 2, 6, 2, 4)
+
+    assert style.style_table(fill=FILL) == 7
+    assert style.style_header(font=BOLD) == 2
+    assert style.style_column(-1, number_format="0.00") == 3
+    assert style.style_row(-1, font=BOLD) == 1
+    assert len(sheet._cells) == cells
+
+    assert sheet["B2"].font.bold and sheet["C2"].font.bold and sheet["B5"].font.bold
+    assert not sheet["B3"].font.bold
+    assert sheet["C3"].number_format == "0.00"
+    assert sheet["B3"].number_format == "General"
+    assert sheet["C4"].fill.start_color.rgb == "FFFF0000"
+    assert sheet["A1"].fill.fill_type is None
+
+
+def test_table_style_header_band():
+    style = base.TableStyle(make_sheet(), 2, 6, 2, 4)
+
+    assert style.style_header(rows=2, font=BOLD) == 4
+    assert style.style_header(rows=10, font=BOLD) == 7
+
+
+@pytest.mark.parametrize("method, idx", (
+    ("style_row", 4), ("style_row", -5), ("style_column", 2), ("style_column", -3)))
+def test_table_style_out_of_bounds(method, idx):
+    sheet = make_sheet()
+    sheet.cell(row=6, column=2).value = "below"
+    sheet.cell(row=2, column=1).value = "left"
+    style = base.TableStyle(sheet, 2, 6, 2, 4)
+
+    with pytest.raises(IndexError):
+        getattr(style, method)(idx, font=BOLD)
+
+    assert style.style_row(-4, font=BOLD) == 2
+    assert style.style_column(-2, font=BOLD) == 4
+    assert not sheet["B6"].font.bold
+    assert not sheet["A2"].font.bold
+
+
+def test_sheet_style_range():
+    sheet = make_sheet()
+    style = base.SheetStyle(sheet)
+
+    assert style.style_row(3, font=BOLD) == 2
+    assert style.style_column(2, font=BOLD) == 4
+    assert style.style_range(1, 3, 1, 10, fill=FILL) == 2
+    assert style.style_row(100, font=BOLD) == 0
+
+
+def test_style_unknown_attribute():
+    with pytest.raises(TypeError):
+        base.SheetStyle(make_sheet()).style_row(2, bold=True)
+
+
+def test_style_range_backends():
+    book = native.NativeWorkbook()
+    sheet = book.create_sheet()
+    sheet.cell(row=1, column=1).value = 1
+    sheet.cell(row=2, column=2).value = 2
+
+    assert base.SheetStyle(sheet).style_range(1, 3, 1, 3, font=BOLD) == 2
+    assert sheet.cell(row=2, column=2).font is BOLD
+    assert sheet.find_cell(1, 2) is None
+
+    rows = stream.RowBuffer(openpyxl.Workbook(write_only=True).create_sheet())
+    rows.cell(row=1, column=2).value = 1
+
+    assert base.TableStyle(rows, 1, 3, 1, 3).style_table(font=BOLD) == 1
+    assert rows.find_cell(1, 1) is None
+
+
+STYLERS_MODULE = """
+from openpyxl.styles import Font
+
+from surveyor.classes._base import TableStyle
+
+
+HEADER = Font(bold=True)
+
+
+class Header(TableStyle):
+
+    def stylize(self):
+        self.style_header(font=HEADER)
+        self.style_column(1, number_format="0.00")
+"""
+
+
+@pytest.mark.parametrize("mode", ("default", "stream", "native"))
+def test_table_styler_range(mode, tmpdir, monkeypatch):
+    tmpdir.join("surveyor_range_stylers.py").write(STYLERS_MODULE)
+    monkeypatch.syspath_prepend(tmpdir.strpath)
+
+    xml = """
+    <workbook classes="surveyor_range_stylers">
+        <sheet>
+            <table class="Header" startcell="B2">
+                <tr><td>Name</td><td>Amount</td></tr>
+                <tr><td>first</td><td>1.5</td></tr>
+                <tr><td>second</td></tr>
+            </table>
+        </sheet>
+    </workbook>
+    """.strip()
+
+    path = tmpdir.join("result.xlsx").strpath
+    parse.parse_fileobj(xml).process(mode=mode).save(path)
+    sheet = openpyxl.load_workbook(path).active
+
+    assert sheet["B2"].font.bold and sheet["C2"].font.bold
+    assert not sheet["B3"].font.bold
+    assert sheet["C3"].number_format == "0.00"
+    assert sheet.max_row == 4
+    assert sheet.max_column == 3
+
+
+BATCHED_MODULE = """
+from openpyxl.styles import Font
+
+from surveyor.classes._base import CellStyle, RowStyle, TableStyle, SheetStyle
+
+
+CALLS = []
+
+
+class Bold(CellStyle):
+
+    @classmethod
+    def stylize_batch(cls, cells):
+        font = Font(bold=True)
+        CALLS.append(("cells", len(cells)))
+        for cell in cells:
+            cell.font = font
+
+
+class Italic(RowStyle):
+
+    @classmethod
+    def stylize_batch(cls, rows):
+        CALLS.append(("rows", len(rows)))
+        for row in rows:
+            for cell in row:
+                cell.font = cell.font.copy(italic=True)
+
+
+class Formatted(TableStyle):
+
+    @classmethod
+    def stylize_batch(cls, tables):
+        CALLS.append(("tables", len(tables)))
+        for sheet, top_row, bottom_row, left_column, right_column in tables:
+            cls(sheet, top_row, bottom_row, left_column, right_column).style_table(number_format="0.00")
+
+
+class Named(SheetStyle):
+
+    @classmethod
+    def stylize_batch(cls, sheets):
+        CALLS.append(("sheets", len(sheets)))
+
+
+class Plain(CellStyle):
+
+    def stylize(self):
+        CALLS.append(("cell", 1))
+"""
+
+BATCHED_XML = """
+<workbook classes="surveyor_batched_stylers">
+    <sheet class="Named">
+        <table class="Formatted">
+            <tr class="Italic"><td class="Bold">1</td><td class="Bold">2</td><td class="Plain">3</td></tr>
+            <tr class="Italic"><td class="Bold">4</td><td>5</td></tr>
+        </table>
+        <table class="Formatted" startcell="A5">
+            <tr><td class="Bold">6</td></tr>
+        </table>
+        <table class="Formatted" startcell="A7" data="records">
+            <tr template="true"><td class="Bold" field="id" /></tr>
+        </table>
+    </sheet>
+</workbook>
+""".strip()
+
+
+@pytest.fixture
+def batched_module(tmpdir, monkeypatch):
+    tmpdir.join("surveyor_batched_stylers.py").write(BATCHED_MODULE)
+    monkeypatch.syspath_prepend(tmpdir.strpath)
+    monkeypatch.delitem(sys.modules, "surveyor_batched_stylers", raising=False)
+
+    import surveyor_batched_stylers
+
+    return surveyor_batched_stylers
+
+
+def test_is_batched(batched_module):
+    assert base.is_batched(batched_module.Bold)
+    assert not base.is_batched(batched_module.Plain)
+    assert not base.is_noop(batched_module.Bold)
+    assert not base.is_noop(batched_module.Named)
+
+
+@pytest.mark.parametrize("mode", ("default", "stream", "native", "plan"))
+def test_batched_stylers(mode, batched_module, tmpdir):
+    template = parse.parse_fileobj(BATCHED_XML)
+    data = {"records": [{"id": idx} for idx in range(3)]}
+    if mode == "plan":
+        book = template.compile().render(data=data)
+    else:
+        book = template.process(mode=mode, data=data)
+
+    path = tmpdir.join("result.xlsx").strpath
+    book.save(path)
+    sheet = openpyxl.load_workbook(path).active
+
+    if mode == "stream":
+        # Rows of write-only worksheet are written after each table.
+        assert batched_module.CALLS == [
+            ("cell", 1), ("cells", 3), ("rows", 2), ("tables", 1),
+            ("cells", 1), ("tables", 1),
+            ("cells", 3), ("tables", 1),
+            ("sheets", 1)]
+    else:
+        assert batched_module.CALLS == [
+            ("cell", 1), ("cells", 3), ("rows", 2),
+            ("cells", 1),
+            ("cells", 3),
+            ("tables", 3),
+            ("sheets", 1)]
+    assert sheet["A1"].font.bold and sheet["A1"].font.italic
+    assert not sheet["B2"].font.bold and sheet["B2"].font.italic
+    assert sheet["A5"].font.bold and not sheet["A5"].font.italic
+    assert sheet["A9"].font.bold and sheet["A9"].value == 2
+    assert sheet["C1"].number_format == "0.00"
+    assert sheet["A9"].number_format == "0.00"
+
+
+def test_batched_stylers_stream_flush(batched_module, tmpdir, monkeypatch):
+    import surveyor.elements as elements
+
+    monkeypatch.setattr(elements, "STYLER_BATCH_SIZE", 4)
+    xml = """
+    <workbook classes="surveyor_batched_stylers">
+        <sheet>
+            <table data="records">
+                <tr template="true"><td class="Bold" field="id" /></tr>
+            </table>
+        </sheet>
+    </workbook>
+    """.strip()
+
+    path = tmpdir.join("result.xlsx").strpath
+    parse.parse_fileobj(xml).process(mode="stream", data={"records": [{"id": idx} for idx in range(10)]}).save(path)
+    sheet = openpyxl.load_workbook(path).active
+
+    assert batched_module.CALLS == [("cells", 4), ("cells", 4), ("cells", 2)]
+    assert all(sheet.cell(row=idx, column=1).font.bold for idx in range(1, 11))
+
+
+PRECEDENCE_MODULE = """
+from surveyor.classes._base import CellStyle, RowStyle
+
+
+class CellFormat(CellStyle):
+
+    def stylize(self):
+        self.cell.number_format = "cell"
+
+
+class BatchedCellFormat(CellStyle):
+
+    @classmethod
+    def stylize_batch(cls, cells):
+        for cell in cells:
+            cell.number_format = "cell"
+
+
+class RowFormat(RowStyle):
+
+    def stylize(self):
+        for cell in self.cells:
+            cell.number_format = "row"
+
+
+class BatchedRowFormat(RowStyle):
+
+    @classmethod
+    def stylize_batch(cls, rows):
+        for row in rows:
+            for cell in row:
+                cell.number_format = "row"
+"""
+
+
+@pytest.mark.parametrize("mode", ("default", "stream", "native", "plan", "measured"))
+@pytest.mark.parametrize("cell_class", ("CellFormat", "BatchedCellFormat"))
+@pytest.mark.parametrize("row_class", ("RowFormat", "BatchedRowFormat"))
+def test_batched_stylers_keep_precedence(mode, cell_class, row_class, tmpdir, monkeypatch):
+    tmpdir.join("surveyor_precedence_stylers.py").write(PRECEDENCE_MODULE)
+    monkeypatch.syspath_prepend(tmpdir.strpath)
+
+    # The first row has no cell stylers, so row batch is the first one.
+    xml = """
+    <workbook classes="surveyor_precedence_stylers">
+        <sheet>
+            <table>
+                <tr class="{row}"><td>1</td></tr>
+                <tr class="{row}"><td class="{cell}">2</td></tr>
+                <tr><td class="{cell}">3</td></tr>
+            </table>
+        </sheet>
+    </workbook>
+    """.format(row=row_class, cell=cell_class).strip()
+
+    template = parse.parse_fileobj(xml)
+    if mode == "plan":
+        book = template.compile().render()
+    elif mode == "measured":
+        book = template.process(metrics=surveyor.metrics.Metrics())
+    else:
+        book = template.process(mode=mode)
+
+    path = tmpdir.join("result.xlsx").strpath
+    book.save(path)
+    sheet = openpyxl.load_workbook(path).active
+
+    assert [sheet.cell(row=idx, column=1).number_format for idx in range(1, 4)] == ["row", "row", "cell"]
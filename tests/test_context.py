@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import unicode_literals
+
+import io
+import pickle
+import threading
+
+import openpyxl
+import pytest
+
+# noinspection PyUnresolvedReferences
+from six.moves import range
+
+import surveyor.context as context
+import surveyor.exceptions as exceptions
+import surveyor.metrics
+import surveyor.parse as parse
+
+
+XML = """
+<workbook>
+    <sheet name="{{ title }}" autosize="true" freeze-row="1">
+        <table>
+            <tr>
+                <td font-bold="true">{{ title }}</td>
+                <td comment="{{ title }}">Header</td>
+            </tr>
+        </table>
+        <table startcell="A3" data="records">
+            <tr template="true">
+                <td field="id" />
+                <td field="name" font-italic="true" />
+            </tr>
+        </table>
+    </sheet>
+    <sheet>
+        <table>
+            <tr><td>{{ title }}</td></tr>
+        </table>
+    </sheet>
+</workbook>
+""".strip()
+
+MODES = ("default", "stream", "native", "plan")
+
+THREADS = 8
+
+RENDERS_PER_THREAD = 6
+
+
+def render(template, mode, idx, metrics=None):
+    params = {"title": "Render {0}".format(idx)}
+    data = {"records": [{"id": num, "name": "name {0}".format(num)} for num in range(idx % 5 + 1)]}
+    if mode == "plan":
+        book = template.compile().render(data=data, params=params)
+    else:
+        book = template.process(mode=mode, data=data, params=params, metrics=metrics)
+
+    content = io.BytesIO()
+    book.save(content)
+
+    return read_book(content.getvalue())
+
+
+def read_book(content):
+    book = openpyxl.load_workbook(io.BytesIO(content))
+
+    return [
+        (sheet.title, [[cell.value for cell in row] for row in sheet.iter_rows()], sheet.freeze_panes)
+        for sheet in book.worksheets
+    ]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_concurrent_renders_of_shared_template(mode):
+    template = parse.parse_fileobj(XML)
+    snapshot = pickle.dumps(template)
+    expected = [render(template, mode, idx) for idx in range(THREADS * RENDERS_PER_THREAD)]
+
+    results = {}
+    errors = []
+    barrier = threading.Barrier(THREADS) if hasattr(threading, "Barrier") else None
+
+    def work(thread_idx):
+        if barrier is not None:
+            barrier.wait()
+        try:
+            for num in range(RENDERS_PER_THREAD):
+                idx = num * THREADS + thread_idx
+                results[idx] = render(template, mode, idx)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=work, args=(idx,)) for idx in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert [results[idx] for idx in range(len(expected))] == expected
+    assert expected[3][0][0] == "Render 3"
+    assert expected[3][1][0] == "Sheet2"
+    assert pickle.dumps(template) == snapshot
+
+
+def test_concurrent_metrics_are_separate():
+    template = parse.parse_fileobj(XML)
+    collected = [surveyor.metrics.Metrics() for _ in range(THREADS)]
+
+    threads = [
+        threading.Thread(target=render, args=(template, "default", idx, collected[idx]))
+        for idx in range(THREADS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for idx, metrics in enumerate(collected):
+        sheet = metrics.sheets["Render {0}".format(idx)]
+        assert sheet.counters["rows"] == idx % 5 + 2
+
+
+def test_nested_render_restores_context():
+    template = parse.parse_fileobj(XML)
+
+    with context.rendering(params={"title": "outer"}):
+        render(template, "default", 1)
+        assert context.get_context().params == {"title": "outer"}
+
+    assert context.get_context().params == {}
+
+
+def test_parsed_template_is_read_only():
+    template = parse.parse_fileobj(XML)
+    sheet = template.children[0]
+    table = sheet.children[0]
+
+    assert isinstance(template.children, tuple)
+    assert isinstance(table.children[0].children, tuple)
+
+    cell = table.children[0].children[0]
+
+    with pytest.raises(exceptions.FrozenTemplateError):
+        template.add(sheet)
+    with pytest.raises(exceptions.FrozenTemplateError):
+        table.add(table.children[0])
+    assert len(template.children) == 2
+    assert len(table.children) == 1
+
+    for element, name in ((template, "mode"), (sheet, "name"), (table, "start_cell"), (cell, "value"),
+                          (cell, "klass"), (cell, "parent")):
+        value = getattr(element, name)
+        with pytest.raises(exceptions.FrozenTemplateError):
+            setattr(element, name, "changed")
+        assert getattr(element, name) == value
+
+
+def test_unpickled_template_is_read_only():
+    template = pickle.loads(pickle.dumps(parse.parse_fileobj(XML)))
+    cell = template.children[0].children[0].children[0].children[0]
+
+    with pytest.raises(exceptions.FrozenTemplateError):
+        cell.value = "changed"
+    assert cell.parent.parent.parent.parent is template
+    assert render(template, "default", 2)[0][0] == "Render 2"
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import unicode_literals
+
+import io
+
+import pytest
+
+import surveyor.data as data
+
+
+def test_json_lines(tmpdir):
+    path = tmpdir.join("orders.jsonl")
+    path.write_text('{"id": 1, "name": "\\u0444"}\n\n[2, "b"]\n', "utf-8")
+
+    records = data.JSONLines(path.strpath)
+
+    assert list(records) == [{"id": 1, "name": "\u0444"}, [2, "b"]]
+    assert list(records) == list(records)
+
+
+def test_iter_json_lines():
+    assert list(data.iter_json_lines(io.StringIO("1\n  \n{}\n"))) == [1, {}]
+
+
+def test_parse_bindings():
+    bindings = data.parse_bindings(["orders=/tmp/orders.jsonl", "x==y"])
+
+    assert sorted(bindings) == ["orders", "x"]
+    assert bindings["orders"].filename == "/tmp/orders.jsonl"
+    assert bindings["x"].filename == "=y"
+
+
+@pytest.mark.parametrize("value", ("orders", "=orders.jsonl", "orders="))
+def test_parse_broken_bindings(value):
+    with pytest.raises(ValueError):
+        data.parse_bindings([value])
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import unicode_literals
+
+import sys
+import zipfile
+
+import openpyxl
+import pytest
+
+import surveyor
+import surveyor.cache as cache
+import surveyor.incremental as incremental
+import surveyor.metrics
+import surveyor.parse as parse
+
+
+XML = """
+<workbook{classes}>
+    <sheet name="First" autosize="true">
+        <table>
+            <tr>
+                <td font-bold="true" comment="comment">1</td>
+                <td hyperlink="http://example.org">{first}</td>
+            </tr>
+        </table>
+    </sheet>
+    <sheet name="Second">
+        <table startcell="B2">
+            <tr>
+                <td font-italic="true" number_format="0.00">2</td>
+                <td>{{{{ title }}}}</td>
+            </tr>
+        </table>
+    </sheet>
+    <sheet name="Third" />
+</workbook>
+"""
+
+
+def make_template(first="text", classes=""):
+    return parse.parse_fileobj(XML.format(first=first, classes=classes).strip())
+
+
+def read_package(path):
+    with zipfile.ZipFile(path) as archive:
+        # Core properties keep creation time.
+        return dict((name, archive.read(name)) for name in archive.namelist() if name != "docProps/core.xml")
+
+
+def render(template, part_cache, **kwargs):
+    metrics = surveyor.metrics.Metrics()
+    book = surveyor.render(template, part_cache=part_cache, metrics=metrics, **kwargs)
+    counters = metrics.get_totals()[1]
+
+    return book, counters.get("sheet_parts_rendered", 0), counters.get("sheet_parts_reused", 0)
+
+
+@pytest.mark.parametrize("mode", ("default", "stream"))
+def test_incremental_same_package(mode, tmpdir):
+    part_cache = cache.TemplateCache(tmpdir.join("cache").strpath)
+    serial_path = tmpdir.join("serial.xlsx").strpath
+    incremental_path = tmpdir.join("incremental.xlsx").strpath
+
+    make_template().process(mode=mode, params={"title": "Title"}).save(serial_path)
+    render(make_template(), part_cache, mode=mode, params={"title": "Title"})
+    book, rendered, reused = render(make_template(), part_cache, mode=mode, params={"title": "Title"})
+    book.save(incremental_path)
+
+    assert (rendered, reused) == (0, 3)
+
+    serial = read_package(serial_path)
+    result = read_package(incremental_path)
+    assert sorted(result) == sorted(serial)
+    for name in serial:
+        if mode == "default" or name.startswith("xl/worksheets/"):
+            assert result[name] == serial[name], name
+
+    result = openpyxl.load_workbook(incremental_path)
+    assert result.get_sheet_names() == ["First", "Second", "Third"]
+    assert result.worksheets[0].cell(row=1, column=1).comment.text == "comment"
+    assert result.worksheets[1].cell(row=2, column=3).value == "Title"
+
+
+def test_incremental_renders_changed_sheets():
+    part_cache = cache.MemoryTemplateCache()
+
+    _, rendered, reused = render(make_template(), part_cache, params={"title": "Title"})
+    assert (rendered, reused) == (3, 0)
+
+    book, rendered, reused = render(make_template(first="changed"), part_cache, params={"title": "Title"})
+    assert (rendered, reused) == (1, 2)
+    assert len(part_cache) == 4
+
+    book, rendered, reused = render(make_template(first="changed"), part_cache, params={"title": "Other"})
+    assert (rendered, reused) == (1, 2)
+
+    book, rendered, reused = render(make_template(first="changed"), part_cache, params={"title": "Title"},
+                                    mode="stream")
+    assert (rendered, reused) == (3, 0)
+
+
+def test_incremental_classes_module(tmpdir, monkeypatch):
+    module = tmpdir.join("surveyor_incremental_classes.py")
+    module.write("from surveyor.classes.simple import *\n")
+    monkeypatch.syspath_prepend(tmpdir.strpath)
+    monkeypatch.delitem(sys.modules, "surveyor_incremental_classes", raising=False)
+
+    part_cache = cache.MemoryTemplateCache()
+    template = make_template(classes=' classes="surveyor_incremental_classes"')
+
+    assert render(template, part_cache, params={"title": "Title"})[1:] == (3, 0)
+    assert render(template, part_cache, params={"title": "Title"})[1:] == (0, 3)
+
+    module.write("from surveyor.classes.simple import *\n\nCHANGED = True\n")
+    assert render(template, part_cache, params={"title": "Title"})[1:] == (3, 0)
+
+
+def test_incremental_data_is_not_cached():
+    xml = """
+    <workbook>
+        <sheet name="Static">
+            <table><tr><td>static</td></tr></table>
+        </sheet>
+        <sheet name="Bound">
+            <table data="records">
+                <tr><td>Id</td></tr>
+                <tr template="true"><td field="id" /></tr>
+            </table>
+        </sheet>
+    </workbook>
+    """.strip()
+
+    part_cache = cache.MemoryTemplateCache()
+    template = parse.parse_fileobj(xml)
+
+    assert render(template, part_cache, data={"records": [{"id": 1}]})[1:] == (2, 0)
+    book, rendered, reused = render(template, part_cache, data={"records": [{"id": 1}, {"id": 2}]})
+    assert (rendered, reused) == (1, 1)
+    assert len(part_cache) == 1
+
+
+def test_hash_sheet():
+    first = make_template().children
+    second = make_template(first="changed").children
+
+    assert incremental.hash_sheet(first[0]) != incremental.hash_sheet(second[0])
+    assert incremental.hash_sheet(first[1]) == incremental.hash_sheet(second[1])
+    assert incremental.hash_sheet(first[1])[1] == {"title"}
+    assert incremental.hash_sheet(first[2])[1] == set()
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import unicode_literals
+
+import json
+import os
+
+import pytest
+
+import surveyor
+import surveyor.metrics as metrics
+import surveyor.parse as parse
+
+
+TEMPLATE_XML = """
+<workbook>
+    <sheet name="First" autosize="true">
+        <table>
+            <tr>
+                <td font-bold="true">1</td>
+                <td font-bold="true">2</td>
+            </tr>
+            <tr>
+                <td>3</td>
+                <td>4</td>
+            </tr>
+        </table>
+    </sheet>
+    <sheet name="Second">
+        <table>
+            <tr>
+                <td>5</td>
+            </tr>
+        </table>
+    </sheet>
+</workbook>
+"""
+
+
+def test_totals_include_sheets():
+    measured = metrics.Metrics()
+    measured.count("cells", 2)
+    measured.add_time("parse", 1.0)
+    measured.sheet("First").count("cells", 3)
+    measured.sheet("First").add_time("collect", 0.5)
+
+    assert measured.get_totals() == ({"parse": 1.0, "collect": 0.5}, {"cells": 5})
+    assert list(measured.to_dict()["sheets"]) == ["First"]
+
+
+@pytest.mark.parametrize("mode", ("default", "stream"))
+def test_process_counters(mode, tmpdir):
+    measured = metrics.Metrics()
+
+    parsed = parse.parse_fileobj(TEMPLATE_XML, metrics=measured)
+    workbook = parsed.process(mode=mode, metrics=measured)
+    workbook.save(tmpdir.join("output.xlsx").strpath)
+
+    times, counters = measured.get_totals()
+    assert counters["cells"] == 5
+    assert counters["rows"] == 3
+    assert counters["styles_built"] == 1
+    assert counters["style_cache_hits"] == 1
+    assert list(measured.sheets) == ["First", "Second"]
+    assert measured.sheets["Second"].counters["cells"] == 1
+    assert {"parse", "collect", "inline_styles", "autosize"} <= set(times)
+
+
+STYLERS_MODULE = """
+from surveyor.classes._base import CellStyle, RowStyle
+
+
+class Bold(CellStyle):
+
+    def stylize(self):
+        self.cell.font = self.cell.font.copy(bold=True)
+
+
+class Coordinates(RowStyle):
+
+    def stylize(self):
+        pass
+
+
+class BatchBold(CellStyle):
+
+    @classmethod
+    def stylize_batch(cls, cells):
+        for cell in cells:
+            cell.font = cell.font.copy(bold=True)
+"""
+
+
+def test_stylers_counted(tmpdir, monkeypatch):
+    tmpdir.join("surveyor_metrics_stylers.py").write(STYLERS_MODULE)
+    monkeypatch.syspath_prepend(tmpdir.strpath)
+    xml = """
+    <workbook classes="surveyor_metrics_stylers">
+        <sheet>
+            <table>
+                <tr class="Coordinates">
+                    <td class="Bold">1</td>
+                    <td>2</td>
+                </tr>
+            </table>
+        </sheet>
+    </workbook>
+    """
+    measured = metrics.Metrics()
+
+    parse.parse_fileobj(xml).process(metrics=measured)
+
+    assert measured.get_totals()[1]["stylers"] == 2
+    assert "stylers" in measured.get_totals()[0]
+
+
+def test_main_metrics(tmpdir, monkeypatch, capsys):
+    template = tmpdir.join("template.xml")
+    template.write(TEMPLATE_XML)
+    dump = tmpdir.join("metrics.json")
+
+    monkeypatch.setattr("sys.argv", ["surveyor", "-o", tmpdir.join("output.xlsx").strpath,
+                                     "--metrics", "--metrics-json", dump.strpath, template.strpath])
+
+    assert surveyor.main() == os.EX_OK
+    assert "sheet First" in capsys.readouterr()[1]
+
+    dumped = json.loads(dump.read())
+    assert dumped["counters"]["cells"] == 5
+    assert {"parse", "save"} <= set(dumped["times"])
+
+
+def test_styler_costs(tmpdir, monkeypatch):
+    tmpdir.join("surveyor_metrics_stylers.py").write(STYLERS_MODULE)
+    monkeypatch.syspath_prepend(tmpdir.strpath)
+    xml = """
+    <workbook classes="surveyor_metrics_stylers">
+        <sheet name="First">
+            <table>
+                <tr><td class="Bold">1</td><td class="Bold">2</td></tr>
+            </table>
+        </sheet>
+        <sheet name="Second">
+            <table>
+                <tr class="Coordinates"><td class="Bold">3</td></tr>
+            </table>
+        </sheet>
+    </workbook>
+    """
+    measured = metrics.Metrics(styler_costs=True)
+
+    parse.parse_fileobj(xml).process(metrics=measured)
+
+    costs = measured.get_styler_costs()
+    assert sorted(costs) == ["Bold", "Coordinates"]
+    assert costs["Bold"].calls == 3
+    assert costs["Coordinates"].calls == 1
+    assert measured.to_dict()["styler_costs"]["Bold"]["calls"] == 3
+    assert "Bold" in measured.format_styler_costs()
+
+
+def test_batched_styler_costs(tmpdir, monkeypatch):
+    tmpdir.join("surveyor_metrics_stylers.py").write(STYLERS_MODULE)
+    monkeypatch.syspath_prepend(tmpdir.strpath)
+    xml = """
+    <workbook classes="surveyor_metrics_stylers">
+        <sheet>
+            <table>
+                <tr><td class="BatchBold">1</td><td class="BatchBold">2</td></tr>
+            </table>
+            <table startcell="A3">
+                <tr><td class="BatchBold">3</td></tr>
+            </table>
+        </sheet>
+    </workbook>
+    """
+    measured = metrics.Metrics(styler_costs=True)
+
+    parse.parse_fileobj(xml).process(metrics=measured)
+
+    assert measured.get_totals()[1]["stylers"] == 3
+    assert measured.get_styler_costs()["BatchBold"].calls == 2
+
+
+def test_main_styler_costs(tmpdir, monkeypatch, capsys):
+    template = tmpdir.join("template.xml")
+    template.write(TEMPLATE_XML)
+
+    monkeypatch.setattr("sys.argv", ["surveyor", "-o", tmpdir.join("output.xlsx").strpath,
+                                     "--styler-costs", template.strpath])
+
+    assert surveyor.main() == os.EX_OK
+    assert "styler" in capsys.readouterr()[1]
+    assert metrics.tracemalloc is None or not metrics.tracemalloc.is_tracing()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import unicode_literals
+
+import datetime
+import os
+import zipfile
+
+import openpyxl
+import pytest
+
+import surveyor
+import surveyor.elements as elements
+import surveyor.native as native
+import surveyor.parse as parse
+
+
+TEMPLATE_XML = """
+<workbook classes="surveyor_native_stylers">
+    <sheet name="Data &amp; more" autosize="true" freeze-row="2" freeze-column="2">
+        <table startcell="B2" class="Bordered">
+            <tr class="Italic">
+                <td font-bold="true" pattern-fill-patternType="solid" pattern-fill-fgColor="DDDDDD">Name</td>
+                <td number_format="0.00" alignment-horizontal="center">1.5</td>
+                <td>2020-01-31</td>
+            </tr>
+            <tr>
+                <td hyperlink="http://example.com/?a=1&amp;b=2">link</td>
+                <td comment="note" comment-author="author">2</td>
+                <td class="Underline">=SUM(C2:C3)</td>
+                <td>&lt;tag&gt;</td>
+                <td protection-locked="false">x</td>
+            </tr>
+        </table>
+    </sheet>
+    <sheet name="Second">
+        <table>
+            <tr>
+                <td>text</td>
+                <td />
+            </tr>
+        </table>
+    </sheet>
+</workbook>
+"""
+
+STYLERS_MODULE = """
+from openpyxl.styles import Border, Side
+
+from surveyor.classes._base import CellStyle, RowStyle, TableStyle
+
+
+class Underline(CellStyle):
+
+    def stylize(self):
+        self.cell.font = self.cell.font.copy(underline="single")
+
+
+class Italic(RowStyle):
+
+    def stylize(self):
+        for cell in self:
+            cell.font = cell.font.copy(italic=True)
+
+
+class Bordered(TableStyle):
+
+    def stylize(self):
+        for row in self:
+            for cell in row:
+                cell.border = Border(left=Side(style="thin"))
+"""
+
+
+@pytest.fixture
+def stylers_module(tmpdir, monkeypatch):
+    tmpdir.join("surveyor_native_stylers.py").write(STYLERS_MODULE)
+    monkeypatch.syspath_prepend(tmpdir.strpath)
+
+
+def dump_workbook(path):
+    book = openpyxl.load_workbook(path)
+    dump = []
+
+    for sheet in book.worksheets:
+        dump.append((sheet.title, sheet.freeze_panes))
+        for row in sheet.rows:
+            for cell in row:
+                dump.append((cell.coordinate, cell.value, cell.number_format, cell.font.b, cell.font.i,
+                             cell.font.u, cell.fill.fgColor.rgb, cell.border.left.style, cell.alignment.horizontal,
+                             cell.protection.locked, cell.comment and (cell.comment.text, cell.comment.author)))
+
+    return dump
+
+
+def test_same_as_openpyxl(stylers_module, tmpdir):
+    template = parse.parse_fileobj(TEMPLATE_XML)
+    default_path = tmpdir.join("default.xlsx").strpath
+    native_path = tmpdir.join("native.xlsx").strpath
+
+    template.process().save(default_path)
+    template.process(mode=elements.WorkBook.MODE_NATIVE).save(native_path)
+
+    assert dump_workbook(native_path) == dump_workbook(default_path)
+
+
+def test_package_parts(stylers_module, tmpdir):
+    path = tmpdir.join("native.xlsx").strpath
+    parse.parse_fileobj(TEMPLATE_XML).process(mode=elements.WorkBook.MODE_NATIVE).save(path)
+
+    with zipfile.ZipFile(path) as archive:
+        sheet_xml = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        rels_xml = archive.read("xl/worksheets/_rels/sheet1.xml.rels").decode("utf-8")
+        strings_xml = archive.read("xl/sharedStrings.xml").decode("utf-8")
+        names = archive.namelist()
+
+    assert '<hyperlink ref="B3" r:id="rId1"/>' in sheet_xml
+    assert 'Target="http://example.com/?a=1&amp;b=2" TargetMode="External"' in rels_xml
+    assert '<col min="2" max="2" width="11" customWidth="1" bestFit="1"/>' in sheet_xml.replace(".0", "")
+    assert "<t>&lt;tag&gt;</t>" in strings_xml
+    assert "xl/comments1.xml" in names
+    assert "xl/drawings/commentsDrawing1.vml" in names
+    assert "xl/worksheets/_rels/sheet2.xml.rels" not in names
+
+
+def test_shared_strings_and_styles_deduplicated():
+    book = native.NativeWorkbook()
+    sheet = book.create_sheet(title="Sheet")
+    bold = openpyxl.styles.Font(bold=True)
+    for row in range(1, 4):
+        cell = sheet.cell(row=row, column=1)
+        cell.value = "same"
+        cell.font = openpyxl.styles.Font(bold=True) if row == 3 else bold
+
+    writer = native.NativeWriter(book)
+    sheet_writer = native.SheetWriter(sheet, writer.strings, writer.styles)
+    cells = [sheet_writer.write_cell(sheet.cell(row=row, column=1)) for row in range(1, 4)]
+
+    assert writer.strings == {"same": 0}
+    assert cells == ['<c r="A{0}" s="1" t="s"><v>0</v></c>'.format(row) for row in range(1, 4)]
+    assert len(writer.styles.fonts) == 2
+
+
+@pytest.mark.parametrize("value, data_type, number_format", (
+    (1, "n", "General"),
+    (True, "b", "General"),
+    ("=A1", "f", "General"),
+    ("#N/A", "e", "General"),
+    ("text", "s", "General"),
+    (datetime.date(2020, 1, 31), "n", "yyyy-mm-dd"),
+    (datetime.datetime(2020, 1, 31, 1, 2), "n", "yyyy-mm-dd h:mm:ss"),
+))
+def test_cell_value_types(value, data_type, number_format):
+    cell = native.NativeWorkbook().create_sheet().cell(row=1, column=1)
+    cell.value = value
+
+    assert cell.value == value
+    assert cell.data_type == data_type
+    assert cell.number_format == number_format
+
+
+def test_illegal_characters():
+    cell = native.NativeWorkbook().create_sheet().cell("A1")
+
+    with pytest.raises(openpyxl.utils.exceptions.IllegalCharacterError):
+        cell.value = "\x01"
+
+
+def test_main_native(tmpdir, monkeypatch):
+    template = tmpdir.join("template.xml")
+    template.write("<workbook><sheet><table><tr><td>1</td></tr></table></sheet></workbook>")
+    output = tmpdir.join("output.xlsx")
+
+    monkeypatch.setattr("sys.argv", ["surveyor", "--native", "-o", output.strpath, template.strpath])
+
+    assert surveyor.main() == os.EX_OK
+    assert openpyxl.load_workbook(output.strpath).worksheets[0]["A1"].value == 1
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import unicode_literals
+
+import io
+import sys
+
+import openpyxl
+import pytest
+
+import surveyor.batch as batch
+import surveyor.output as output
+import surveyor.parse as parse
+
+
+XML = """
+<workbook>
+    <sheet name="Streamed" autosize="true">
+        <table>
+            <tr>
+                <td font-bold="true" comment="comment" hyperlink="http://example.org">1</td>
+                <td>text</td>
+            </tr>
+        </table>
+    </sheet>
+    <sheet />
+</workbook>
+""".strip()
+
+
+class Pipe(object):
+    """Stream which can be only written into, like a socket."""
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(data)
+
+    @property
+    def content(self):
+        return b"".join(self.writes)
+
+
+def check_workbook(content):
+    result = openpyxl.load_workbook(io.BytesIO(content))
+
+    assert result.get_sheet_names() == ["Streamed", "Sheet2"]
+    assert result.worksheets[0]["A1"].value == 1
+    assert result.worksheets[0]["A1"].font.bold
+    assert result.worksheets[0]["A1"].comment.text == "comment"
+    assert result.worksheets[0]["B1"].value == "text"
+
+
+def test_chunked_writer():
+    pipe = Pipe()
+    writer = output.ChunkedWriter(pipe, chunk_size=4)
+
+    writer.write(b"ab")
+    assert pipe.writes == []
+    writer.write(b"cde")
+    assert pipe.writes == [b"abcde"]
+    writer.write(b"f")
+    assert writer.tell() == 6
+    assert not hasattr(writer, "seek")
+
+    writer.flush()
+    assert pipe.writes == [b"abcde", b"f"]
+
+
+@pytest.mark.skipif(sys.version_info < (3, 5), reason="zipfile cannot write into unseekable streams")
+@pytest.mark.parametrize("mode, workers", (("default", None), ("stream", None), ("native", None), ("default", 2)))
+def test_save_into_pipe(mode, workers):
+    pipe = Pipe()
+    output.save(parse.parse_fileobj(XML).process(mode=mode, workers=workers), pipe)
+
+    check_workbook(pipe.content)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 5), reason="zipfile cannot write into unseekable streams")
+def test_render_stdin_to_stdout(tmpdir, monkeypatch):
+    stdout = io.TextIOWrapper(io.BytesIO())
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(XML.encode("utf-8"))))
+    monkeypatch.setattr(sys, "stdout", stdout)
+
+    batch.render(output.STDIO_FILENAME, output.STDIO_FILENAME)
+
+    check_workbook(stdout.buffer.getvalue())
+
+
+def test_parse_stdin_streaming(monkeypatch):
+    monkeypatch.setattr(sys, "stdin", io.BytesIO(XML.encode("utf-8")))
+
+    workbook = parse.parse_filename(output.STDIO_FILENAME, streaming=True)
+
+    assert workbook.children[0].name == "Streamed"
@@ -3,7 +3,10 @@
 
 from __future__ import unicode_literals
 
+import datetime
+
 import pytest
+import six
 
 import surveyor.exceptions as exceptions
 import surveyor.parse as parse
@@ -285,3 +288,191 @@ def test_cell_text_guessing(text, result):
     workbook = parse.parse_fileobj(xml)
 
     assert workbook.children[0].children[0].children[0].children[0].value == result
+
+
+TYPED_XML = """
+<workbook>
+    <sheet>
+        <table types="str,int,,date">
+            <tr>
+                <td>007</td>
+                <td>7</td>
+                <td>7.5</td>
+                <td>2020-01-31</td>
+                <td>8</td>
+            </tr>
+            <tr>
+                <td type="auto">007</td>
+                <td>{{ count }}</td>
+                <td type="str">7.5</td>
+                <td />
+                <td type="float">8</td>
+            </tr>
+        </table>
+    </sheet>
+</workbook>
+"""
+
+
+@pytest.mark.parametrize("streaming", (False, True))
+def test_cell_type_hints(streaming):
+    workbook = parse.parse_fileobj(TYPED_XML, streaming=streaming)
+    first, second = workbook.children[0].children[0].children
+
+    assert [cell.value for cell in first.children] == ["007", 7, 7.5, datetime.date(2020, 1, 31), 8]
+    assert [cell.value for cell in second.children][2:] == ["7.5", "", 8.0]
+    assert second.children[0].value == 7
+    assert second.children[1].value.names == ("count",)
+
+
+def test_cell_unknown_type():
+    with pytest.raises(exceptions.UnknownTypeError):
+        parse.parse_fileobj('<workbook><sheet><table types="str,decimal" /></sheet></workbook>')
+
+
+def test_cell_type_mismatch():
+    with pytest.raises(exceptions.TypeHintError):
+        parse.parse_fileobj('<workbook><sheet><table><tr><td type="int">text</td></tr></table></sheet></workbook>')
+
+
+STREAMING_XML = """
+<workbook>
+    <sheet name="First" autosize="true">
+        <table startcell="B2" class="Table">
+            <tr class="Row">
+                <td class="Cell" font-bold="true">Name</td>
+                <td number_format="0.00">1.5</td>
+            </tr>
+            <unknown><td>skipped</td></unknown>
+            <tr>
+                <td hyperlink="http://example.com">link</td>
+                <td comment="text" comment-author="author">2</td>
+                <td />
+            </tr>
+        </table>
+    </sheet>
+    <sheet />
+</workbook>
+""".strip()
+
+
+def dump_tree(workbook):
+    dump = []
+
+    for sheet in workbook.children:
+        dump.append((sheet.name, sheet.autosize, sheet.klass))
+        for table in sheet.children:
+            dump.append((table.start_cell, table.klass))
+            for row in table.children:
+                dump.append(row.klass)
+                for cell in row.children:
+                    dump.append((cell.klass, cell.value, cell.number_format, cell.hyperlink,
+                                 cell.comment and cell.comment.text, dict(cell.styles_by_prefix)))
+
+    return dump
+
+
+def test_streaming_same_as_tree():
+    tree = parse.parse_fileobj(STREAMING_XML)
+    streamed = parse.parse_fileobj(STREAMING_XML, streaming=True)
+
+    assert dump_tree(streamed) == dump_tree(tree)
+    assert streamed.children[0].parent is streamed
+    assert streamed.children[0].children[0].children[0].children[0].parent.klass == "Row"
+
+
+def test_streaming_filename(tmpdir):
+    template = tmpdir.join("template.xml")
+    template.write(STREAMING_XML)
+
+    tree = parse.parse_filename(template.strpath)
+    streamed = parse.parse_filename(template.strpath, streaming=True)
+
+    assert dump_tree(streamed) == dump_tree(tree)
+
+
+def test_streaming_stdlib_etree():
+    import xml.etree.ElementTree as ElementTree
+
+    events = ElementTree.iterparse(six.BytesIO(STREAMING_XML.encode("utf-8")), events=parse.ITERPARSE_EVENTS)
+    streamed = parse.iterparse_xml(events)
+
+    assert dump_tree(streamed) == dump_tree(parse.parse_fileobj(STREAMING_XML))
+
+
+def test_streaming_clears_consumed_elements():
+    roots = []
+
+    def events():
+        for event, element in parse.etree.iterparse(six.BytesIO(STREAMING_XML.encode("utf-8")),
+                                                    events=parse.ITERPARSE_EVENTS):
+            if not roots:
+                roots.append(element)
+            yield event, element
+
+    parse.iterparse_xml(events())
+
+    assert len(roots[0]) <= 1
+    assert all(len(element) == 0 for element in roots[0])
+
+
+# noinspection PyUnresolvedReferences
+def test_streaming_incorrect_root():
+    with pytest.raises(exceptions.UnexpectedTagError):
+        parse.parse_fileobj("<root><workbook /></root>", streaming=True)
+
+
+def test_workbook_mode():
+    assert parse.parse_fileobj("<workbook />").mode == "default"
+    assert parse.parse_fileobj('<workbook mode="stream" />').mode == "stream"
+
+
+# noinspection PyUnresolvedReferences
+def test_workbook_unknown_mode():
+    with pytest.raises(exceptions.UnknownModeError):
+        parse.parse_fileobj('<workbook mode="unknown" />')
+
+
+def test_cell_compact_model():
+    xml = """
+    <workbook>
+        <sheet>
+            <table>
+                <tr>
+                    <td font-bold="true" border-top="thin">1</td>
+                    <td border-top="thin" font-bold="true">2</td>
+                    <td>3</td>
+                </tr>
+            </table>
+        </sheet>
+    </workbook>
+    """.strip()
+
+    workbook = parse.parse_fileobj(xml)
+    first, second, third = workbook.children[0].children[0].children[0].children
+
+    assert not hasattr(first, "__dict__")
+    assert first.style_key is second.style_key
+    assert first.styles_by_prefix == {"font": {"bold": "true"}, "border": {"top": "thin"}}
+    assert third.style_key == ()
+    assert third.children == ()
+
+
+@pytest.mark.parametrize("streaming", (False, True))
+def test_style_keys_interned_per_parse(streaming):
+    xml = """
+    <workbook>
+        <sheet>
+            <table>
+                <tr><td font-bold="true">1</td><td font-bold="true">2</td></tr>
+            </table>
+        </sheet>
+    </workbook>
+    """.strip()
+
+    first = parse.parse_fileobj(xml, streaming=streaming).children[0].children[0].children[0].children
+    second = parse.parse_fileobj(xml, streaming=streaming).children[0].children[0].children[0].children
+
+    assert first[0].style_key is first[1].style_key
+    assert first[0].style_key == second[0].style_key
+    assert first[0].style_key is not second[0].style_key
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import unicode_literals
+
+import pickle
+
+import pytest
+
+import surveyor.exceptions as exceptions
+import surveyor.placeholders as placeholders
+
+
+@pytest.mark.parametrize("value", (None, 1, 1.5, "", "text", "{ name }", "{{ }}", "{{ 1name }}"))
+def test_compile_without_placeholders(value):
+    assert placeholders.compile_text(value) == value
+
+
+@pytest.mark.parametrize("value, params, expected", (
+    ("{{ name }}", {"name": 42}, 42),
+    ("{{name}}", {"name": "x"}, "x"),
+    ("Customer: {{ customer.name }}!", {"customer.name": "ACME"}, "Customer: ACME!"),
+    ("{{ a }}{{ b }}", {"a": 1, "b": 2}, "12"),
+    ("{{ a }} and {{ a }}", {"a": "x"}, "x and x")))
+def test_render(value, params, expected):
+    text = placeholders.compile_text(value)
+
+    assert isinstance(text, placeholders.Text)
+    assert text.render(params) == expected
+    assert placeholders.substitute(text, params) == expected
+    assert pickle.loads(pickle.dumps(text, 2)) == text
+
+
+def test_source():
+    text = placeholders.compile_text("Period {{period}}: {{  name }}")
+
+    assert text.names == ("period", "name")
+    assert str(text) == "Period {{ period }}: {{ name }}"
+
+
+def test_unknown_parameter():
+    with pytest.raises(exceptions.UnknownParameterError):
+        placeholders.compile_text("{{ name }}").render({"other": 1})
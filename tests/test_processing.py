@@ -3,10 +3,19 @@
 
 from __future__ import unicode_literals
 
+import io
+import zipfile
+
+import mock
+import openpyxl
 import openpyxl.styles
 import pytest
 
+import surveyor.classes.simple as simple
+import surveyor.elements as elements
+import surveyor.exceptions as exceptions
 import surveyor.parse as parse
+import surveyor.stream as stream
 
 
 def test_check_sheet_names():
@@ -376,3 +385,537 @@ def test_border(border, text, style, color):
         assert cell_border.color is None
     else:
         assert cell_border.color == openpyxl.styles.Color(color)
+
+
+def render_stream(xml, tmpdir):
+    workbook = parse.parse_fileobj(xml).process(mode="stream")
+    output_path = tmpdir.join("output.xlsx").strpath
+    workbook.save(output_path)
+
+    return output_path
+
+
+def test_stream_mode_attribute(tmpdir):
+    xml = """
+    <workbook mode="stream">
+        <sheet>
+            <table>
+                <tr>
+                    <td>1</td>
+                </tr>
+            </table>
+        </sheet>
+    </workbook>
+    """
+
+    workbook = parse.parse_fileobj(xml).process()
+
+    assert workbook.write_only
+
+
+def test_stream_same_values(tmpdir):
+    xml = """
+    <workbook>
+        <sheet freeze-row="2">
+            <table startcell="D1">
+                <tr>
+                    <td>Right</td>
+                    <td>Table</td>
+                </tr>
+                <tr>
+                    <td>1</td>
+                    <td>2</td>
+                </tr>
+            </table>
+            <table>
+                <tr>
+                    <td>Left</td>
+                </tr>
+                <tr>
+                    <td>3</td>
+                </tr>
+                <tr>
+                    <td>4.5</td>
+                </tr>
+            </table>
+            <table startcell="A10">
+                <tr>
+                    <td>Bottom</td>
+                </tr>
+            </table>
+        </sheet>
+        <sheet name="Second" />
+    </workbook>
+    """
+
+    expected = parse.parse_fileobj(xml).process()
+    result = openpyxl.load_workbook(render_stream(xml, tmpdir))
+
+    assert result.get_sheet_names() == expected.get_sheet_names()
+    assert result.worksheets[0].freeze_panes == "A2"
+    for row in range(1, 11):
+        for column in range(1, 6):
+            assert result.worksheets[0].cell(row=row, column=column).value == \
+                expected.worksheets[0].cell(row=row, column=column).value
+
+
+def test_stream_styles_comments_hyperlinks(tmpdir):
+    xml = """
+    <workbook>
+        <sheet autosize="true">
+            <table>
+                <tr>
+                    <td font-bold="true" number_format="0.00" hyperlink="http://example.com"
+                        comment="comment" comment-author="author">1</td>
+                    <td>Very long text value</td>
+                </tr>
+            </table>
+        </sheet>
+    </workbook>
+    """
+
+    output_path = render_stream(xml, tmpdir)
+    result = openpyxl.load_workbook(output_path)
+    cell = result.worksheets[0].cell(row=1, column=1)
+
+    assert cell.font.bold
+    assert cell.number_format == "0.00"
+    assert cell.comment.text == "comment"
+    assert cell.comment.author == "author"
+    assert result.worksheets[0].column_dimensions["B"].width == len("Very long text value") + 1
+
+    with zipfile.ZipFile(output_path) as archive:
+        sheet_xml = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        rels_xml = archive.read("xl/worksheets/_rels/sheet1.xml.rels").decode("utf-8")
+
+    assert 'ref="A1"' in sheet_xml
+    assert "http://example.com" in rels_xml
+
+
+STYLERS_MODULE = """
+from surveyor.classes._base import CellStyle, RowStyle
+
+
+class Bold(CellStyle):
+
+    calls = 0
+
+    def stylize(self):
+        Bold.calls += 1
+        self.cell.font = self.cell.font.copy(bold=True)
+
+
+class Inherited(CellStyle):
+    pass
+
+
+class Coordinates(RowStyle):
+
+    seen = []
+
+    def stylize(self):
+        Coordinates.seen.extend(cell.coordinate for cell in self)
+"""
+
+
+@pytest.fixture
+def stylers_module(tmpdir, monkeypatch):
+    tmpdir.join("surveyor_test_stylers.py").write(STYLERS_MODULE)
+    monkeypatch.syspath_prepend(tmpdir.strpath)
+
+    import surveyor_test_stylers
+    surveyor_test_stylers.Bold.calls = 0
+    surveyor_test_stylers.Coordinates.seen = []
+
+    return surveyor_test_stylers
+
+
+def test_stylers_lookup_table(stylers_module):
+    xml = """
+    <workbook classes="surveyor_test_stylers">
+        <sheet>
+            <table>
+                <tr class="Coordinates">
+                    <td class="Bold">1</td>
+                    <td class="Inherited">2</td>
+                    <td class="Bold">3</td>
+                    <td>4</td>
+                </tr>
+            </table>
+        </sheet>
+    </workbook>
+    """
+
+    parsed = parse.parse_fileobj(xml)
+    workbook = parsed.process()
+    sheet = workbook.worksheets[0]
+
+    assert stylers_module.Bold.calls == 2
+    assert stylers_module.Coordinates.seen == ["A1", "B1", "C1", "D1"]
+    assert sheet.cell(row=1, column=1).font.bold
+    assert not sheet.cell(row=1, column=2).font.bold
+    assert sheet.cell(row=1, column=3).font.bold
+
+    assert parsed.stylers[elements.FrozenCell, "Bold"] is stylers_module.Bold
+    assert parsed.stylers[elements.FrozenRow, "Coordinates"] is stylers_module.Coordinates
+    assert parsed.stylers[elements.FrozenCell, "Inherited"] is None
+    assert parsed.stylers[elements.FrozenCell, None] is None
+    assert parsed.stylers[elements.FrozenTable, None] is None
+    assert parsed.stylers[elements.FrozenSheet, None] is None
+
+
+def test_noop_stylers_not_created():
+    xml = """
+    <workbook>
+        <sheet>
+            <table>
+                <tr>
+                    <td>1</td>
+                </tr>
+            </table>
+        </sheet>
+    </workbook>
+    """
+
+    with mock.patch.object(simple.Cell, "__init__") as cell_init:
+        parse.parse_fileobj(xml).process()
+
+    assert not cell_init.called
+
+
+def test_autosize():
+    xml = """
+    <workbook>
+        <sheet autosize="true">
+            <table>
+                <tr>
+                    <td>Name</td>
+                    <td>=SUM(A1:A100000000)</td>
+                </tr>
+                <tr>
+                    <td>Much longer last row</td>
+                    <td>1</td>
+                </tr>
+            </table>
+            <table startcell="E1">
+                <tr>
+                    <td>123456789012.5</td>
+                </tr>
+            </table>
+        </sheet>
+    </workbook>
+    """
+
+    workbook = parse.parse_fileobj(xml).process()
+    sheet = workbook.worksheets[0]
+
+    assert sheet.column_dimensions["A"].width == len("Much longer last row") + 1
+    assert sheet.column_dimensions["B"].width == 11
+    assert sheet.column_dimensions["E"].width == len("123456789012.5") + 1
+    assert "C" not in sheet.column_dimensions
+    assert len(sheet.get_cell_collection()) == 5
+
+
+PARALLEL_XML = """
+<workbook>
+    <sheet name="First" autosize="true" freeze-row="2">
+        <table>
+            <tr>
+                <td font-bold="true" hyperlink="http://example.com">Shared</td>
+                <td number_format="0.000">1.5</td>
+            </tr>
+            <tr>
+                <td comment="comment" comment-author="author">First only</td>
+                <td fill-pattern_type="solid" fill-fgColor="FF0000">2</td>
+            </tr>
+        </table>
+    </sheet>
+    <sheet name="First">
+        <table>
+            <tr>
+                <td font-italic="true" number_format="0.0000">Second only</td>
+                <td font-bold="true">Shared</td>
+            </tr>
+            <tr>
+                <td hyperlink="http://example.org" comment="other" comment-author="author">3</td>
+            </tr>
+        </table>
+    </sheet>
+    <sheet name="Empty" />
+</workbook>
+"""
+
+
+def read_package(path):
+    with zipfile.ZipFile(path) as archive:
+        # Core properties keep creation time.
+        return dict((name, archive.read(name)) for name in archive.namelist() if name != "docProps/core.xml")
+
+
+@pytest.mark.parametrize("mode", ("default", "stream"))
+def test_parallel_same_package(mode, tmpdir):
+    template = parse.parse_fileobj(PARALLEL_XML)
+    serial_path = tmpdir.join("serial.xlsx").strpath
+    parallel_path = tmpdir.join("parallel.xlsx").strpath
+
+    template.process(mode=mode).save(serial_path)
+    template.process(mode=mode, workers=2).save(parallel_path)
+
+    serial = read_package(serial_path)
+    parallel = read_package(parallel_path)
+
+    assert sorted(parallel) == sorted(serial)
+    for name in serial:
+        if mode == "default" or name.startswith("xl/worksheets/"):
+            assert parallel[name] == serial[name], name
+
+    result = openpyxl.load_workbook(parallel_path)
+    assert result.get_sheet_names() == ["First", "First1", "Empty"]
+    assert result.worksheets[1].cell(row=1, column=2).font.bold
+    assert result.worksheets[1].cell(row=1, column=1).number_format == "0.0000"
+    assert result.worksheets[1].cell(row=2, column=1).comment.text == "other"
+
+
+def test_parallel_remap_cells():
+    from surveyor.parallel import remap_cells
+
+    data = b'<c r="A1" s="1" t="s"><v>0</v></c><c r="B1" t="n"><v>1</v></c><c r="C1" t="s"><v>1</v></c>'
+
+    assert remap_cells(data, [0, 1], [0, 1]) is data
+    assert remap_cells(data, [0, 3], [5, 2]) == \
+        b'<c r="A1" s="3" t="s"><v>5</v></c><c r="B1" t="n"><v>1</v></c><c r="C1" t="s"><v>2</v></c>'
+
+
+def test_parallel_remap_cells_attribute_order():
+    from surveyor.parallel import remap_cells
+
+    data = (b'<cols><col min="1" /></cols><c s="1" r="A1" t="s"><v>0</v></c><c t="s" r="B1"><v>1</v></c>'
+            b'<c t="n" s="1" r="C1"><v>1</v></c><c s="1" r="D1"/><c r="E1" t="str"><v>1</v></c>')
+
+    assert remap_cells(data, [0, 7], [5, 2]) == \
+        (b'<cols><col min="1" /></cols><c s="7" r="A1" t="s"><v>5</v></c><c t="s" r="B1"><v>2</v></c>'
+         b'<c t="n" s="7" r="C1"><v>1</v></c><c s="7" r="D1"/><c r="E1" t="str"><v>1</v></c>')
+
+
+DATA_XML = """
+<workbook>
+    <sheet autosize="true">
+        <table data="orders" startcell="B2">
+            <tr>
+                <td font-bold="true">Id</td>
+                <td>Amount</td>
+                <td>Note</td>
+            </tr>
+            <tr template="true">
+                <td field="id" font-italic="true" />
+                <td field="amount" number_format="0.00" />
+                <td>static</td>
+            </tr>
+            <tr>
+                <td>Total</td>
+            </tr>
+        </table>
+        <table startcell="B20">
+            <tr>
+                <td>Below</td>
+            </tr>
+        </table>
+    </sheet>
+</workbook>
+"""
+
+
+def make_orders(count):
+    for idx in range(count):
+        yield {"id": "order-number-{0}".format(idx), "amount": idx * 1.5}
+
+
+@pytest.mark.parametrize("mode", ("default", "stream"))
+def test_data_table(mode, tmpdir):
+    output_path = tmpdir.join("output.xlsx").strpath
+    template = parse.parse_fileobj(DATA_XML)
+    template.process(mode=mode, data={"orders": make_orders(3)}).save(output_path)
+
+    sheet = openpyxl.load_workbook(output_path).active
+
+    assert [[cell.value for cell in row] for row in sheet.iter_rows("B2:D6")] == [
+        ["Id", "Amount", "Note"],
+        ["order-number-0", 0, "static"],
+        ["order-number-1", 1.5, "static"],
+        ["order-number-2", 3, "static"],
+        ["Total", None, None]]
+    assert sheet["B3"].font.italic
+    assert sheet["C4"].number_format == "0.00"
+    assert sheet["B2"].font.bold
+    assert sheet["B20"].value == "Below"
+    # Amount of rendered records belongs to render, not to template.
+    assert template.children[0].children[0].data_rows == 0
+    if mode == "default":
+        assert sheet.column_dimensions["B"].width == len("order-number-0") + 1
+
+
+def test_data_table_sequences():
+    xml = """
+    <workbook>
+        <sheet>
+            <table data="rows">
+                <tr template="true">
+                    <td field="ignored" />
+                    <td />
+                </tr>
+            </table>
+        </sheet>
+    </workbook>
+    """
+
+    sheet = parse.parse_fileobj(xml).process(data={"rows": [(1, "a", "extra"), [2]]}).active
+
+    assert sheet["A1"].value == 1
+    assert sheet["B1"].value == "a"
+    assert sheet["C1"].value is None
+    assert sheet["A2"].value == 2
+    assert sheet["B2"].value is None
+
+
+def test_data_table_stream_flushes_rows(tmpdir):
+    workbook = parse.parse_fileobj(DATA_XML).process(mode="stream", data={"orders": make_orders(100)})
+
+    # Everything above the last table is written before the table is rendered.
+    assert workbook.active._max_row >= 19
+
+
+def test_stream_template_table_flushes_rows(monkeypatch):
+    rows = "".join("<tr><td>{0}</td><td>text</td></tr>".format(idx) for idx in range(100))
+    xml = "<workbook><sheet><table>{0}</table></sheet></workbook>".format(rows)
+    buffered = []
+    cell = stream.RowBuffer.cell
+
+    def spy_cell(self, row, column):
+        buffered.append(len(self.rows))
+        return cell(self, row, column)
+
+    monkeypatch.setattr(stream.RowBuffer, "cell", spy_cell)
+    workbook = parse.parse_fileobj(xml).process(mode="stream")
+
+    # Rows are written while table is rendered, buffer stays small.
+    assert max(buffered) <= 1
+    assert workbook.active._max_row == 100
+
+
+def test_data_table_unknown_data():
+    with pytest.raises(exceptions.UnknownDataError):
+        parse.parse_fileobj(DATA_XML).process(data={"customers": []})
+
+
+@pytest.mark.parametrize("xml", (
+    "<workbook><sheet><table><tr template='true' /></table></sheet></workbook>",
+    "<workbook><sheet><table data='x'><tr template='true' /><tr template='true' /></table></sheet></workbook>"))
+def test_data_table_broken_template(xml):
+    with pytest.raises(exceptions.RowTemplateError):
+        parse.parse_fileobj(xml)
+
+
+def test_data_table_without_template():
+    xml = "<workbook><sheet><table data='x'><tr><td /></tr></table></sheet></workbook>"
+
+    with pytest.raises(exceptions.RowTemplateError):
+        parse.parse_fileobj(xml).process(data={"x": []})
+
+
+PLAN_XML = """
+<workbook classes="surveyor_test_stylers">
+    <sheet name="Report {{ period }}" autosize="true" freeze-row="2">
+        <table>
+            <tr class="Coordinates">
+                <td class="Bold">Customer</td>
+                <td hyperlink="http://example.com/{{ customer }}" comment="For {{ customer }}" comment-author="a">
+                    {{ customer }}
+                </td>
+            </tr>
+            <tr>
+                <td font-italic="true" number_format="0.00">{{ amount }}</td>
+                <td pattern-fill-patternType="solid" pattern-fill-fgColor="FF0000">Static text</td>
+            </tr>
+        </table>
+        <table data="orders" startcell="D1">
+            <tr template="true">
+                <td field="id" class="Bold" />
+            </tr>
+        </table>
+    </sheet>
+    <sheet name="Second" />
+</workbook>
+"""
+
+
+def test_params(stylers_module):
+    params = {"period": "2016-01", "customer": "ACME", "amount": 12.5}
+    book = parse.parse_fileobj(PLAN_XML).process(params=params, data={"orders": []})
+    sheet = book.worksheets[0]
+
+    assert sheet.title == "Report 2016-01"
+    assert sheet["B1"].value == "ACME"
+    assert sheet["B1"].hyperlink == "http://example.com/ACME"
+    assert sheet["B1"].comment.text == "For ACME"
+    assert sheet["A2"].value == 12.5
+
+
+def test_params_unknown():
+    with pytest.raises(exceptions.UnknownParameterError):
+        parse.parse_fileobj("<workbook><sheet><table><tr><td>{{ x }}</td></tr></table></sheet></workbook>").process()
+
+
+@pytest.mark.parametrize("mode", ("default", "stream", "native", "plan"))
+def test_params_typed_only_in_values(mode):
+    template = parse.parse_fileobj("""
+        <workbook>
+            <sheet name="{{ year }}">
+                <table><tr><td comment="{{ year }}" hyperlink="{{ year }}">{{ year }}</td></tr></table>
+            </sheet>
+        </workbook>""")
+    params = {"year": 2016}
+    if mode == "plan":
+        book = template.compile().render(params=params)
+    else:
+        book = template.process(mode=mode, params=params)
+
+    content = io.BytesIO()
+    book.save(content)
+    sheet = openpyxl.load_workbook(io.BytesIO(content.getvalue())).worksheets[0]
+    with zipfile.ZipFile(io.BytesIO(content.getvalue())) as archive:
+        rels = archive.read("xl/worksheets/_rels/sheet1.xml.rels").decode("utf-8")
+
+    assert sheet.title == "2016"
+    assert sheet["A1"].value == 2016
+    assert sheet["A1"].comment.text == "2016"
+    assert 'Target="2016"' in rels
+
+
+def test_render_plan_same_package(stylers_module, tmpdir):
+    template = parse.parse_fileobj(PLAN_XML)
+    plan = template.compile()
+
+    for customer in ("ACME", "Initech"):
+        params = {"period": "2016-01", "customer": customer, "amount": 12.5}
+        data = {"orders": [{"id": "first order"}, {"id": "second"}]}
+        serial_path = tmpdir.join("generic.xlsx").strpath
+        plan_path = tmpdir.join("plan.xlsx").strpath
+
+        template.process(params=params, data=data).save(serial_path)
+        generic_seen = stylers_module.Coordinates.seen[:]
+        plan.render(params=params, data=data).save(plan_path)
+
+        assert stylers_module.Coordinates.seen == generic_seen * 2
+        stylers_module.Coordinates.seen = []
+
+        serial = read_package(serial_path)
+        assert read_package(plan_path) == serial
+        assert customer.encode("utf-8") in serial["xl/sharedStrings.xml"]
+
+
+def test_render_plan_delegates_stream_mode():
+    template = parse.parse_fileobj("<workbook><sheet><table><tr><td>{{ x }}</td></tr></table></sheet></workbook>")
+
+    book = template.compile().render(params={"x": 1}, mode="stream")
+
+    assert book.write_only
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import unicode_literals
+
+import json
+import os
+import pstats
+
+import surveyor
+import surveyor.profiling as profiling
+
+
+TEMPLATE_XML = """
+<workbook>
+    <sheet>
+        <table>
+            <tr>
+                <td font-bold="true">1</td>
+            </tr>
+        </table>
+    </sheet>
+</workbook>
+"""
+
+
+class FakeStats(object):
+
+    def __init__(self, stats):
+        self.stats = stats
+
+
+def test_collapse_stacks():
+    main, first, second, leaf = [("module.py", idx, name) for idx, name in enumerate(("main", "a", "b", "leaf"))]
+    stats = FakeStats({
+        main: (1, 1, 1.0, 10.0, {}),
+        first: (1, 1, 1.0, 4.0, {main: (1, 1, 1.0, 4.0)}),
+        second: (1, 1, 1.0, 5.0, {main: (1, 1, 1.0, 5.0)}),
+        leaf: (2, 2, 7.0, 7.0, {first: (1, 1, 3.0, 3.0), second: (1, 1, 4.0, 4.0)}),
+    })
+
+    stacks = profiling.collapse_stacks(stats)
+
+    assert stacks == {
+        "main (module.py:0)": 1.0,
+        "main (module.py:0);a (module.py:1)": 1.0,
+        "main (module.py:0);b (module.py:2)": 1.0,
+        "main (module.py:0);a (module.py:1);leaf (module.py:3)": 3.0,
+        "main (module.py:0);b (module.py:2);leaf (module.py:3)": 4.0,
+    }
+
+
+def test_main_profile_out(tmpdir, monkeypatch):
+    template = tmpdir.join("template.xml")
+    template.write(TEMPLATE_XML)
+    output = tmpdir.join("output.xlsx")
+    profile_dir = tmpdir.join("profile")
+
+    monkeypatch.setattr("sys.argv", ["surveyor", "-o", output.strpath, "--profile-out", profile_dir.strpath,
+                                     template.strpath])
+
+    assert surveyor.main() == os.EX_OK
+    assert output.check()
+
+    assert pstats.Stats(profile_dir.join(profiling.PSTATS_FILENAME).strpath).total_calls > 0
+    stacks = profile_dir.join(profiling.STACKS_FILENAME).readlines()
+    assert any(line.startswith("run (__init__.py:") for line in stacks)
+    assert json.loads(profile_dir.join(profiling.METRICS_FILENAME).read())["counters"]["cells"] == 1
+
+    memory = profile_dir.join(profiling.MEMORY_FILENAME).read()
+    if profiling.tracemalloc is not None:
+        assert "parse" in memory and "save" in memory
+        assert not profiling.tracemalloc.is_tracing()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+
+from __future__ import unicode_literals
+
+import io
+import os
+import threading
+
+import openpyxl
+import pytest
+
+import surveyor
+import surveyor.server as server
+
+
+TEMPLATE_XML = """
+<workbook>
+    <sheet>
+        <table>
+            <tr>
+                <td font-bold="true">Value</td>
+            </tr>
+        </table>
+    </sheet>
+</workbook>
+"""
+
+
+@pytest.fixture(params=("unix", "tcp"))
+def render_server(request, tmpdir):
+    if request.param == "unix":
+        instance = server.make_server(tmpdir.join("surveyor.sock").strpath, quiet=True)
+        client = server.Client(instance.server_address)
+    else:
+        instance = server.make_server(port=0, quiet=True)
+        client = server.Client(host=instance.server_address[0], port=instance.server_address[1])
+
+    thread = threading.Thread(target=instance.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    def finalize():
+        instance.shutdown()
+        instance.server_close()
+        thread.join()
+    request.addfinalizer(finalize)
+
+    return instance, client
+
+
+def load(content):
+    return openpyxl.load_workbook(io.BytesIO(content)).active
+
+
+def test_render_body(render_server):
+    instance, client = render_server
+
+    sheet = load(client.render(body=TEMPLATE_XML))
+    assert sheet["A1"].value == "Value"
+    assert sheet["A1"].font.bold
+
+    load(client.render(body=TEMPLATE_XML, mode="stream"))
+    assert len(instance.cache) == 1
+
+
+def test_render_path(render_server, tmpdir):
+    instance, client = render_server
+    template = tmpdir.join("template.xml")
+    template.write(TEMPLATE_XML)
+
+    assert load(client.render(path=template.strpath))["A1"].value == "Value"
+    assert load(client.render(path=template.strpath))["A1"].value == "Value"
+    assert len(instance.cache) == 1
+
+
+def test_render_concurrently(render_server):
+    _, client = render_server
+    results = []
+
+    def work():
+        results.append(load(client.render(body=TEMPLATE_XML))["A1"].value)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["Value"] * 4
+
+
+@pytest.mark.parametrize("kwargs, status", (
+    ({"path": "/nonexisting/template.xml"}, 404),
+    ({"body": "<sheet />"}, 400),
+    ({"body": TEMPLATE_XML, "mode": "unknown"}, 400)))
+def test_render_errors(render_server, kwargs, status):
+    _, client = render_server
+
+    with pytest.raises(server.RenderError) as excinfo:
+        client.render(**kwargs)
+
+    assert excinfo.value.status == status
+
+
+def test_client_command(render_server, tmpdir, monkeypatch):
+    instance, client = render_server
+    template = tmpdir.join("template.xml")
+    template.write(TEMPLATE_XML)
+    output = tmpdir.join("output.xlsx")
+
+    if client.socket_path is not None:
+        address = ["--socket", client.socket_path]
+    else:
+        address = ["--host", client.host, "--port", str(client.port)]
+    argv = ["surveyor", "client", "--upload", "-o", output.strpath, template.strpath]
+    monkeypatch.setattr("sys.argv", argv + address)
+
+    assert surveyor.main() == os.EX_OK
+    assert openpyxl.load_workbook(output.strpath).active["A1"].value == "Value"
@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 
 
+import datetime
+
 import pytest
 
+import surveyor.classes._base as base
 import surveyor.utils as utils
 
 
@@ -64,7 +67,69 @@ def test_strtobool_unknown(value):
     ("text", "text"),
     ("1text", "1text"),
     ("2 text", "2 text"),
-    ("1.0 text", "1.0 text")
+    ("1.0 text", "1.0 text"),
+    ("+1", 1),
+    ("1e3", 1000.0),
+    ("-1.5E-1", -0.15),
+    ("inf", float("inf")),
+    ("-Infinity", float("-inf")),
+    ("2020-01-31", datetime.date(2020, 1, 31)),
+    ("2020-01-31T10:20", datetime.datetime(2020, 1, 31, 10, 20)),
+    ("2020-01-31 10:20:30.5", datetime.datetime(2020, 1, 31, 10, 20, 30, 500000)),
+    ("2020-02-30", "2020-02-30"),
+    ("2020-01-31Z", "2020-01-31Z"),
+    ("1-2-3", "1-2-3"),
 ))
 def test_guess_text(value, result):
     assert utils.guess_text(value) == result
+
+
+def test_guess_date_cached():
+    utils.DATE_CACHE.clear()
+
+    first = utils.guess_text("2021-06-01")
+    second = utils.guess_text(" 2021-06-01 ")
+
+    assert first is second
+    assert utils.DATE_CACHE == {"2021-06-01": datetime.date(2021, 6, 1)}
+
+
+# noinspection PyUnresolvedReferences
+@pytest.mark.parametrize("value, type_name, result", (
+    ("1", "str", "1"),
+    (" 1 ", "int", 1),
+    ("1", "float", 1.0),
+    ("2020-01-31", "date", datetime.date(2020, 1, 31)),
+    ("2020-01-31T00:00", "date", datetime.datetime(2020, 1, 31)),
+    ("text", "auto", "text"),
+))
+def test_convert_text(value, type_name, result):
+    converted = utils.convert_text(value, type_name)
+
+    assert converted == result
+    assert type(converted) is type(result)
+
+
+# noinspection PyUnresolvedReferences
+@pytest.mark.parametrize("value, type_name", (
+    ("text", "int"),
+    ("1.5", "int"),
+    ("text", "float"),
+    ("2020-02-30", "date"),
+))
+def test_convert_text_mismatch(value, type_name):
+    with pytest.raises(ValueError):
+        utils.convert_text(value, type_name)
+
+
+# noinspection PyUnresolvedReferences
+@pytest.mark.parametrize("style_class, noop", (
+    (base.CellStyle, True),
+    (base.RowStyle, True),
+    (base.TableStyle, True),
+    (base.SheetStyle, True),
+    (type(str("Inherited"), (base.CellStyle,), {}), True),
+    (type(str("Custom"), (base.CellStyle,), {"stylize": lambda self: None}), False),
+))
+def test_is_noop_styler(style_class, noop):
+    assert base.is_noop(style_class) is noop